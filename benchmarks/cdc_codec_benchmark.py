@@ -0,0 +1,65 @@
+import argparse
+
+from iqrf.transport import cdc
+
+from common import throughput
+
+ARGS = argparse.ArgumentParser(description="CDC codec encode and decode microbenchmark.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=20000, type=int, help="The number of operations per message type.")
+
+PAYLOAD = bytes(range(0x20, 0x60))
+
+# One instance of every registered CDC message type.
+MESSAGES = [
+    cdc.ErrorResponse(),
+    cdc.TestRequest(),
+    cdc.TestResponse(),
+    cdc.ResetRequest(),
+    cdc.ResetResponse(cdc.CdcStatus.OK),
+    cdc.TrResetRequest(),
+    cdc.TrResetResponse(cdc.CdcStatus.OK),
+    cdc.InfoRequest(),
+    cdc.InfoResponse("GW-USB-03", "02.01", "03010000"),
+    cdc.TrInfoRequest(),
+    cdc.TrInfoResponse(PAYLOAD[:32]),
+    cdc.IndicationRequest(),
+    cdc.IndicationResponse(cdc.CdcStatus.OK),
+    cdc.SpiStatusRequest(),
+    cdc.SpiStatusResponse(b"80"),
+    cdc.DataSendRequest(PAYLOAD),
+    cdc.DataSendResponse(cdc.CdcStatus.OK),
+    cdc.DataReceivedReaction(PAYLOAD),
+    cdc.SwitchToCustomClassRequest(),
+    cdc.SwitchToCustomClassResponse(cdc.CdcStatus.OK),
+    cdc.SwitchToUartRequest(),
+    cdc.SwitchToUartResponse(cdc.CdcStatus.OK),
+    cdc.SwitchToSpiRequest(),
+    cdc.SwitchToSpiResponse(cdc.CdcStatus.OK)
+]
+
+
+def run(iterations=20000):
+    results = {}
+
+    for message in MESSAGES:
+        encoded = message.encode()
+        result = results[type(message).__name__] = {
+            "encode_per_s": throughput(message.encode, iterations),
+            "decode_per_s": throughput(lambda: cdc.decode_cdc_message(encoded), iterations)
+        }
+
+        if isinstance(message, cdc.CdcRequest):
+            result["prepared_per_s"] = throughput(message.prepare().encode, iterations)
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, result in run(args.iterations).items():
+        print("{:<30} encode={:>12.0f}/s decode={:>12.0f}/s prepared={:>12.0f}/s".format(
+            name, result["encode_per_s"], result["decode_per_s"], result.get("prepared_per_s", float("nan"))))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import argparse
+import collections
+import time
+
+from iqrf.transport import cdc
+from iqrf.transport.cdc_codec import CdcToken, find_cdc_frame
+from iqrf.util.io import FrameBuffer
+
+ARGS = argparse.ArgumentParser(description="BufferedCdcIo framing benchmark feeding a burst of concatenated reactions.")
+ARGS.add_argument("-n", "--frames", action="store", dest="frames", default=10000, type=int, help="The number of frames in the burst.")
+
+
+class StreamCdcIo(cdc.BufferedCdcIo):
+    """Reads from an in-memory byte stream instead of a serial port."""
+
+    CHUNK_SIZE = 1024
+
+    def __init__(self, stream):
+        self._stream = memoryview(stream)
+        self._frames = FrameBuffer(CdcToken.TERMINATOR, framer=find_cdc_frame)
+        self._reactions = collections.deque()
+
+    def read(self, size, timeout=None):
+        size = min(size, self.CHUNK_SIZE)
+        data, self._stream = self._stream[:size], self._stream[size:]
+        return bytes(data)
+
+    def readinto(self, buffer, timeout=None):
+        count = min(len(buffer), len(self._stream))
+        buffer[:count] = self._stream[:count]
+        self._stream = self._stream[count:]
+        return count
+
+
+class SlicingCdcIo(StreamCdcIo):
+    """Replicates the former bytearray slicing framing for comparison."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self._buffer = bytearray()
+
+    def _read_cdc_message(self, timeout=None):
+        while True:
+            if len(self._buffer) > 0:
+                boundary = self._buffer.find(CdcToken.TERMINATOR)
+                if boundary != -1:
+                    boundary += 1
+                    data = bytes(self._buffer[:boundary])
+                    self._buffer = self._buffer[boundary:]
+
+                    return cdc.decode_cdc_message(data)
+
+            self._buffer.extend(self.read(1024, timeout=timeout))
+
+
+def generate_burst(frames):
+    return b"".join(cdc.DataReceivedReaction(bytes([0x20 + i % 64]) * 16).encode() for i in range(frames))
+
+
+def split_by_slicing(burst):
+    buffer = bytearray(burst)
+    count = 0
+
+    while True:
+        boundary = buffer.find(CdcToken.TERMINATOR)
+        if boundary == -1:
+            return count
+
+        boundary += 1
+        bytes(buffer[:boundary])
+        buffer = buffer[boundary:]
+        count += 1
+
+
+def split_by_frame_buffer(burst, framer=None):
+    frames = FrameBuffer(CdcToken.TERMINATOR, capacity=len(burst) + FrameBuffer.MINIMAL_READ, framer=framer)
+    frames.extend(burst)
+    count = 0
+
+    while frames.next_frame() is not None:
+        count += 1
+
+    return count
+
+
+def run(frames=10000):
+    burst = generate_burst(frames)
+    results = {}
+
+    for name, factory in (("slicing", SlicingCdcIo), ("frame_buffer", StreamCdcIo)):
+        io = factory(burst)
+
+        start = time.perf_counter()
+        for _ in range(frames):
+            io.receive()
+        elapsed = time.perf_counter() - start
+
+        results[name] = {
+            "frames": frames,
+            "frames_per_s": frames / elapsed,
+            "mb_per_s": len(burst) / elapsed / 1e6
+        }
+
+    splits = (
+        ("slicing_framing_only", split_by_slicing),
+        ("frame_buffer_framing_only", split_by_frame_buffer),
+        ("length_aware_framing_only", lambda burst: split_by_frame_buffer(burst, find_cdc_frame))
+    )
+
+    for name, split in splits:
+        start = time.perf_counter()
+        split(burst)
+        elapsed = time.perf_counter() - start
+
+        results[name] = {
+            "frames": frames,
+            "frames_per_s": frames / elapsed,
+            "mb_per_s": len(burst) / elapsed / 1e6
+        }
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, result in run(args.frames).items():
+        print("{:<28} {:>8} frames {:>12.0f} frames/s {:>8.2f} MB/s".format(name, result["frames"], result["frames_per_s"], result["mb_per_s"]))
+
+if __name__ == "__main__":
+    main()
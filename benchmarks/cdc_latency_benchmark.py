@@ -0,0 +1,42 @@
+import argparse
+
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.common import LinkProfile
+from iqrf.transport import cdc
+from iqrf.util.io import wait
+
+from common import measure, print_summary, summarize
+
+ARGS = argparse.ArgumentParser(description="CDC TestRequest round-trip latency benchmark against a simulated device.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=200, type=int, help="The number of round-trips per mode.")
+ARGS.add_argument("-d", "--delay", action="store", dest="delay", default=0.001, type=float, help="The simulated device response delay in seconds.")
+
+
+class PollingCdcIo(cdc.BufferedCdcIo):
+    """Replicates the former polling read path for comparison."""
+
+    def read(self, size, timeout=None):
+        _, available = wait(self.remaining, lambda x: x > 0, timeout=timeout)
+        return self._serial.read(min(size, available))
+
+
+def run(iterations=200, delay=0.001):
+    results = {}
+    with SimulatedCdcDevice(LinkProfile(processing=delay)) as device:
+        for name, factory in (("polling", PollingCdcIo), ("selector", cdc.BufferedCdcIo)):
+            with factory(device.port) as io:
+                request = cdc.TestRequest()
+                io.send(request, timeout=5)
+                results[name] = summarize(measure(lambda: io.send(request, timeout=5), iterations))
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, summary in run(args.iterations, args.delay).items():
+        print_summary("TestRequest round-trip ({})".format(name), summary)
+
+if __name__ == "__main__":
+    main()
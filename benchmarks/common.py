@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark Utilities
+===================
+
+Helpers shared by the benchmark scripts in this directory.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import time
+
+
+def percentile(samples, fraction):
+    """Returns the given percentile of already sorted samples using the
+    nearest-rank method."""
+
+    if not samples:
+        return float("nan")
+
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+def summarize(samples):
+    """Summarizes a list of durations in seconds as a dictionary of
+    microsecond statistics."""
+
+    samples = sorted(samples)
+
+    return {
+        "count": len(samples),
+        "min_us": samples[0] * 1e6 if samples else float("nan"),
+        "mean_us": sum(samples) / len(samples) * 1e6 if samples else float("nan"),
+        "p50_us": percentile(samples, 0.50) * 1e6,
+        "p90_us": percentile(samples, 0.90) * 1e6,
+        "p99_us": percentile(samples, 0.99) * 1e6,
+        "max_us": samples[-1] * 1e6 if samples else float("nan")
+    }
+
+
+def measure(function, iterations):
+    """Calls the function repeatedly and returns the individual durations."""
+
+    samples = []
+    clock = time.perf_counter
+
+    for _ in range(iterations):
+        start = clock()
+        function()
+        samples.append(clock() - start)
+
+    return samples
+
+
+def throughput(function, iterations):
+    """Calls the function repeatedly and returns the number of calls per
+    second."""
+
+    clock = time.perf_counter
+
+    start = clock()
+    for _ in range(iterations):
+        function()
+    elapsed = clock() - start
+
+    return iterations / elapsed if elapsed > 0 else float("inf")
+
+
+def print_summary(name, summary):
+    print("{:<32} n={:<6} p50={:>10.1f}us p90={:>10.1f}us p99={:>10.1f}us max={:>10.1f}us".format(
+        name, summary["count"], summary["p50_us"], summary["p90_us"], summary["p99_us"], summary["max_us"]))
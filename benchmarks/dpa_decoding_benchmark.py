@@ -0,0 +1,58 @@
+import argparse
+import random
+import struct
+import unittest.mock
+
+from iqrf.dpa import decoding
+
+from common import throughput
+
+ARGS = argparse.ArgumentParser(description="DPA result decoding benchmark comparing the NumPy and the array/struct paths.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=200, type=int, help="The number of decoded batches per case.")
+ARGS.add_argument("-p", "--payloads", action="store", dest="payloads", default=1000, type=int, help="The number of sensor payloads per batch.")
+
+
+def cases(payloads):
+    rng = random.Random(0)
+    bitmap = bytes(rng.getrandbits(8) for _ in range(30))
+    block = bytes(rng.getrandbits(8) for _ in range(64))
+    # Sensor payloads of a temperature, a humidity and a 32 bit counter.
+    sensors = [struct.pack("<hBI", rng.randint(-640, 1600), rng.randint(0, 200), rng.getrandbits(32)) for _ in range(payloads)]
+
+    return [
+        ("bitmap", lambda: decoding.bitmap_indices(bitmap)),
+        ("frc_words", lambda: decoding.decode_array(block, "H", count=32)),
+        ("column_int32", lambda: decoding.decode_column(sensors, "i", 3)),
+        ("temperature", lambda: decoding.decode_quantity(sensors, 0x01)),
+        ("humidity", lambda: decoding.decode_quantity(sensors, 0x80, 2))
+    ]
+
+
+def run_path(iterations, payloads):
+    return {name: {"batches_per_s": throughput(function, iterations)} for name, function in cases(payloads)}
+
+
+def run(iterations=200, payloads=1000):
+    results = {}
+
+    if decoding.numpy is not None:
+        results["numpy"] = run_path(iterations, payloads)
+
+    with unittest.mock.patch.object(decoding, "numpy", None):
+        results["fallback"] = run_path(iterations, payloads)
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+    results = run(args.iterations, args.payloads)
+
+    if "numpy" not in results:
+        print("NumPy is not installed, only the fallback path was measured.")
+
+    for name, _ in cases(0):
+        print("{:<14} {}".format(name, " ".join("{}={:>12.0f}/s".format(path, result[name]["batches_per_s"]) for path, result in sorted(results.items()))))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ARGS = argparse.ArgumentParser(description="Import time benchmark of the transport modules measured with python -X importtime (Python 3.7+).")
+ARGS.add_argument("-n", "--repeat", action="store", dest="repeat", default=10, type=int, help="The number of fresh interpreters per module.")
+
+MODULES = [
+    "iqrf.transport",
+    "iqrf.transport.udp_io",
+    "iqrf.transport.cdc_io",
+    "iqrf.transport.spi_io",
+    "iqrf.transport.udp",
+    "iqrf.transport.cdc"
+]
+
+
+def measure_import(module):
+    """Imports the module in a fresh interpreter and returns its cumulative
+    import time in microseconds and the number of modules it loaded."""
+
+    output = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                            stderr=subprocess.PIPE, env=os.environ, check=True).stderr.decode()
+    lines = [line for line in output.splitlines() if line.startswith("import time:") and "|" in line]
+    # Everything after the site module was loaded by the import itself.
+    start = max(i for i, line in enumerate(lines) if line.split("|")[2] == " site")
+
+    cumulative = int(lines[-1].split("|")[1])
+    modules = len(lines) - start - 1
+
+    return cumulative, modules
+
+
+def run(repeat=10):
+    results = {}
+
+    # python -X importtime was added in Python 3.7, older interpreters
+    # measure nothing.
+    if sys.version_info < (3, 7):
+        return results
+
+    for module in MODULES:
+        samples = [measure_import(module) for _ in range(repeat)]
+
+        results[module] = {
+            "cumulative_us": min(cumulative for cumulative, _ in samples),
+            "modules": samples[0][1]
+        }
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    if sys.version_info < (3, 7):
+        print("Skipped, python -X importtime requires Python 3.7 or newer.")
+
+    for module, result in run(args.repeat).items():
+        print("{:<28} {:>10.0f} us {:>6} modules".format(module, result["cumulative_us"], result["modules"]))
+
+if __name__ == "__main__":
+    main()
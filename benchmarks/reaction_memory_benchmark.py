@@ -0,0 +1,70 @@
+import argparse
+import gc
+import time
+import tracemalloc
+
+from iqrf.transport import cdc, spi
+from iqrf.util.queue import ReactionQueue
+
+ARGS = argparse.ArgumentParser(description="Memory benchmark of reactions held in a reaction queue.")
+ARGS.add_argument("-n", "--reactions", action="store", dest="reactions", default=1000000, type=int, help="The number of queued reactions.")
+ARGS.add_argument("-s", "--size", action="store", dest="size", default=8, type=int, help="The payload length of the reactions.")
+
+
+class DictReaction:
+    """A reaction keeping its payload in an instance dictionary, as the
+    messages did before they were slotted."""
+
+    def __init__(self, data):
+        self.data = data
+
+
+def fill(factory, count, size):
+    """Queues the reactions made by the factory and returns the traced bytes
+    per reaction and the time per reaction in microseconds, which includes
+    the overhead of tracemalloc."""
+
+    queue = ReactionQueue(maxsize=count)
+    payloads = [i.to_bytes(size, "little") for i in range(count)]
+
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+
+    for payload in payloads:
+        queue.put(factory(payload))
+
+    elapsed = time.perf_counter() - start
+    used = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    # The payloads were allocated before tracing, so the reactions and the
+    # queue slots are all that is measured.
+    assert len(queue) == count
+
+    return {
+        "bytes_per_reaction": used / count,
+        "total_mb": used / 1e6,
+        "put_us": elapsed / count * 1e6
+    }
+
+
+def run(reactions=1000000, size=8):
+    return {
+        "dict": fill(DictReaction, reactions, size),
+        "cdc": fill(cdc.DataReceivedReaction, reactions, size),
+        "spi": fill(spi.DataReceivedReaction, reactions, size),
+        "flyweight": fill(lambda payload: cdc.TestResponse(), reactions, size)
+    }
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, result in run(args.reactions, args.size).items():
+        print("{:<10} {:>8.1f} B/reaction {:>8.1f} MB {:>8.3f} us/put".format(
+            name, result["bytes_per_reaction"], result["total_mb"], result["put_us"]))
+
+if __name__ == "__main__":
+    main()
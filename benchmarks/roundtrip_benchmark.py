@@ -0,0 +1,72 @@
+import argparse
+import socket
+
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.common import LinkProfile
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.simulator.udp import SimulatedUdpGateway
+from iqrf.transport import cdc, spi, udp
+
+from common import measure, print_summary, summarize
+
+ARGS = argparse.ArgumentParser(description="Data send round-trip latency benchmark against simulated CDC, SPI and UDP devices.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=500, type=int, help="The number of round-trips per transport.")
+ARGS.add_argument("-d", "--delay", action="store", dest="delay", default=0.0, type=float, help="The simulated CDC and UDP device processing delay in seconds.")
+
+PAYLOAD = bytes([0x00, 0x00, 0x06, 0x01, 0xff, 0xff])
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def run_cdc(iterations, delay):
+    with SimulatedCdcDevice(LinkProfile(processing=delay)) as device, cdc.open(device.port) as io:
+        request = cdc.DataSendRequest(PAYLOAD)
+        io.send(request, timeout=5)
+
+        return summarize(measure(lambda: io.send(request, timeout=5), iterations))
+
+
+def run_spi(iterations):
+    module = SimulatedTrModule()
+
+    with module.open() as io:
+        request = spi.DataSendRequest(PAYLOAD)
+        io.send(request, timeout=5)
+
+        return summarize(measure(lambda: io.send(request, timeout=5), iterations))
+
+
+def run_udp(iterations, delay, reliable=False):
+    with SimulatedUdpGateway(LinkProfile(processing=delay)) as gateway:
+        with udp.open("127.0.0.1", free_port(), buffered=True, reliable=reliable) as io:
+            io.remote_address = gateway.address
+
+            def send():
+                io.send(udp.DataSendRequest(PAYLOAD), timeout=5)
+
+            send()
+
+            return summarize(measure(send, iterations))
+
+
+def run(iterations=500, delay=0.0):
+    return {
+        "cdc": run_cdc(iterations, delay),
+        "spi": run_spi(iterations),
+        "udp": run_udp(iterations, delay),
+        "udp_reliable": run_udp(iterations, delay, reliable=True)
+    }
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, summary in run(args.iterations, args.delay).items():
+        print_summary("DataSend round-trip ({})".format(name), summary)
+
+if __name__ == "__main__":
+    main()
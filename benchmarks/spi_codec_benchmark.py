@@ -0,0 +1,55 @@
+import argparse
+
+from iqrf.transport import spi
+from iqrf.transport.spi_codec import _DataReceiveRequest, _DataReceiveResponse, calculate_crc, encode_command_type
+
+from common import throughput
+
+ARGS = argparse.ArgumentParser(description="SPI codec encode and decode throughput benchmark.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=20000, type=int, help="The number of operations per message type.")
+ARGS.add_argument("-l", "--lengths", action="store", dest="lengths", default="1,16,64", type=str, help="Comma separated payload lengths.")
+
+
+def response_frame(direction, data):
+    crc = calculate_crc(data, 0, len(data)) ^ encode_command_type(direction, len(data))
+    return bytes([0x00, 0x00]) + bytes(data) + bytes([crc, 0x3f])
+
+
+def run(iterations=20000, lengths=(1, 16, 64)):
+    results = {}
+
+    tr_info = spi.TrInfoRequest()
+    tr_info_frame = response_frame(0, bytes(16))
+    results["TrInfo"] = {
+        "encode_per_s": throughput(tr_info.encode, iterations),
+        "decode_per_s": throughput(lambda: spi.TrInfoResponse.decode(tr_info_frame), iterations)
+    }
+
+    for length in lengths:
+        data = bytes(range(length))
+        send = spi.DataSendRequest(data)
+        send_frame = response_frame(1, data)
+        receive = _DataReceiveRequest(length)
+        receive_frame = response_frame(0, data)
+
+        results["DataSend[{}]".format(length)] = {
+            "encode_per_s": throughput(send.encode, iterations),
+            "decode_per_s": throughput(lambda: spi.DataSendResponse.decode(send_frame), iterations)
+        }
+        results["DataReceive[{}]".format(length)] = {
+            "encode_per_s": throughput(receive.encode, iterations),
+            "decode_per_s": throughput(lambda: _DataReceiveResponse.decode(receive_frame), iterations)
+        }
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+    lengths = [int(length) for length in args.lengths.split(",")]
+
+    for name, result in run(args.iterations, lengths).items():
+        print("{:<20} encode={:>12.0f}/s decode={:>12.0f}/s".format(name, result["encode_per_s"], result["decode_per_s"]))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import argparse
+import random
+import time
+
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.util.io import PollingScheduler
+
+from common import print_summary, summarize
+
+ARGS = argparse.ArgumentParser(description="SPI reaction pickup latency benchmark against a simulated TR module.")
+ARGS.add_argument("-n", "--iterations", action="store", dest="iterations", default=50, type=int, help="The number of reactions per mode.")
+ARGS.add_argument("-d", "--max-delay", action="store", dest="max_delay", default=0.02, type=float, help="The maximal random delay before a reaction becomes ready.")
+
+MODES = [
+    ("fixed_50ms", lambda: PollingScheduler(spin=0, initial_interval=0.05, maximum_interval=0.05, factor=1), False),
+    ("adaptive_backoff", lambda: PollingScheduler(), False),
+    ("gpio_interrupt", lambda: PollingScheduler(), True)
+]
+
+
+def run(iterations=50, max_delay=0.02):
+    results = {}
+    generator = random.Random(0)
+
+    for name, scheduler, interrupt in MODES:
+        module = SimulatedTrModule()
+        io = module.open(scheduler=scheduler(), interrupt=interrupt)
+        samples = []
+
+        for _ in range(iterations):
+            delay = generator.uniform(0, max_delay)
+            ready = time.monotonic() + delay
+            module.push_reaction(b"\x01\x00\x06\x80\x00\x00\x00\x00", delay=delay)
+            io.receive(timeout=1)
+            samples.append(max(time.monotonic() - ready, 0))
+
+        results[name] = summarize(samples)
+        results[name]["status_polls"] = io._scheduler.iterations
+        io.close()
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, summary in run(args.iterations, args.max_delay).items():
+        print_summary("Reaction pickup ({})".format(name), summary)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+import argparse
+import datetime
+import importlib
+import json
+import math
+import platform
+import sys
+
+ARGS = argparse.ArgumentParser(description="Runs the benchmark suite and optionally compares it with a baseline.")
+ARGS.add_argument("-o", "--only", action="store", dest="only", default=None, type=str, help="Comma separated names of the benchmarks to run.")
+ARGS.add_argument("-q", "--quick", action="store_true", dest="quick", help="Run fewer iterations, e.g. as a smoke test.")
+ARGS.add_argument("-j", "--json", action="store", dest="json", default=None, type=str, help="The file to write the results to as JSON.")
+ARGS.add_argument("-b", "--baseline", action="store", dest="baseline", default=None, type=str, help="A JSON result file to compare the results with.")
+ARGS.add_argument("-t", "--threshold", action="store", dest="threshold", default=0.25, type=float, help="The relative change reported as a regression.")
+
+# The benchmark module name, the keyword arguments of its run function for a
+# full and a quick run.
+BENCHMARKS = [
+    ("cdc_codec", "cdc_codec_benchmark", {"iterations": 20000}, {"iterations": 500}),
+    ("spi_codec", "spi_codec_benchmark", {"iterations": 20000, "lengths": range(1, 65)}, {"iterations": 200, "lengths": range(1, 65)}),
+    ("cdc_framing", "cdc_framing_benchmark", {"frames": 10000}, {"frames": 500}),
+    ("udp_receive", "udp_receive_benchmark", {"datagrams": 20000}, {"datagrams": 500}),
+    ("roundtrip", "roundtrip_benchmark", {"iterations": 500}, {"iterations": 20}),
+    ("cdc_latency", "cdc_latency_benchmark", {"iterations": 200}, {"iterations": 10}),
+    ("spi_polling", "spi_polling_benchmark", {"iterations": 50}, {"iterations": 5}),
+    ("imports", "import_benchmark", {"repeat": 10}, {"repeat": 2}),
+    ("reaction_memory", "reaction_memory_benchmark", {"reactions": 1000000}, {"reactions": 20000}),
+    ("dpa_decoding", "dpa_decoding_benchmark", {"iterations": 200, "payloads": 1000}, {"iterations": 10, "payloads": 100})
+]
+
+# Metric suffixes where higher values are better; any other numeric metric
+# ending with "_us" is a duration where lower values are better.
+HIGHER_IS_BETTER = ("_per_s", "mb_per_s")
+
+
+def flatten(results, prefix=""):
+    """Flattens nested result dictionaries to "a/b/metric" keys, keeping the
+    numeric values only."""
+
+    flat = {}
+
+    for key, value in results.items():
+        name = prefix + str(key)
+
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "/"))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+            flat[name] = value
+
+    return flat
+
+
+def compare(results, baseline, threshold):
+    """Returns (metric, baseline, current, change) tuples of the metrics that
+    got worse by more than the threshold."""
+
+    current = flatten(results)
+    previous = flatten(baseline)
+    regressions = []
+
+    for name in sorted(current.keys() & previous.keys()):
+        old, new = previous[name], current[name]
+
+        if old <= 0:
+            continue
+
+        change = (new - old) / old
+
+        if name.endswith(HIGHER_IS_BETTER):
+            worse = change < -threshold
+        elif name.endswith("_us"):
+            worse = change > threshold
+        else:
+            continue
+
+        if worse:
+            regressions.append((name, old, new, change))
+
+    return regressions
+
+
+def run(only=None, quick=False):
+    results = {}
+
+    for name, module, full, short in BENCHMARKS:
+        if only is not None and name not in only:
+            continue
+
+        print("Running {}...".format(name), file=sys.stderr)
+        results[name] = importlib.import_module(module).run(**(short if quick else full))
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+    only = None if args.only is None else set(args.only.split(","))
+    results = run(only, args.quick)
+
+    for name, value in sorted(flatten(results).items()):
+        print("{:<64} {:>16.1f}".format(name, value))
+
+    if args.json is not None:
+        document = {
+            "meta": {
+                "time": datetime.datetime.utcnow().isoformat() + "Z",
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "quick": args.quick
+            },
+            "results": results
+        }
+
+        with open(args.json, "w") as output:
+            json.dump(document, output, indent=2, sort_keys=True)
+
+    if args.baseline is not None:
+        with open(args.baseline) as input:
+            baseline = json.load(input)["results"]
+
+        regressions = compare(results, baseline, args.threshold)
+
+        for name, old, new, change in regressions:
+            print("REGRESSION {:<53} {:>12.1f} -> {:>12.1f} ({:+.0%})".format(name, old, new, change))
+
+        if regressions:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import socket
+import threading
+import time
+import tracemalloc
+
+from iqrf.transport import udp
+
+ARGS = argparse.ArgumentParser(description="UDP receive path benchmark against a local loopback sender.")
+ARGS.add_argument("-n", "--datagrams", action="store", dest="datagrams", default=20000, type=int, help="The number of datagrams to receive per mode.")
+
+DATAGRAM = bytes([0x22, 0x03, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x06, 0x01, 0x00, 0x07, 0x01, 0xff, 0xff, 0xc2, 0xf9])
+
+
+class RecvfromUdpIo(udp.RawUdpIo):
+    """Replicates the former receive path for comparison."""
+
+    def receive(self, timeout=None):
+        self.socket.settimeout(timeout)
+        data, _ = self.socket.recvfrom(1024 * 1024)
+        return data
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def send_continuously(port, stop):
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sender:
+        while not stop.is_set():
+            for _ in range(64):
+                sender.sendto(DATAGRAM, ("127.0.0.1", port))
+            time.sleep(0)
+
+
+def receive_one(io):
+    return [io.receive(timeout=1)]
+
+
+def receive_many(io):
+    return io.receive_many(timeout=1)
+
+
+def measure(io, datagrams, receive):
+    received = 0
+    start = time.perf_counter()
+
+    while received < datagrams:
+        received += len(receive(io))
+
+    return received / (time.perf_counter() - start)
+
+
+def measure_allocations(io, receive, samples=200):
+    """Returns the peak of memory traced while receiving and the number of
+    memory blocks allocated per datagram, counted while the received
+    datagrams are kept alive."""
+
+    kept = []
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+
+    while len(kept) < samples:
+        kept.extend(receive(io))
+
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+    return peak, blocks / len(kept)
+
+
+def run(datagrams=20000):
+    modes = [
+        ("recvfrom_1mib", RecvfromUdpIo, receive_one),
+        ("pooled_receive", udp.RawUdpIo, receive_one),
+        ("pooled_receive_many", udp.RawUdpIo, receive_many)
+    ]
+    results = {}
+
+    for name, factory, receive in modes:
+        port = free_port()
+        stop = threading.Event()
+        io = factory("127.0.0.1", port)
+        sender = threading.Thread(target=send_continuously, args=(port, stop), daemon=True)
+        sender.start()
+
+        try:
+            peak, blocks = measure_allocations(io, receive)
+            results[name] = {
+                "datagrams_per_s": measure(io, datagrams, receive),
+                "peak_traced_bytes": peak,
+                "blocks_per_datagram": blocks
+            }
+        finally:
+            stop.set()
+            sender.join()
+            io.close()
+
+    return results
+
+
+def main():
+    args = ARGS.parse_args()
+
+    for name, result in run(args.datagrams).items():
+        print("{:<22} {:>10.0f} datagrams/s peak={:>9} B blocks/datagram={:.2f}".format(
+            name, result["datagrams_per_s"], result["peak_traced_bytes"], result["blocks_per_datagram"]))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import argparse
 import time
 
+from iqrf import dpa
 from iqrf.transport import cdc
 
 ARGS = argparse.ArgumentParser(description="Raw IQRF DPA CDC communication example.")
@@ -12,8 +13,8 @@ def main():
     port = args.port
     device = None
 
-    first_node_ledg_on = bytes([0x01, 0x00, 0x07, 0x01, 0xFF, 0xFF])
-    first_node_ledg_off = bytes([0x01, 0x00, 0x07, 0x00, 0xFF, 0xFF])
+    first_node_ledg_on = dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x01).encode()
+    first_node_ledg_off = dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x00).encode()
 
     try:
         device = cdc.open(port)
@@ -24,10 +25,10 @@ def main():
             send = device.send(cdc.DataSendRequest(first_node_ledg_on))
 
             confirmation = device.receive(timeout=5)
-            print("Confirmation:", confirmation.data)
+            print("Confirmation:", dpa.decode_dpa_message(confirmation.data))
 
             response = device.receive(timeout=5)
-            print("Response:", response.data)
+            print("Response:", dpa.decode_dpa_message(response.data))
 
             print("The first bonded node's green LED was turned on.")
 
@@ -37,10 +38,10 @@ def main():
             send = device.send(cdc.DataSendRequest(first_node_ledg_off))
 
             confirmation = device.receive(timeout=5)
-            print("Confirmation:", confirmation.data)
+            print("Confirmation:", dpa.decode_dpa_message(confirmation.data))
 
             response = device.receive(timeout=5)
-            print("Response:", response.data)
+            print("Response:", dpa.decode_dpa_message(response.data))
 
             print("The first bonded node's green LED was turned off.")
         else:
@@ -1,6 +1,7 @@
 import argparse
 import time
 
+from iqrf import dpa
 from iqrf.transport import udp
 
 ARGS = argparse.ArgumentParser(description="Raw IQRF DPA UDP communication example.")
@@ -15,8 +16,8 @@ def main():
 
     device = None
 
-    first_node_ledg_on = bytes([0x22, 0x3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x6, 0x1, 0x0, 0x7, 0x1, 0xff, 0xff, 0xc2, 0xf9])
-    first_node_ledg_off = bytes([0x22, 0x3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x6, 0x1, 0x0, 0x7, 0x0, 0xff, 0xff, 0xf5, 0xc9])
+    first_node_ledg_on = udp.DataSendRequest(dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x01).encode(), pacid=0).encode()
+    first_node_ledg_off = udp.DataSendRequest(dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x00).encode(), pacid=0).encode()
 
     try:
         device = udp.open(host, port)
@@ -24,10 +25,10 @@ def main():
         send = device.send(first_node_ledg_on)
 
         confirmation = device.receive(timeout=5)
-        print("Confirmation:", confirmation)
+        print("Confirmation:", bytes(confirmation))
 
         response = device.receive(timeout=5)
-        print("Response:", response)
+        print("Response:", bytes(response))
 
         print("The first bonded node's green LED was turned on.")
 
@@ -37,10 +38,10 @@ def main():
         send = device.send(first_node_ledg_off)
 
         confirmation = device.receive(timeout=5)
-        print("Confirmation:", confirmation)
+        print("Confirmation:", bytes(confirmation))
 
         response = device.receive(timeout=5)
-        print("Response:", response)
+        print("Response:", bytes(response))
 
         print("The first bonded node's green LED was turned off.")
 
@@ -14,7 +14,9 @@ setup(
     packages=[
         "iqrf",
         "iqrf.util",
-        "iqrf.transport"
+        "iqrf.transport",
+        "iqrf.dpa",
+        "iqrf.simulator"
     ],
     license="Apache 2",
     long_description=long_description,
@@ -34,5 +36,8 @@ setup(
     install_requires=[
         "pyserial >= 3.1.1",
         "python-periphery >= 1.0.0"
-    ]
+    ],
+    extras_require={
+        "numpy": ["numpy >= 1.11"]
+    }
 )
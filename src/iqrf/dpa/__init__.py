@@ -0,0 +1,16 @@
+from . import codec
+from . import correlator
+from . import decoding
+from . import frc
+
+from .codec import *
+from .correlator import *
+from .decoding import *
+from .frc import *
+
+__all__ = (
+    codec.__all__ +
+    correlator.__all__ +
+    decoding.__all__ +
+    frc.__all__
+)
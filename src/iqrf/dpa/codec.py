@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF DPA Codec
+==============
+
+This is a concrete implementation of IQRF DPA frame serialization. DPA frames
+are carried as opaque data by all transports, e.g. inside
+:class:`iqrf.transport.cdc_codec.DataSendRequest` and
+:class:`iqrf.transport.cdc_codec.DataReceivedReaction`.
+
+Inbound frames are classified by :func:`decode_dpa_message` using
+precompiled :mod:`struct` layouts. Decoded messages keep a
+:class:`memoryview` of the original buffer as their ``pdata``, so no bytes are
+copied. Convert ``pdata`` to :class:`bytes` when the message outlives the
+buffer it was decoded from.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import struct
+
+from ..util.codec import CodecError, Request, Reaction, Response
+from ..util.common import ValueMixin
+
+__all__ = [
+    "DpaCodecError", "DpaEncodeError", "DpaDecodeError",
+
+    "DpaToken",
+
+    "DpaMessage",
+    "DpaRequest", "DpaConfirmation", "DpaResponse", "DpaReaction",
+
+    "decode_dpa_message"
+]
+
+
+class DpaCodecError(CodecError):
+    """An error indicating general DPA codec exception."""
+
+    pass
+
+
+class DpaEncodeError(DpaCodecError):
+    """An error thrown when exception raises during DPA message encoding."""
+
+    pass
+
+
+class DpaDecodeError(DpaCodecError):
+    """An error thrown when exception raises during DPA message decoding."""
+
+    pass
+
+
+class DpaToken:
+
+    COORDINATOR_ADDRESS = 0x00
+    LOCAL_ADDRESS = 0xfc
+    BROADCAST_ADDRESS = 0xff
+
+    PNUM_COORDINATOR = 0x00
+    PNUM_NODE = 0x01
+    PNUM_OS = 0x02
+    PNUM_EEPROM = 0x03
+    PNUM_EEEPROM = 0x04
+    PNUM_RAM = 0x05
+    PNUM_LEDR = 0x06
+    PNUM_LEDG = 0x07
+    PNUM_IO = 0x09
+    PNUM_THERMOMETER = 0x0a
+    PNUM_UART = 0x0c
+    PNUM_FRC = 0x0d
+
+    HWPID_ANY = 0xffff
+
+    RESPONSE_FLAG = 0x80
+    ASYNC_RESPONSE_FLAG = 0x80
+
+    STATUS_NO_ERROR = 0x00
+    STATUS_CONFIRMATION = 0xff
+
+    MAX_PDATA_LENGTH = 56
+
+
+_HEADER = struct.Struct("<HBBH")
+_RESPONSE_HEADER = struct.Struct("<HBBHBB")
+_CONFIRMATION = struct.Struct("<HBBHBBBBB")
+
+
+def _as_view(data):
+    return data if isinstance(data, memoryview) else memoryview(data)
+
+
+class DpaMessage(ValueMixin):
+    """Common base of all DPA messages. Messages are slotted immutable values,
+    like the messages of the transports."""
+
+    __slots__ = ()
+
+    def _values(self):
+        # A decoded pdata views the frame, which may be a mutable buffer and
+        # thus neither hashable nor picklable.
+        return tuple(bytes(value) if isinstance(value, memoryview) else value for value in super()._values())
+
+
+class DpaRequest(DpaMessage, Request):
+    """A DPA request addressed to a peripheral of a network device."""
+
+    __slots__ = ("nadr", "pnum", "pcmd", "hwpid", "pdata")
+    _fields = __slots__
+
+    def __init__(self, nadr, pnum, pcmd, hwpid=DpaToken.HWPID_ANY, pdata=b""):
+        object.__setattr__(self, "nadr", nadr)
+        object.__setattr__(self, "pnum", pnum)
+        object.__setattr__(self, "pcmd", pcmd)
+        object.__setattr__(self, "hwpid", hwpid)
+        object.__setattr__(self, "pdata", pdata)
+
+    def encode(self):
+        if len(self.pdata) > DpaToken.MAX_PDATA_LENGTH:
+            raise DpaEncodeError("Too much data!")
+
+        try:
+            return _HEADER.pack(self.nadr, self.pnum, self.pcmd, self.hwpid) + bytes(self.pdata)
+        except struct.error as error:
+            raise DpaEncodeError(error)
+
+    @classmethod
+    def decode(cls, data):
+        view = _as_view(data)
+
+        if len(view) < _HEADER.size:
+            raise DpaDecodeError("Frame too short!")
+
+        return cls(*_HEADER.unpack_from(view), pdata=view[_HEADER.size:])
+
+
+class DpaConfirmation(DpaMessage, Response):
+    """A confirmation sent by the coordinator once a request was passed to the
+    network. It carries the routing information needed to estimate when the
+    response should arrive."""
+
+    __slots__ = ("nadr", "pnum", "pcmd", "hwpid", "dpa_value", "hops", "timeslot", "hops_response")
+    _fields = __slots__
+
+    def __init__(self, nadr, pnum, pcmd, hwpid, dpa_value, hops, timeslot, hops_response):
+        object.__setattr__(self, "nadr", nadr)
+        object.__setattr__(self, "pnum", pnum)
+        object.__setattr__(self, "pcmd", pcmd)
+        object.__setattr__(self, "hwpid", hwpid)
+        object.__setattr__(self, "dpa_value", dpa_value)
+        object.__setattr__(self, "hops", hops)
+        object.__setattr__(self, "timeslot", timeslot)
+        object.__setattr__(self, "hops_response", hops_response)
+
+    def encode(self):
+        return _CONFIRMATION.pack(self.nadr, self.pnum, self.pcmd, self.hwpid, DpaToken.STATUS_CONFIRMATION,
+                                  self.dpa_value, self.hops, self.timeslot, self.hops_response)
+
+    @classmethod
+    def decode(cls, data):
+        view = _as_view(data)
+
+        if len(view) != _CONFIRMATION.size:
+            raise DpaDecodeError("Invalid confirmation length!")
+
+        nadr, pnum, pcmd, hwpid, status, dpa_value, hops, timeslot, hops_response = _CONFIRMATION.unpack_from(view)
+
+        if status != DpaToken.STATUS_CONFIRMATION:
+            raise DpaDecodeError("Not a confirmation!")
+
+        return cls(nadr, pnum, pcmd, hwpid, dpa_value, hops, timeslot, hops_response)
+
+    def response_timeout(self, response_length=DpaToken.MAX_PDATA_LENGTH, low_power=False):
+        """Estimates the number of seconds in which the response should arrive
+        after this confirmation.
+
+        :param response_length: The expected length of the response data.
+        :param low_power: Whether the network uses the low power RF mode.
+        """
+
+        if low_power:
+            response_timeslot = 8 if response_length < 11 else 9 if response_length <= 33 else 10
+        else:
+            response_timeslot = 4 if response_length < 16 else 5 if response_length <= 39 else 6
+
+        return ((self.hops + 1) * self.timeslot + (self.hops_response + 1) * response_timeslot) * 0.01
+
+
+class _DpaResponseMessage(DpaMessage):
+
+    __slots__ = ("nadr", "pnum", "pcmd", "hwpid", "error_code", "dpa_value", "pdata")
+    _fields = __slots__
+
+    def __init__(self, nadr, pnum, pcmd, hwpid, error_code=DpaToken.STATUS_NO_ERROR, dpa_value=0, pdata=b""):
+        object.__setattr__(self, "nadr", nadr)
+        object.__setattr__(self, "pnum", pnum)
+        object.__setattr__(self, "pcmd", pcmd)
+        object.__setattr__(self, "hwpid", hwpid)
+        object.__setattr__(self, "error_code", error_code)
+        object.__setattr__(self, "dpa_value", dpa_value)
+        object.__setattr__(self, "pdata", pdata)
+
+    @property
+    def command(self):
+        """Returns the command of the request this message responds to."""
+
+        return self.pcmd & ~DpaToken.RESPONSE_FLAG
+
+    def encode(self):
+        try:
+            return _RESPONSE_HEADER.pack(self.nadr, self.pnum, self.pcmd, self.hwpid, self.error_code, self.dpa_value) + bytes(self.pdata)
+        except struct.error as error:
+            raise DpaEncodeError(error)
+
+    @classmethod
+    def decode(cls, data):
+        view = _as_view(data)
+
+        if len(view) < _RESPONSE_HEADER.size:
+            raise DpaDecodeError("Frame too short!")
+
+        return cls(*_RESPONSE_HEADER.unpack_from(view), pdata=view[_RESPONSE_HEADER.size:])
+
+
+class DpaResponse(_DpaResponseMessage, Response):
+    """A response to a DPA request."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.error_code == DpaToken.STATUS_NO_ERROR
+
+
+class DpaReaction(_DpaResponseMessage, Reaction):
+    """An asynchronous message sent by a node without a foregoing request."""
+
+    __slots__ = ()
+
+    @property
+    def status(self):
+        return self.error_code & ~DpaToken.ASYNC_RESPONSE_FLAG
+
+
+def decode_dpa_message(data):
+    """Classifies and decodes a frame received from the coordinator as either
+    a :class:`DpaConfirmation`, a :class:`DpaResponse` or a
+    :class:`DpaReaction`.
+
+    :param data: A bytes-like object, preferably a :class:`memoryview`.
+    :raises DpaDecodeError: If the frame is not a valid inbound DPA frame.
+    """
+
+    view = _as_view(data)
+
+    if len(view) < _RESPONSE_HEADER.size:
+        raise DpaDecodeError("Frame too short!")
+
+    pcmd = view[3]
+    status = view[6]
+
+    if pcmd & DpaToken.RESPONSE_FLAG:
+        if status != DpaToken.STATUS_CONFIRMATION and status & DpaToken.ASYNC_RESPONSE_FLAG:
+            return DpaReaction.decode(view)
+
+        return DpaResponse.decode(view)
+
+    if status == DpaToken.STATUS_CONFIRMATION:
+        return DpaConfirmation.decode(view)
+
+    raise DpaDecodeError("Not an inbound DPA frame!")
@@ -0,0 +1,291 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF DPA Correlator
+===================
+
+Matches inbound DPA frames to outstanding requests, which allows several
+requests to be in flight over a single coordinator. Each request is tagged by
+its NADR, PNUM, PCMD and HWPID. Once its confirmation arrives, the response
+deadline is derived from the reported hops and timeslot. Asynchronous node
+reactions are routed to a separate queue.
+
+The correlator talks to the coordinator through a link, a small adapter with
+``send(frame, timeout)`` and ``receive(timeout)`` methods exchanging raw DPA
+frames. Links for the CDC, SPI and UDP transports are provided.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import concurrent.futures
+import threading
+import time
+
+from .codec import DpaCodecError, DpaConfirmation, DpaReaction, DpaRequest, DpaToken, decode_dpa_message
+from ..transport import cdc_codec, spi_codec, udp_codec
+from ..util.io import IoError, IoTimeoutError, time_left, to_deadline
+from ..util.log import logger
+from ..util.queue import ReactionQueue
+
+__all__ = [
+    "DpaLinkError",
+    "CdcDpaLink", "SpiDpaLink", "UdpDpaLink",
+    "DpaCorrelator"
+]
+
+
+class DpaLinkError(IoError):
+    """An error thrown when the coordinator refuses a DPA frame."""
+
+    pass
+
+
+class CdcDpaLink:
+    """Exchanges DPA frames over a :class:`iqrf.transport.cdc_io.BufferedCdcIo`."""
+
+    def __init__(self, io):
+        self.io = io
+
+    def send(self, frame, timeout=None):
+        response = self.io.send(cdc_codec.DataSendRequest(frame), timeout=timeout)
+
+        if response.status != cdc_codec.CdcStatus.OK:
+            raise DpaLinkError("The coordinator refused the request: {}.".format(response.status))
+
+    def receive(self, timeout=None):
+        return self.io.receive(timeout=timeout).data
+
+
+class SpiDpaLink:
+    """Exchanges DPA frames over a :class:`iqrf.transport.spi_io.BufferedSpiIo`."""
+
+    def __init__(self, io):
+        self.io = io
+
+    def send(self, frame, timeout=None):
+        self.io.send(spi_codec.DataSendRequest(frame), timeout=timeout)
+
+    def receive(self, timeout=None):
+        return self.io.receive(timeout=timeout).data
+
+
+class UdpDpaLink:
+    """Exchanges DPA frames over a :class:`iqrf.transport.udp_io.BufferedUdpIo`."""
+
+    def __init__(self, io):
+        self.io = io
+
+    def send(self, frame, timeout=None):
+        response = self.io.send(udp_codec.DataSendRequest(frame), timeout=timeout)
+
+        if not response.ok:
+            raise DpaLinkError("The gateway refused the request: {:#04x}.".format(response.subcmd))
+
+    def receive(self, timeout=None):
+        return bytes(self.io.receive(timeout=timeout).data)
+
+
+class _PendingRequest:
+
+    __slots__ = ("request", "future", "deadline", "confirmation")
+
+    def __init__(self, request, future, deadline):
+        self.request = request
+        self.future = future
+        self.deadline = deadline
+        self.confirmation = None
+
+    def matches(self, hwpid):
+        return self.request.hwpid == DpaToken.HWPID_ANY or self.request.hwpid == hwpid
+
+
+class DpaCorrelator:
+    """Correlates DPA requests with their confirmations and responses.
+
+    :param link: The link to the coordinator.
+    :param confirmation_timeout: The number of seconds to wait for the
+        confirmation of a request addressed to a node.
+    :param coordinator_timeout: The number of seconds to wait for the response
+        of a request handled by the coordinator itself.
+    :param response_margin: The number of seconds added to the response
+        deadline estimated from a confirmation.
+    :param reactions: The queue asynchronous reactions are put into.
+    """
+
+    def __init__(self, link, confirmation_timeout=2.0, coordinator_timeout=2.0, response_margin=0.5, reactions=None):
+        self.link = link
+        self.confirmation_timeout = confirmation_timeout
+        self.coordinator_timeout = coordinator_timeout
+        self.response_margin = response_margin
+        self.reactions = reactions if reactions is not None else ReactionQueue()
+
+        self._lock = threading.Lock()
+        self._pending = collections.defaultdict(collections.deque)
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._pending.values())
+
+    def submit(self, request, timeout=None, response_timeout=None):
+        """Sends the request and returns a :class:`concurrent.futures.Future`
+        resolved with its :class:`DpaResponse`. Requests to the broadcast
+        address are resolved with their :class:`DpaConfirmation`, as no
+        response follows.
+
+        :param timeout: The timeout of passing the request to the coordinator.
+        :param response_timeout: The number of seconds to wait for the first
+            answer to the request, the response of a request handled by the
+            coordinator or the confirmation otherwise. Defaults to
+            :attr:`coordinator_timeout` or :attr:`confirmation_timeout`.
+        """
+
+        if not isinstance(request, DpaRequest):
+            raise TypeError("Invalid message type!")
+
+        future = concurrent.futures.Future()
+
+        if response_timeout is None:
+            if request.nadr in (DpaToken.COORDINATOR_ADDRESS, DpaToken.LOCAL_ADDRESS):
+                response_timeout = self.coordinator_timeout
+            else:
+                response_timeout = self.confirmation_timeout
+
+        deadline = time.monotonic() + response_timeout
+
+        pending = _PendingRequest(request, future, deadline)
+        key = (request.nadr, request.pnum, request.pcmd)
+
+        with self._lock:
+            self._pending[key].append(pending)
+
+        try:
+            self.link.send(request.encode(), timeout=timeout)
+        except Exception:
+            with self._lock:
+                self._remove(key, pending)
+            raise
+
+        return future
+
+    def _remove(self, key, pending):
+        queue = self._pending[key]
+        queue.remove(pending)
+
+        if not queue:
+            del self._pending[key]
+
+    def _find(self, key, message):
+        """Returns the oldest request the message belongs to. Identical
+        requests are answered in order, so a confirmation belongs to the
+        first one not confirmed yet and a response to the first confirmed
+        one, or to the first one if none is, as requests handled by the
+        coordinator aren't confirmed."""
+
+        candidates = [pending for pending in self._pending.get(key, ()) if pending.matches(message.hwpid)]
+
+        if isinstance(message, DpaConfirmation):
+            candidates = [pending for pending in candidates if pending.confirmation is None]
+        else:
+            candidates = [pending for pending in candidates if pending.confirmation is not None] or candidates
+
+        return candidates[0] if candidates else None
+
+    def _dispatch(self, message):
+        if isinstance(message, DpaReaction):
+            self.reactions.put(message)
+            return
+
+        if isinstance(message, DpaConfirmation):
+            key = (message.nadr, message.pnum, message.pcmd)
+        else:
+            key = (message.nadr, message.pnum, message.command)
+
+        with self._lock:
+            pending = self._find(key, message)
+
+            if pending is None:
+                logger.warning("Dropping uncorrelated DPA message: %s.", message)
+                return
+
+            if isinstance(message, DpaConfirmation) and message.nadr != DpaToken.BROADCAST_ADDRESS:
+                pending.confirmation = message
+                pending.deadline = time.monotonic() + message.response_timeout() + self.response_margin
+                return
+
+            self._remove(key, pending)
+
+        pending.future.set_result(message)
+
+    def _expire(self):
+        now = time.monotonic()
+        expired = []
+
+        with self._lock:
+            for key, queue in list(self._pending.items()):
+                for pending in list(queue):
+                    if pending.deadline <= now:
+                        self._remove(key, pending)
+                        expired.append(pending)
+
+        for pending in expired:
+            pending.future.set_exception(IoTimeoutError("No response to {}.".format(pending.request)))
+
+    def _next_deadline(self):
+        with self._lock:
+            deadlines = [pending.deadline for queue in self._pending.values() for pending in queue]
+
+        return min(deadlines) if deadlines else None
+
+    def poll(self, timeout=None):
+        """Receives and dispatches at most one inbound frame and expires overdue
+        requests. The wait never extends past the earliest request deadline.
+
+        :return: The dispatched message or None if nothing arrived in time.
+        """
+
+        deadline = to_deadline(timeout)
+        request_deadline = self._next_deadline()
+
+        if request_deadline is not None and (deadline is None or request_deadline < deadline):
+            deadline = request_deadline
+
+        message = None
+
+        try:
+            message = decode_dpa_message(self.link.receive(timeout=time_left(deadline)))
+        except IoTimeoutError:
+            pass
+        except DpaCodecError as error:
+            logger.warning("Dropping undecodable DPA frame: %s.", error)
+
+        if message is not None:
+            self._dispatch(message)
+
+        self._expire()
+
+        return message
+
+    def wait(self, futures, timeout=None):
+        """Polls until all the futures are done.
+
+        :raises IoTimeoutError: If the futures weren't done in time.
+        """
+
+        deadline = to_deadline(timeout)
+
+        while not all(future.done() for future in futures):
+            if deadline is not None and time_left(deadline) == 0:
+                raise IoTimeoutError
+
+            self.poll(timeout=time_left(deadline))
+
+    def request(self, request, timeout=None, response_timeout=None):
+        """Sends the request and waits for its response, see :meth:`submit`."""
+
+        future = self.submit(request, timeout=timeout, response_timeout=response_timeout)
+        self.wait([future], timeout=timeout)
+
+        return future.result()
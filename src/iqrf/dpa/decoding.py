@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF DPA Result Decoding
+========================
+
+Decoding of DPA payloads in batches, e.g. the FRC results of hundreds of
+nodes or the IQRF Standard Sensor values of a burst of
+:class:`iqrf.transport.cdc_codec.DataReceivedReaction` payloads. Values are
+decoded into typed NumPy arrays in one go when NumPy is installed, and into
+:class:`array.array` through :mod:`array` and :mod:`struct` otherwise; both
+hold the same values.
+
+Fields are described by little endian :mod:`struct` format characters:
+``b`` and ``B`` for 8 bit, ``h`` and ``H`` for 16 bit and ``i`` and ``I`` for
+32 bit integers.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import array
+import collections
+import struct
+import sys
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = [
+    "SensorQuantity", "SENSOR_QUANTITIES",
+    "unpack_bitmap", "bitmap_indices",
+    "decode_array", "decode_column",
+    "scale_quantity", "decode_quantity"
+]
+
+SensorQuantity = collections.namedtuple("SensorQuantity", ["id", "name", "unit", "format", "scale", "invalid"])
+SensorQuantity.__doc__ = """An IQRF Standard Sensor quantity: the format of its raw value, the scale
+turning the raw value into the unit, and the raw value reported for an
+invalid reading."""
+
+# The IQRF Standard Sensor quantities by their identifier.
+SENSOR_QUANTITIES = {quantity.id: quantity for quantity in [
+    SensorQuantity(0x01, "temperature", "°C", "h", 1 / 16, -0x8000),
+    SensorQuantity(0x02, "co2", "ppm", "H", 1, 0x8000),
+    SensorQuantity(0x03, "voc", "ppm", "H", 1, 0x8000),
+    SensorQuantity(0x04, "extra_low_voltage", "V", "h", 1 / 1000, -0x8000),
+    SensorQuantity(0x06, "low_voltage", "V", "h", 1 / 1000, -0x8000),
+    SensorQuantity(0x07, "current", "A", "h", 1 / 1000, -0x8000),
+    SensorQuantity(0x08, "power", "W", "H", 1 / 4, 0xffff),
+    SensorQuantity(0x09, "mains_frequency", "Hz", "H", 1 / 1000, 0xffff),
+    SensorQuantity(0x0a, "timespan", "s", "H", 1, 0xffff),
+    SensorQuantity(0x0b, "illuminance", "lx", "H", 1, 0xffff),
+    SensorQuantity(0x80, "relative_humidity", "%", "B", 1 / 2, 0xee),
+    SensorQuantity(0x82, "power_factor", "", "B", 1 / 200, 0xee),
+    SensorQuantity(0x83, "uv_index", "", "B", 1 / 8, 0xff)
+]}
+
+_DTYPES = {"b": "<i1", "B": "<u1", "h": "<i2", "H": "<u2", "i": "<i4", "I": "<u4"}
+
+
+def _typecode(format):
+    """Returns the :mod:`array` type code of the struct format character; 32
+    bit integers are ``l`` on platforms with a 16 bit ``int``."""
+
+    if format in "iI" and array.array(format).itemsize != 4:
+        return "l" if format == "i" else "L"
+
+    return format
+
+
+def _field_size(format):
+    if format not in _DTYPES:
+        raise ValueError("Unsupported field format: {!r}.".format(format))
+
+    return struct.calcsize(format)
+
+
+def _to_array(format, data):
+    values = array.array(_typecode(format), data)
+
+    if sys.byteorder == "big" and values.itemsize > 1:
+        values.byteswap()
+
+    return values
+
+
+def unpack_bitmap(data, count=None):
+    """Unpacks a bitmap into an array of its bits, the least significant bit
+    of the first byte first.
+
+    :param count: The number of bits to return, all by default.
+    """
+
+    data = bytes(data)
+
+    if count is None:
+        count = len(data) * 8
+
+    if numpy is not None:
+        raw = numpy.frombuffer(data, dtype=numpy.uint8)
+        bits = (raw[:, None] >> numpy.arange(8, dtype=numpy.uint8)) & 1
+
+        return bits.reshape(-1)[:count]
+
+    return array.array("B", (byte >> bit & 1 for byte in data for bit in range(8)))[:count]
+
+
+def bitmap_indices(data):
+    """Returns the indices of the set bits of a bitmap in ascending order,
+    e.g. the addresses of the bonded nodes."""
+
+    if numpy is not None:
+        return numpy.flatnonzero(unpack_bitmap(data))
+
+    return array.array("H", (index for index, bit in enumerate(unpack_bitmap(data)) if bit))
+
+
+def decode_array(data, format, offset=0, count=None):
+    """Decodes consecutive little endian integers of one payload.
+
+    :param format: The struct format character of the integers.
+    :param offset: The offset of the first integer.
+    :param count: The number of integers, as many as fit by default.
+    """
+
+    size = _field_size(format)
+    data = bytes(data)
+
+    if count is None:
+        count = (len(data) - offset) // size
+
+    if count < 0 or offset + count * size > len(data):
+        raise ValueError("The payload is too short!")
+
+    if numpy is not None:
+        return numpy.frombuffer(data, dtype=_DTYPES[format], count=count, offset=offset)
+
+    return _to_array(format, data[offset:offset + count * size])
+
+
+def decode_column(payloads, format, offset=0):
+    """Decodes the little endian integer at the same offset of every payload.
+
+    :param payloads: A sequence of bytes-like objects.
+    :param format: The struct format character of the integer.
+    :param offset: The offset of the integer in the payloads.
+    """
+
+    size = _field_size(format)
+    payloads = [bytes(payload) for payload in payloads]
+
+    if any(len(payload) < offset + size for payload in payloads):
+        raise ValueError("A payload is too short!")
+
+    if numpy is None:
+        return _to_array(format, b"".join(payload[offset:offset + size] for payload in payloads))
+
+    if not payloads:
+        return numpy.zeros(0, dtype=_DTYPES[format])
+
+    length = len(payloads[0])
+
+    # Payloads of the same length are sliced as the columns of one matrix.
+    if all(len(payload) == length for payload in payloads):
+        matrix = numpy.frombuffer(b"".join(payloads), dtype=numpy.uint8).reshape(len(payloads), length)
+        field = numpy.ascontiguousarray(matrix[:, offset:offset + size])
+    else:
+        field = numpy.frombuffer(b"".join(payload[offset:offset + size] for payload in payloads), dtype=numpy.uint8)
+
+    return field.view(_DTYPES[format]).reshape(-1)
+
+
+def scale_quantity(values, quantity):
+    """Scales raw values of the quantity into its unit; invalid readings
+    become NaN.
+
+    :param quantity: A :class:`SensorQuantity` or its identifier.
+    :return: An array of floats.
+    """
+
+    if not isinstance(quantity, SensorQuantity):
+        quantity = SENSOR_QUANTITIES[quantity]
+
+    if numpy is not None:
+        values = numpy.asarray(values)
+        scaled = values.astype(numpy.float64) * quantity.scale
+        scaled[values == quantity.invalid] = numpy.nan
+
+        return scaled
+
+    nan = float("nan")
+    scale = quantity.scale
+    invalid = quantity.invalid
+
+    return array.array("d", (nan if value == invalid else value * scale for value in values))
+
+
+def decode_quantity(payloads, quantity, offset=0):
+    """Decodes and scales a quantity at the same offset of every payload.
+
+    :param quantity: A :class:`SensorQuantity` or its identifier.
+    :return: An array of floats.
+    """
+
+    if not isinstance(quantity, SensorQuantity):
+        quantity = SENSOR_QUANTITIES[quantity]
+
+    return scale_quantity(decode_column(payloads, quantity.format, offset), quantity)
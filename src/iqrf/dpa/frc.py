@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF DPA FRC
+============
+
+Bulk collection of node values with the DPA Fast Response Command. A single
+FRC round makes every selected node answer at once, so reading a value from
+hundreds of nodes takes a few rounds instead of a request per node.
+
+The FRC command determines the size of each node's result: commands below
+0x80 collect 2 bits, commands below 0xe0 a byte and the rest 2 bytes. The
+coordinator returns 55 bytes of results with the FRC response and the
+remaining 9 bytes with the extra result request. Bit results are indexed by
+node address, so any set of nodes fits in one round. Byte and 2 byte results
+of selective rounds are stored in the order of the selected nodes after a
+reserved first slot, which limits a round to 63 and 31 nodes respectively;
+:class:`FrcCollector` splits larger sets into as many rounds as needed.
+
+The results are returned as NumPy arrays when NumPy is installed and as
+:class:`array.array` otherwise.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import array
+import struct
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .codec import DpaRequest, DpaToken
+from ..util.io import IoError, time_left, to_deadline
+
+__all__ = [
+    "FrcError",
+    "FrcToken",
+    "FrcResult", "FrcCollector",
+    "frc_result_size", "decode_frc_results"
+]
+
+
+class FrcError(IoError):
+    """An error thrown when the coordinator reports a failed FRC round."""
+
+    pass
+
+
+class FrcToken:
+
+    CMD_SEND = 0x00
+    CMD_EXTRA_RESULT = 0x01
+    CMD_SEND_SELECTIVE = 0x02
+
+    COMMAND_PING = 0x00
+    COMMAND_TEMPERATURE = 0x80
+
+    # The first commands collecting a byte and 2 bytes per node.
+    COMMAND_BYTE = 0x80
+    COMMAND_WORD = 0xe0
+
+    DATA_LENGTH = 55
+    EXTRA_RESULT_LENGTH = 9
+    SELECTION_LENGTH = 30
+
+    MAX_ADDRESS = 0xef
+    MAX_STATUS = 0xef
+
+    # The user data limits of the FRC send and the selective FRC send, which
+    # the coordinator enforces regardless of the DPA data length.
+    MAX_USER_DATA_LENGTH = 30
+    MAX_SELECTIVE_USER_DATA_LENGTH = 25
+
+
+# The offset of the second bit of 2 bit results.
+_BIT1_OFFSET = 32
+_RESULT_LENGTH = FrcToken.DATA_LENGTH + FrcToken.EXTRA_RESULT_LENGTH
+_WORD = struct.Struct("<H")
+
+
+def frc_result_size(command):
+    """Returns the size of a node's result of the FRC command in bits."""
+
+    if command < FrcToken.COMMAND_BYTE:
+        return 2
+
+    if command < FrcToken.COMMAND_WORD:
+        return 8
+
+    return 16
+
+
+def _slot_end(size, index):
+    """Returns the end of the result slot of the given index in the data."""
+
+    if size == 2:
+        return _BIT1_OFFSET + index // 8 + 1
+
+    return (index + 1) * size // 8
+
+
+def decode_frc_results(data, size, indices):
+    """Decodes the results in the given slots of the FRC data.
+
+    :param data: The FRC data, including the extra result if the slots need
+        it.
+    :param size: The size of a result in bits, see :func:`frc_result_size`.
+    :param indices: The slots to decode; node addresses for bit results and
+        non-selective rounds, the positions of the selected nodes starting at 1
+        otherwise.
+    :return: A NumPy array if NumPy is installed, an :class:`array.array`
+        otherwise.
+    """
+
+    data = bytes(data)
+
+    if len(indices) > 0 and _slot_end(size, max(indices)) > len(data):
+        raise ValueError("The FRC data is too short!")
+
+    if numpy is not None:
+        indices = numpy.asarray(indices, dtype=numpy.intp)
+
+        if size == 2:
+            raw = numpy.frombuffer(data, dtype=numpy.uint8)
+            shifts = (indices & 7).astype(numpy.uint8)
+            bit0 = (raw[indices >> 3] >> shifts) & 1
+            bit1 = (raw[_BIT1_OFFSET + (indices >> 3)] >> shifts) & 1
+
+            return bit0 | bit1 << 1
+
+        if size == 8:
+            return numpy.frombuffer(data, dtype=numpy.uint8)[indices]
+
+        return numpy.frombuffer(data[:len(data) & ~1], dtype="<u2")[indices]
+
+    if size == 2:
+        return array.array("B", ((data[index >> 3] >> (index & 7) & 1) | (data[_BIT1_OFFSET + (index >> 3)] >> (index & 7) & 1) << 1
+                                 for index in indices))
+
+    if size == 8:
+        return array.array("B", (data[index] for index in indices))
+
+    return array.array("H", (_WORD.unpack_from(data, index * 2)[0] for index in indices))
+
+
+class FrcResult:
+    """The results of an FRC collection.
+
+    :param command: The FRC command.
+    :param nodes: The addresses of the nodes, in ascending order.
+    :param values: The results of the nodes, in the order of ``nodes``. Nodes
+        that didn't respond typically report 0.
+    :param responded: The number of nodes that responded, summed over all
+        rounds.
+    :param rounds: The number of FRC rounds.
+    """
+
+    __slots__ = ("command", "nodes", "values", "responded", "rounds")
+
+    def __init__(self, command, nodes, values, responded, rounds):
+        self.command = command
+        self.nodes = nodes
+        self.values = values
+        self.responded = responded
+        self.rounds = rounds
+
+    def __len__(self):
+        return len(self.nodes)
+
+    def __repr__(self):
+        return "{}(command={:#04x}, nodes={}, responded={}, rounds={})".format(
+            type(self).__name__, self.command, len(self.nodes), self.responded, self.rounds)
+
+    def as_dict(self):
+        """Returns the results as a dictionary keyed by node address."""
+
+        return {node: int(value) for node, value in zip(self.nodes, self.values)}
+
+
+def _selection(nodes):
+    bitmap = bytearray(FrcToken.SELECTION_LENGTH)
+
+    for node in nodes:
+        bitmap[node >> 3] |= 1 << (node & 7)
+
+    return bytes(bitmap)
+
+
+class FrcCollector:
+    """Collects values of many nodes with FRC rounds sent through a
+    :class:`iqrf.dpa.correlator.DpaCorrelator`.
+
+    :param correlator: The correlator of the coordinator.
+    :param hwpid: The HWPID of the FRC requests.
+    """
+
+    # The number of nodes whose byte and 2 byte results fit in a selective
+    # round, after the reserved first slot.
+    ROUND_NODES = {
+        8: _RESULT_LENGTH - 1,
+        16: _RESULT_LENGTH // 2 - 1
+    }
+
+    # The time an FRC round takes at most, apart from the nodes, and the time
+    # added by every node taking part.
+    ROUND_TIME = 1.0
+    NODE_TIME = 0.06
+
+    def __init__(self, correlator, hwpid=DpaToken.HWPID_ANY):
+        self.correlator = correlator
+        self.hwpid = hwpid
+
+    def round_timeout(self, count):
+        """Returns the number of seconds to wait for an FRC round that the
+        given number of nodes takes part in, used without a caller's timeout."""
+
+        return self.ROUND_TIME + count * self.NODE_TIME
+
+    def _rounds(self, size, nodes):
+        """Returns the rounds needed to collect the nodes as (selective, nodes)
+        pairs."""
+
+        if size == 2 or nodes[-1] <= self.ROUND_NODES[size]:
+            return [(False, nodes)]
+
+        count = self.ROUND_NODES[size]
+
+        return [(True, nodes[start:start + count]) for start in range(0, len(nodes), count)]
+
+    def _request(self, pcmd, pdata, deadline, response_timeout=None):
+        response = self.correlator.request(DpaRequest(DpaToken.COORDINATOR_ADDRESS, DpaToken.PNUM_FRC, pcmd, self.hwpid, pdata),
+                                           timeout=time_left(deadline), response_timeout=response_timeout)
+
+        if not response.ok:
+            raise FrcError("The FRC request failed with error {:#04x}.".format(response.error_code))
+
+        return bytes(response.pdata)
+
+    def send(self, command, nodes=None, user_data=b"", extra_result=False, timeout=None):
+        """Runs a single FRC round, selective if nodes are given.
+
+        :param extra_result: Whether to fetch the extra result as well.
+        :param timeout: The timeout of the round, by default estimated by
+            :meth:`round_timeout`.
+        :return: The number of nodes that responded and the FRC data.
+        :raises FrcError: If the user data is too long or the coordinator
+            reports an error.
+        """
+
+        deadline = to_deadline(timeout)
+
+        # All the nodes answer in turn, which takes far longer than the
+        # coordinator timeout of the correlator.
+        if deadline is not None:
+            round_timeout = time_left(deadline)
+        else:
+            round_timeout = self.round_timeout(FrcToken.MAX_ADDRESS if nodes is None else len(nodes))
+
+        limit = FrcToken.MAX_USER_DATA_LENGTH if nodes is None else FrcToken.MAX_SELECTIVE_USER_DATA_LENGTH
+
+        if len(user_data) > limit:
+            raise FrcError("At most {} bytes of FRC user data are allowed.".format(limit))
+
+        if nodes is None:
+            pdata = self._request(FrcToken.CMD_SEND, bytes([command]) + bytes(user_data), deadline, round_timeout)
+        else:
+            pdata = self._request(FrcToken.CMD_SEND_SELECTIVE, bytes([command]) + _selection(nodes) + bytes(user_data), deadline, round_timeout)
+
+        if len(pdata) < 1 + FrcToken.DATA_LENGTH:
+            raise FrcError("The FRC response is too short.")
+
+        status = pdata[0]
+
+        if status > FrcToken.MAX_STATUS:
+            raise FrcError("The FRC round failed with status {:#04x}.".format(status))
+
+        data = pdata[1:1 + FrcToken.DATA_LENGTH]
+
+        if extra_result:
+            extra = self._request(FrcToken.CMD_EXTRA_RESULT, b"", deadline)
+
+            if len(extra) < FrcToken.EXTRA_RESULT_LENGTH:
+                raise FrcError("The FRC extra result is too short.")
+
+            data += extra[:FrcToken.EXTRA_RESULT_LENGTH]
+
+        return status, data
+
+    def collect(self, command, nodes, user_data=b"", timeout=None):
+        """Collects the results of the FRC command from the nodes, in as many
+        rounds as needed. Results indexed by node address are collected in a
+        single non-selective round, which all bonded nodes take part in;
+        larger addresses of byte and 2 byte results take selective rounds.
+
+        :param command: The FRC command.
+        :param nodes: The addresses of the nodes.
+        :param user_data: The user data of the FRC command.
+        :param timeout: The timeout of the whole collection.
+        :rtype: FrcResult
+        :raises FrcError: If the coordinator reports an error.
+        """
+
+        nodes = sorted(set(nodes))
+
+        if len(nodes) == 0:
+            raise ValueError("No nodes to collect from!")
+
+        if nodes[0] < 1 or nodes[-1] > FrcToken.MAX_ADDRESS:
+            raise ValueError("Invalid node address!")
+
+        deadline = to_deadline(timeout)
+        size = frc_result_size(command)
+        rounds = self._rounds(size, nodes)
+        values = []
+        responded = 0
+
+        for selective, selected in rounds:
+            indices = list(range(1, len(selected) + 1)) if selective else selected
+            extra_result = _slot_end(size, indices[-1]) > FrcToken.DATA_LENGTH
+
+            status, data = self.send(command, selected if selective else None, user_data, extra_result, time_left(deadline))
+            responded += status
+            values.append(decode_frc_results(data, size, indices))
+
+        if numpy is not None:
+            values = numpy.concatenate(values)
+        else:
+            for round_values in values[1:]:
+                values[0].extend(round_values)
+
+            values = values[0]
+
+        return FrcResult(command, nodes, values, responded, len(rounds))
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF CDC Simulator
+==================
+
+A simulated IQRF USB CDC device presented as a pseudo terminal. It speaks
+the :mod:`iqrf.transport.cdc_codec` protocol, so any CDC channel opened on
+:attr:`SimulatedCdcDevice.port` talks to it as to a real dongle. Data sent
+with ``>DS`` is acknowledged, handed to the coordinator and its answers come
+back as ``<DR`` reactions.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import os
+import pty
+import select
+import threading
+import time
+import tty
+
+from ..transport.cdc_codec import (
+    CdcCodecError,
+    CdcStatus,
+    DataReceivedReaction,
+    DataSendRequest, DataSendResponse,
+    ErrorResponse,
+    IndicationRequest, IndicationResponse,
+    InfoRequest, InfoResponse,
+    ResetRequest, ResetResponse,
+    SwitchToCustomClassRequest, SwitchToCustomClassResponse,
+    SwitchToSpiRequest, SwitchToSpiResponse,
+    SwitchToUartRequest, SwitchToUartResponse,
+    TestRequest, TestResponse,
+    TrInfoRequest, TrInfoResponse,
+    TrResetRequest, TrResetResponse,
+    decode_cdc_message,
+    find_cdc_frame
+)
+
+from .common import SimulatedDevice
+
+__all__ = [
+    "SimulatedCdcDevice"
+]
+
+# Marks a frame which isn't a valid request.
+_INVALID = object()
+
+# Requests answered by a plain status response.
+_STATUS_RESPONSES = {
+    ResetRequest: ResetResponse,
+    TrResetRequest: TrResetResponse,
+    IndicationRequest: IndicationResponse,
+    SwitchToCustomClassRequest: SwitchToCustomClassResponse,
+    SwitchToUartRequest: SwitchToUartResponse,
+    SwitchToSpiRequest: SwitchToSpiResponse
+}
+
+
+class SimulatedCdcDevice(SimulatedDevice):
+    """Emulates an IQRF USB CDC device on a pseudo terminal. A busy device
+    answers ``>DS`` with ``BUSY`` and drops the data.
+
+    :param info: The type, firmware version and id reported to ``>I``.
+    :param tr_info: The TR module information reported to ``>IT``.
+    """
+
+    # The server thread checks whether it should stop at this interval.
+    CLOSE_INTERVAL = 0.1
+
+    def __init__(self, profile=None, coordinator=None, info=("GW-USB-06", "2.10", "00000001"), tr_info=bytes(range(0x10, 0x20))):
+        super().__init__(profile=profile, coordinator=coordinator)
+
+        self.info = info
+        self.tr_info = tr_info
+        self.requests = []
+
+        self._master, self._slave = pty.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+
+        self._write_lock = threading.Lock()
+        self._server = threading.Thread(target=self._serve, daemon=True)
+        self._server.start()
+        self._start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def _write(self, data):
+        with self._write_lock:
+            try:
+                os.write(self._master, data)
+            except OSError:
+                pass
+
+    def _emit(self, data):
+        self._write(DataReceivedReaction(data).encode())
+
+    def _respond(self, request):
+        if isinstance(request, TestRequest):
+            return TestResponse()
+        elif isinstance(request, InfoRequest):
+            return InfoResponse(*self.info)
+        elif isinstance(request, TrInfoRequest):
+            return TrInfoResponse(self.tr_info)
+        elif isinstance(request, DataSendRequest):
+            if self.profile.is_busy():
+                return DataSendResponse(CdcStatus.BUSY)
+
+            return DataSendResponse(CdcStatus.OK)
+        elif type(request) in _STATUS_RESPONSES:
+            return _STATUS_RESPONSES[type(request)](CdcStatus.OK)
+        else:
+            return ErrorResponse()
+
+    def _next_request(self, buffer):
+        """Splits the next request off the buffer."""
+
+        end = find_cdc_frame(buffer)
+
+        if end < 0:
+            return None, buffer
+
+        frame, buffer = buffer[:end], buffer[end:]
+
+        try:
+            return decode_cdc_message(bytes(frame)), buffer
+        except CdcCodecError:
+            return _INVALID, buffer
+
+    def _serve(self):
+        buffer = b""
+
+        while not self._closed.is_set():
+            try:
+                if not select.select([self._master], [], [], self.CLOSE_INTERVAL)[0]:
+                    continue
+
+                chunk = os.read(self._master, 1024)
+            except OSError:
+                return
+
+            if not chunk:
+                return
+
+            buffer += chunk
+
+            while True:
+                request, buffer = self._next_request(buffer)
+
+                if request is None:
+                    break
+
+                self._handle(request)
+
+    def _handle(self, request):
+        if request is _INVALID:
+            self._write(ErrorResponse().encode())
+            return
+
+        self.requests.append(request)
+
+        if self.profile.processing > 0:
+            time.sleep(self.profile.processing)
+
+        response = self._respond(request)
+        accepted = isinstance(response, DataSendResponse) and response.status == CdcStatus.OK
+
+        if accepted:
+            self._accept(request.data)
+
+        self._write(response.encode())
+
+        if accepted:
+            self._forward(request.data)
+
+    def close(self):
+        super().close()
+        self._server.join()
+
+        os.close(self._slave)
+        os.close(self._master)
@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF Simulator Common
+=====================
+
+Pieces shared by the simulated devices: the :class:`LinkProfile` describing
+latency, loss, busy states and the rate of unsolicited reactions, the
+:class:`SimulatedCoordinator` answering DPA requests like an IQRF network
+coordinator, and the :class:`SimulatedDevice` base handling the reaction
+timers.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import random
+import threading
+
+from ..dpa.codec import DpaCodecError, DpaConfirmation, DpaReaction, DpaRequest, DpaResponse, DpaToken
+
+__all__ = [
+    "LinkProfile",
+    "SimulatedCoordinator",
+    "SimulatedDevice"
+]
+
+
+class LinkProfile:
+    """Describes the behaviour of a simulated device and its network. All
+    times are in seconds; runs with the same ``seed`` are reproducible.
+
+    :param latency: The RF latency between a request and its response.
+    :param jitter: The maximum of the uniformly distributed extra latency.
+    :param loss: The probability that a frame is lost on its way.
+    :param busy: The probability that the device refuses a request as busy.
+    :param reaction_rate: The mean number of unsolicited reactions per
+        second, spaced exponentially.
+    :param processing: The time the device takes to answer a request itself.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, loss=0.0, busy=0.0, reaction_rate=0.0, processing=0.0, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.loss = loss
+        self.busy = busy
+        self.reaction_rate = reaction_rate
+        self.processing = processing
+
+        self.random = random.Random(seed)
+
+    def delay(self):
+        return self.latency + (self.random.uniform(0, self.jitter) if self.jitter > 0 else 0.0)
+
+    def is_lost(self):
+        return self.loss > 0 and self.random.random() < self.loss
+
+    def is_busy(self):
+        return self.busy > 0 and self.random.random() < self.busy
+
+    def reaction_interval(self):
+        return self.random.expovariate(self.reaction_rate)
+
+
+class SimulatedCoordinator:
+    """Answers DPA requests like a network coordinator. Requests to a node are
+    confirmed at once and answered after the RF latency of the profile unless
+    the response is lost; broadcasts are only confirmed.
+
+    Responses carry empty data unless a handler is registered for the
+    peripheral and command in :attr:`handlers`. A handler is called with the
+    :class:`DpaRequest` and returns the response data, or None to leave the
+    request unanswered.
+
+    :param nodes: The number of bonded nodes, used as the source addresses of
+        generated reactions.
+    """
+
+    HOPS = 1
+    TIMESLOT = 4
+
+    def __init__(self, profile=None, nodes=16, hwpid=0x0000):
+        self.profile = profile if profile is not None else LinkProfile()
+        self.nodes = nodes
+        self.hwpid = hwpid
+        self.handlers = {}
+        self.requests = []
+
+    def handle(self, data, emit):
+        """Processes a DPA frame sent to the coordinator.
+
+        :param emit: A callable invoked as ``emit(frame, delay)`` to send a
+            frame back to the master.
+        """
+
+        try:
+            request = DpaRequest.decode(bytes(data))
+        except DpaCodecError:
+            return
+
+        self.requests.append(request)
+
+        if request.nadr not in (DpaToken.COORDINATOR_ADDRESS, DpaToken.LOCAL_ADDRESS):
+            confirmation = DpaConfirmation(request.nadr, request.pnum, request.pcmd, request.hwpid, 0, self.HOPS, self.TIMESLOT, self.HOPS)
+            emit(confirmation.encode(), 0.0)
+
+            if request.nadr == DpaToken.BROADCAST_ADDRESS or self.profile.is_lost():
+                return
+
+        handler = self.handlers.get((request.pnum, request.pcmd))
+        pdata = handler(request) if handler is not None else b""
+
+        if pdata is None:
+            return
+
+        response = DpaResponse(request.nadr, request.pnum, request.pcmd | DpaToken.RESPONSE_FLAG, self.hwpid, pdata=pdata)
+        emit(response.encode(), self.profile.delay())
+
+    def reaction(self):
+        """Returns an asynchronous DPA reaction of a random node."""
+
+        rng = self.profile.random
+        reaction = DpaReaction(rng.randint(1, self.nodes), DpaToken.PNUM_IO, DpaToken.RESPONSE_FLAG, self.hwpid,
+                               DpaToken.ASYNC_RESPONSE_FLAG, rng.getrandbits(8), bytes(rng.getrandbits(8) for _ in range(3)))
+
+        return reaction.encode()
+
+
+class SimulatedDevice:
+    """Common base of the simulated devices. Data written by the master is
+    recorded in :attr:`sent` and passed to the coordinator, whose frames are
+    sent back as reactions. Unsolicited reactions are generated in a
+    background thread when the profile has a reaction rate.
+    """
+
+    def __init__(self, profile=None, coordinator=None):
+        self.profile = profile if profile is not None else LinkProfile()
+        self.coordinator = coordinator
+        self.sent = []
+
+        self._closed = threading.Event()
+        self._generator = None
+
+    def _start(self):
+        if self.profile.reaction_rate > 0:
+            self._generator = threading.Thread(target=self._generate, daemon=True)
+            self._generator.start()
+
+    def _generate(self):
+        source = self.coordinator if self.coordinator is not None else SimulatedCoordinator(self.profile)
+
+        while not self._closed.wait(self.profile.reaction_interval()):
+            self._deliver(source.reaction())
+
+    def _emit(self, data):
+        """Sends the data to the master as a reaction right away."""
+
+        raise NotImplementedError
+
+    def _deliver(self, data):
+        if not self._closed.is_set():
+            self._emit(data)
+
+    def _accept(self, data):
+        """Records the data written by the master. Devices answering from a
+        thread of their own call this before sending the response, so that
+        :attr:`sent` is complete once the master has the response."""
+
+        self.sent.append(bytes(data))
+
+    def _forward(self, data):
+        """Passes accepted data to the coordinator, whose frames follow the
+        response."""
+
+        if self.coordinator is not None:
+            self.coordinator.handle(data, self.push_reaction)
+
+    def _on_data(self, data):
+        self._accept(data)
+        self._forward(data)
+
+    def push_reaction(self, data, delay=0.0):
+        """Sends the data to the master as a reaction after the delay."""
+
+        if delay > 0:
+            timer = threading.Timer(delay, self._deliver, (bytes(data),))
+            timer.daemon = True
+            timer.start()
+        else:
+            self._deliver(bytes(data))
+
+    def close(self):
+        self._closed.set()
+
+        if self._generator is not None:
+            self._generator.join()
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF SPI Simulator
+==================
+
+Hardware-free stand-ins for an IQRF TR module attached over SPI. The
+simulated module answers the spidev ioctls submitted by
+:class:`iqrf.transport.spi_io.SpiTransferEngine` and drives a simulated
+interrupt pin, so :class:`iqrf.transport.spi_io.BufferedSpiIo` can be
+exercised and measured on any Linux box. Data written by the master can be
+answered by a :class:`iqrf.simulator.common.SimulatedCoordinator`, and the
+:class:`iqrf.simulator.common.LinkProfile` adds busy states and a rate of
+unsolicited reactions.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import ctypes
+import threading
+import time
+
+from periphery import spi
+
+from ..transport.spi_codec import SpiToken, calculate_crc, decode_command_type
+from ..transport.spi_io import BufferedSpiIo, SpiTransferEngine
+
+from .common import SimulatedDevice
+
+__all__ = [
+    "SimulatedGpio",
+    "SimulatedTrModule"
+]
+
+
+class SimulatedGpio:
+    """A GPIO input pin whose edges are triggered programmatically. Like a
+    sysfs GPIO, a triggered edge is reported by :meth:`poll` until the pin is
+    read."""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def trigger(self):
+        self._event.set()
+
+    def poll(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def read(self):
+        self._event.clear()
+
+        return True
+
+    def close(self):
+        pass
+
+
+class SimulatedTrModule(SimulatedDevice):
+    """Emulates the SPI state machine of an IQRF TR module.
+
+    Reactions pushed with :meth:`push_reaction` become readable after their
+    delay, at which point the SPI status reports pending data and the
+    :attr:`interrupt` pin is triggered. Data sent by the master is recorded in
+    :attr:`sent` and handed to the coordinator and the optional ``on_data``
+    callback. A busy module reports itself inactive to status checks.
+    """
+
+    def __init__(self, tr_info=bytes(range(16)), on_data=None, profile=None, coordinator=None):
+        super().__init__(profile=profile, coordinator=coordinator)
+
+        self.tr_info = tr_info
+        self.on_data = on_data
+        self.interrupt = SimulatedGpio()
+        self.transfers = 0
+
+        self._lock = threading.Lock()
+        self._reactions = collections.deque()
+        self._start()
+
+    def push_reaction(self, data, delay=0.0):
+        """Queues data that the module offers to the master after the delay."""
+
+        with self._lock:
+            self._reactions.append((time.monotonic() + delay, bytes(data)))
+
+        if delay > 0:
+            timer = threading.Timer(delay, self.interrupt.trigger)
+            timer.daemon = True
+            timer.start()
+        else:
+            self.interrupt.trigger()
+
+    def _emit(self, data):
+        self.push_reaction(data)
+
+    def _ready_reaction(self):
+        if self._reactions and self._reactions[0][0] <= time.monotonic():
+            return self._reactions[0][1]
+
+        return None
+
+    def _status(self):
+        reaction = self._ready_reaction()
+
+        if reaction is None:
+            return SpiToken.STATUS_COMMUNICATION_MODE
+
+        return SpiToken.DATA_READY_MIN + len(reaction) % 64
+
+    def exchange(self, tx):
+        """Returns the bytes the module clocks out while receiving ``tx``."""
+
+        self.transfers += 1
+
+        with self._lock:
+            status = self._status()
+
+            if len(tx) == 1:
+                return bytes([SpiToken.STATUS_INACTIVE if self.profile.is_busy() else status])
+
+            direction, length = decode_command_type(tx[1])
+
+            if len(tx) != length + 4 or calculate_crc(tx, 0, length + 2) != tx[length + 2]:
+                return bytes([status] * (len(tx) - 1) + [SpiToken.STATUS_CRC_ERROR])
+
+            if tx[0] == SpiToken.COMMAND_TR_INFO:
+                payload = self.tr_info
+            elif direction == 1:
+                payload = bytes(tx[2:length + 2])
+            else:
+                reaction = self._ready_reaction()
+
+                if reaction is None or len(reaction) != length:
+                    return bytes([status] * (len(tx) - 1) + [SpiToken.STATUS_CRC_ERROR])
+
+                payload = self._reactions.popleft()[1]
+
+        if direction == 1 and tx[0] != SpiToken.COMMAND_TR_INFO:
+            self._on_data(payload)
+
+            if self.on_data is not None:
+                self.on_data(payload)
+
+        crc = calculate_crc(payload, 0, length) ^ tx[1]
+        return bytes([status, status]) + payload + bytes([crc, SpiToken.STATUS_CRC_OK])
+
+    def ioctl(self, fd, request, address):
+        """A drop-in replacement of :func:`fcntl.ioctl` for spidev messages."""
+
+        count = (request >> 16 & 0x3fff) // ctypes.sizeof(spi._CSpiIocTransfer)
+        transfers = [t for t in (spi._CSpiIocTransfer * count).from_address(address) if t.len > 0]
+
+        tx = b"".join(ctypes.string_at(t.tx_buf, t.len) for t in transfers)
+        rx = self.exchange(tx)
+
+        offset = 0
+        for transfer in transfers:
+            ctypes.memmove(transfer.rx_buf, rx[offset:offset + transfer.len], transfer.len)
+            offset += transfer.len
+
+        return 0
+
+    def open(self, scheduler=None, interrupt=False):
+        """Opens a :class:`BufferedSpiIo` connected to this module.
+
+        :param scheduler: The polling scheduler to use.
+        :param interrupt: Whether the polling should wake up on the simulated
+            interrupt pin.
+        """
+
+        return BufferedSpiIo(None, engine=SpiTransferEngine(-1, ioctl=self.ioctl), scheduler=scheduler,
+                             interrupt=self.interrupt if interrupt else None)
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF UDP Simulator
+==================
+
+A simulated IQRF UDP gateway listening on a local socket. It speaks the
+:mod:`iqrf.transport.udp_codec` protocol: requests are answered with the
+same PACID, data sent to the gateway is handed to the coordinator and its
+answers are sent back as asynchronous data to the last client.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import socket
+import threading
+import time
+
+from ..transport.udp_codec import (
+    DataReceivedReaction,
+    DataSendRequest, DataSendResponse,
+    IdentificationRequest, IdentificationResponse,
+    StatusRequest, StatusResponse,
+    UdpCodecError,
+    UdpRequest,
+    UdpToken,
+    decode_udp_message
+)
+
+from .common import SimulatedDevice
+
+__all__ = [
+    "SimulatedUdpGateway"
+]
+
+
+class SimulatedUdpGateway(SimulatedDevice):
+    """Emulates an IQRF UDP gateway. Requests and responses are lost with the
+    probability of the profile, and a busy gateway refuses data with
+    :attr:`UdpToken.SUBCMD_ERROR_FULL`. A request repeating the PACID of the
+    previous one from the same client is a retransmission; it is answered
+    with the previous response and not processed again.
+
+    :param host: The local address to listen on.
+    :param port: The local port to listen on, 0 picks a free one.
+    :param identification: The identification reported by the gateway.
+    """
+
+    # The server thread checks whether it should stop at this interval.
+    CLOSE_INTERVAL = 0.1
+
+    def __init__(self, profile=None, coordinator=None, host="127.0.0.1", port=0, identification=b"GW-ETH-02A"):
+        super().__init__(profile=profile, coordinator=coordinator)
+
+        self.identification = identification
+        self.requests = []
+        self.client = None
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+        self.socket.settimeout(self.CLOSE_INTERVAL)
+
+        self._pacid = 0
+        self._last = None
+        self._server = threading.Thread(target=self._serve, daemon=True)
+        self._server.start()
+        self._start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def _emit(self, data):
+        if self.client is None:
+            return
+
+        self._pacid = (self._pacid + 1) & 0xffff
+
+        try:
+            self.socket.sendto(DataReceivedReaction(data, self._pacid).encode(), self.client)
+        except OSError:
+            pass
+
+    def _respond(self, request):
+        if isinstance(request, IdentificationRequest):
+            return IdentificationResponse(UdpToken.SUBCMD_OK, request.pacid, self.identification)
+        elif isinstance(request, StatusRequest):
+            return StatusResponse(UdpToken.SUBCMD_OK, request.pacid, b"\x00")
+        elif isinstance(request, DataSendRequest):
+            if self.profile.is_busy():
+                return DataSendResponse(UdpToken.SUBCMD_ERROR_FULL, request.pacid)
+
+            return DataSendResponse(UdpToken.SUBCMD_OK, request.pacid)
+
+        return None
+
+    def _serve(self):
+        buffer = bytearray(1024)
+
+        while not self._closed.is_set():
+            try:
+                count, address = self.socket.recvfrom_into(buffer)
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+
+            try:
+                request = decode_udp_message(bytes(buffer[:count]))
+            except UdpCodecError:
+                continue
+
+            if not isinstance(request, UdpRequest) or self.profile.is_lost():
+                continue
+
+            self.client = address
+
+            retransmission = self._last is not None and self._last[0] == (address, request.pacid)
+
+            if retransmission:
+                response = self._last[1]
+            else:
+                self.requests.append(request)
+
+                if self.profile.processing > 0:
+                    time.sleep(self.profile.processing)
+
+                response = self._respond(request)
+
+                if response is None:
+                    continue
+
+                self._last = ((address, request.pacid), response)
+
+            accepted = not retransmission and isinstance(request, DataSendRequest) and response.ok
+
+            if accepted:
+                self._accept(request.data)
+
+            if not self.profile.is_lost():
+                self.socket.sendto(response.encode(), address)
+
+            if accepted:
+                self._forward(request.data)
+
+    def close(self):
+        super().close()
+        self._server.join()
+        self.socket.close()
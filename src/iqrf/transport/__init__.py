@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+"""
+Transport
+=========
+
+Opens IQRF channels by URL. Only the IO module of the requested transport is
+imported, so a program talking to a UDP gateway doesn't load pyserial,
+python-periphery or asyncio:
+
+.. code-block:: python
+
+    import iqrf.transport
+
+    with iqrf.transport.open("udp://192.168.1.100:55000", buffered=True) as io:
+        ...
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import importlib
+import sys
+
+__all__ = [
+    "open"
+]
+
+# The IO modules of the transports by their URL scheme.
+_BACKENDS = {
+    "cdc": "cdc_io",
+    "spi": "spi_io",
+    "udp": "udp_io"
+}
+
+
+def open(url, **kwargs):
+    """Opens a channel described by the URL, e.g. ``cdc:///dev/ttyACM0``,
+    ``spi:///dev/spidev0.0`` or ``udp://host:port``. The keyword arguments are
+    passed to the ``open`` function of the transport.
+
+    :raises ValueError: If the URL is invalid or its scheme unknown.
+    :raises NotImplementedError: If the transport isn't available on this
+        platform.
+    """
+
+    # Deferred as urllib.parse costs more to import than this package.
+    import urllib.parse
+
+    parts = urllib.parse.urlsplit(url)
+    backend = _BACKENDS.get(parts.scheme)
+
+    if backend is None:
+        raise ValueError("Unknown transport: {!r}.".format(parts.scheme))
+
+    if parts.scheme == "spi" and sys.platform != "linux":
+        raise NotImplementedError("Unfortunately, the SPI transport has not been implemented on your platform yet.")
+
+    module = importlib.import_module("." + backend, __name__)
+
+    if parts.scheme == "udp":
+        if parts.hostname is None or parts.port is None:
+            raise ValueError("The UDP transport requires a host and a port: {!r}.".format(url))
+
+        return module.open(parts.hostname, parts.port, **kwargs)
+
+    port = parts.netloc + parts.path
+
+    if not port:
+        raise ValueError("The {} transport requires a device: {!r}.".format(parts.scheme.upper(), url))
+
+    return module.open(port, **kwargs)
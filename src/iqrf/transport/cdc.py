@@ -1,10 +1,13 @@
+from . import cdc_aio
 from . import cdc_codec
 from . import cdc_io
 
+from .cdc_aio import *
 from .cdc_codec import *
 from .cdc_io import *
 
 __all__ = (
+    cdc_aio.__all__ +
     cdc_codec.__all__ +
     cdc_io.__all__
 )
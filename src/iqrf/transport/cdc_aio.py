@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF CDC Asynchronous IO
+========================
+
+An :mod:`asyncio` implementation of communication channel with IQRF USB CDC
+devices. A single event loop can drive any number of devices.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import asyncio
+
+import serial
+
+from .cdc_codec import CdcCodecError, CdcToken, CdcRequest, CdcResponse, CdcReaction, decode_cdc_message, find_cdc_frame
+from ..util.codec import message_type
+from ..util.io import FrameBuffer, IoError, IoTimeoutError
+from ..util.log import logger
+
+__all__ = [
+    "AsyncCdcIo",
+    "open_async"
+]
+
+
+class AsyncCdcIo:
+
+    def __init__(self, port, loop=None):
+        self._loop = loop if loop is not None else asyncio.get_event_loop()
+        self._serial = serial.Serial(port=port, baudrate=9600, timeout=0)
+
+        self._frames = FrameBuffer(CdcToken.TERMINATOR, framer=find_cdc_frame)
+        self._reactions = asyncio.Queue()
+        self._lock = asyncio.Lock()
+        self._pending = None
+        self._error = None
+
+        self._loop.add_reader(self._serial.fileno(), self._on_readable)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.receive()
+
+    def _on_readable(self):
+        try:
+            self._frames.fill(self._serial.readinto)
+        except serial.SerialException as error:
+            self._fail(IoError(error))
+            return
+
+        while True:
+            frame = self._frames.next_frame()
+            if frame is None:
+                break
+
+            try:
+                message = decode_cdc_message(frame)
+            except CdcCodecError as error:
+                logger.warning("Dropping undecodable CDC message '%s': %s.", bytes(frame), error)
+                continue
+
+            self._dispatch(message)
+
+    def _dispatch(self, message):
+        if isinstance(message, CdcReaction):
+            self._reactions.put_nowait(message)
+        elif isinstance(message, CdcResponse):
+            if self._pending is not None and not self._pending.done():
+                self._pending.set_result(message)
+            else:
+                logger.warning("Dropping unsolicited CDC response: %s.", message)
+
+    def _fail(self, error):
+        self._error = error
+        self._loop.remove_reader(self._serial.fileno())
+
+        if self._pending is not None and not self._pending.done():
+            self._pending.set_exception(error)
+
+        # Wakes up a pending receive, which then reports the error.
+        self._reactions.put_nowait(None)
+
+    async def send(self, message, timeout=None):
+        if not issubclass(message_type(message), CdcRequest):
+            raise TypeError("Invalid message type!")
+
+        async with self._lock:
+            if self._error is not None:
+                raise self._error
+
+            self._pending = self._loop.create_future()
+
+            try:
+                self._serial.write(message.encode())
+                return await asyncio.wait_for(self._pending, timeout)
+            except asyncio.TimeoutError:
+                raise IoTimeoutError
+            finally:
+                self._pending = None
+
+    async def receive(self, timeout=None):
+        if self._error is not None and self._reactions.empty():
+            raise self._error
+
+        try:
+            message = await asyncio.wait_for(self._reactions.get(), timeout)
+        except asyncio.TimeoutError:
+            raise IoTimeoutError
+
+        if message is None:
+            raise self._error
+
+        return message
+
+    def close(self):
+        if self._error is None:
+            self._loop.remove_reader(self._serial.fileno())
+
+        self._serial.close()
+
+
+async def open_async(port, loop=None):
+    return AsyncCdcIo(port, loop=loop)
@@ -12,10 +12,9 @@ This is a concrete implementation of IQRF CDC serialization.
 """
 
 import enum
-import re
 
-from ..util.codec import CodecError, Encoder, Decoder, Request, Reaction, Response
-from ..util.common import CommonEqualityMixin
+from ..util.codec import CodecError, Encoder, Decoder, MessageRegistry, PreparedRequest, Request, Reaction, Response
+from ..util.common import FlyweightMixin, ValueMixin
 from ..util.log import logger
 
 __all__ = [
@@ -42,7 +41,7 @@ __all__ = [
     "register_cdc_request", "register_cdc_response",
     "get_cdc_request_type", "get_cdc_request_id",
     "get_cdc_response_type", "get_cdc_response_id",
-    "decode_cdc_message"
+    "find_cdc_frame", "decode_cdc_message"
 ]
 
 
@@ -72,119 +71,105 @@ class CdcStatus(enum.Enum):
     ERROR = 2
 
 
-class CdcRequest(Request, CommonEqualityMixin):
+class CdcRequest(Request, ValueMixin):
     """Abstract base for all CDC request messages."""
 
-    pass
+    __slots__ = ()
+
 
+class CdcResponse(Response, ValueMixin):
+    """Abstract base for all CDC response messages. The :attr:`status` is an
+    instance of :class:`CdcStatus`."""
 
-class CdcResponse(Response, CommonEqualityMixin):
-    """Abstract base for all CDC response messages."""
+    __slots__ = ("status",)
+    _fields = __slots__
 
     def __init__(self, status):
-        self._status = status
+        object.__setattr__(self, "status", status)
 
-    @property
-    def status(self):
-        """Returns the status of this response.
 
-        :return: An instance of :class:`CdcStatus` representing the status of
-            this response.
-        :rtype: CdcStatus
-        """
+class CdcReaction(Reaction, ValueMixin):
+    """Abstract base for all CDC reaction messages."""
 
-        return self._status
+    __slots__ = ()
 
 
-class CdcReaction(Reaction, CommonEqualityMixin):
-    """Abstract base for all CDC reaction messages."""
+REQUESTS = MessageRegistry(CdcRequest, "request", lambda: _DEFAULT_REQUESTS)
+RESPONSES = MessageRegistry(CdcResponse, "response", lambda: _DEFAULT_RESPONSES)
+REACTIONS = MessageRegistry(CdcReaction, "reaction", lambda: _DEFAULT_REACTIONS)
 
-    pass
 
-REQUESTS = {}
-RESPONSES = {}
-REACTIONS = {}
+# Maps the direction and identifier of every registered message to its type
+# and whether its frames are length prefixed; rebuilt after registrations.
+_DISPATCH = None
+_LENGTH_PREFIXED = None
 
 
-def register_cdc_request(cls, id):
-    if not issubclass(cls, CdcRequest):
-        raise ValueError("Not a request type!")
+def _dispatch_table():
+    global _DISPATCH, _LENGTH_PREFIXED
 
-    if cls in REQUESTS:
-        raise ValueError("Duplicate request type!")
+    table = _DISPATCH
 
-    REQUESTS[cls] = id
-    logger.debug("Registering CDC request: (%s:%s).", cls, id)
+    if table is None:
+        table = {}
 
+        # Responses take precedence over reactions with the same identifier.
+        for direction, registry in ((CdcToken.REQUEST, REQUESTS), (CdcToken.RESPONSE, REACTIONS), (CdcToken.RESPONSE, RESPONSES)):
+            for cls in registry:
+                table[direction + registry.get_id(cls)] = (cls, getattr(cls, "length_prefixed", False))
 
-def register_cdc_response(cls, id):
-    if not issubclass(cls, CdcResponse):
-        raise ValueError("Not a response type!")
+        _LENGTH_PREFIXED = frozenset(header for header, (_, prefixed) in table.items() if prefixed)
+        _DISPATCH = table
 
-    if cls in RESPONSES:
-        raise ValueError("Duplicate response type!")
+    return table
 
-    RESPONSES[cls] = id
-    logger.debug("Registering CDC response: (%s:%s).", cls, id)
 
+def _invalidate_dispatch_table():
+    global _DISPATCH
 
-def register_cdc_reaction(cls, id):
-    if not issubclass(cls, CdcReaction):
-        raise ValueError("Not a reaction type!")
+    _DISPATCH = None
 
-    if cls in REACTIONS:
-        raise ValueError("Duplicate reaction type!")
 
-    REACTIONS[cls] = id
+def register_cdc_request(cls, id):
+    REQUESTS.register(cls, id)
+    _invalidate_dispatch_table()
+    logger.debug("Registering CDC request: (%s:%s).", cls, id)
+
+
+def register_cdc_response(cls, id):
+    RESPONSES.register(cls, id)
+    _invalidate_dispatch_table()
+    logger.debug("Registering CDC response: (%s:%s).", cls, id)
+
+
+def register_cdc_reaction(cls, id):
+    REACTIONS.register(cls, id)
+    _invalidate_dispatch_table()
     logger.debug("Registering CDC reaction: (%s:%s).", cls, id)
 
 
 def get_cdc_request_type(id):
-    for request_type, request_id in REQUESTS.items():
-        if id == request_id:
-            return request_type
-
-    return None
+    return REQUESTS.get_type(id)
 
 
 def get_cdc_request_id(type):
-    for request_type, request_id in REQUESTS.items():
-        if type == request_type:
-            return request_id
-
-    return None
+    return REQUESTS.get_id(type)
 
 
 def get_cdc_response_type(id):
-    for response_type, response_id in RESPONSES.items():
-        if id == response_id:
-            return response_type
-
-    return None
+    return RESPONSES.get_type(id)
 
 
 def get_cdc_response_id(type):
-    for response_type, response_id in RESPONSES.items():
-        if type == response_type:
-            return response_id
-
-    return None
+    return RESPONSES.get_id(type)
 
 
 def get_cdc_reaction_type(id):
-    for reaction_type, reaction_id in REACTIONS.items():
-        if id == reaction_id:
-            return reaction_type
-
-    return None
+    return REACTIONS.get_type(id)
 
 
 def get_cdc_reaction_id(type):
-    for reaction_type, reaction_id in REACTIONS.items():
-        if type == reaction_type:
-            return reaction_id
-
-    return None
+    return REACTIONS.get_id(type)
 
 
 class CdcToken:
@@ -192,7 +177,6 @@ class CdcToken:
     TERMINATOR = b"\r"
     REQUEST = b">"
     RESPONSE = b"<"
-    PATTERN = re.compile(b"(" + REQUEST + b"|" + RESPONSE + b")([A-Z]{0,3})(.*?)" + TERMINATOR + b"$")
     SEPARATOR = b":"
     OK = b"OK"
     BUSY = b"BUSY"
@@ -201,6 +185,8 @@ class CdcToken:
 
 class CdcEncoder(Encoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         """Turns the object into smaller pieces called tokens which can be
         serialized to bytes. This method is called directly from the
@@ -215,13 +201,13 @@ class CdcEncoder(Encoder):
 
         if isinstance(self, CdcRequest):
             direction = CdcToken.REQUEST
-            identifier = get_cdc_request_id(message_type)
+            identifier = REQUESTS.get_id(message_type)
         elif isinstance(self, CdcResponse):
             direction = CdcToken.RESPONSE
-            identifier = get_cdc_response_id(message_type)
+            identifier = RESPONSES.get_id(message_type)
         elif isinstance(self, CdcReaction):
             direction = CdcToken.RESPONSE
-            identifier = get_cdc_reaction_id(message_type)
+            identifier = REACTIONS.get_id(message_type)
         else:
             raise CdcEncodeError("Not a CDC message!")
 
@@ -242,17 +228,26 @@ class CdcEncoder(Encoder):
 
 
 class CdcDecoder(Decoder):
-    pass
+
+    __slots__ = ()
+
+    # Whether the frames carry a length byte as their parameter, in which case
+    # the value is binary and may contain the terminator.
+    length_prefixed = False
 
 
 class NoneEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         return None, None
 
 
 class NoneDecoder(CdcDecoder):
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is not None or value is not None:
@@ -263,6 +258,8 @@ class NoneDecoder(CdcDecoder):
 
 class StatusEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         if self.status == CdcStatus.OK:
             status = CdcToken.OK
@@ -278,6 +275,8 @@ class StatusEncoder(CdcEncoder):
 
 class StatusDecoder(CdcDecoder):
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is not None or value is None:
@@ -297,277 +296,407 @@ class StatusDecoder(CdcDecoder):
 
 class InfoEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         return None, self.type.encode() + b"#" + self.version.encode() + b"#" + self.id.encode()
 
 
 class InfoDecoder(CdcDecoder):
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is not None or value is None:
             raise CdcDecodeError
 
-        return cls(*[info.decode() for info in value.split(b"#")])
+        return cls(*[info.decode() for info in bytes(value).split(b"#")])
 
 
 class TrInfoEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         return None, self.info
 
 
 class TrInfoDecoder(CdcDecoder):
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is not None or value is None:
             raise CdcDecodeError
 
-        return cls(value)
+        return cls(bytes(value))
 
 
 class SpiStatusEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         return None, self.spi_status
 
 
 class SpiStatusDecoder(CdcDecoder):
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is not None or value is None:
             raise CdcDecodeError
 
-        return cls(value)
+        return cls(bytes(value))
 
 
 class DataEncoder(CdcEncoder):
 
+    __slots__ = ()
+
     def tokenize(self):
         return bytes([len(self.data)]), self.data
 
 
 class DataDecoder(CdcDecoder):
 
+    __slots__ = ()
+
+    length_prefixed = True
+
     @classmethod
     def decode(cls, parameter, value):
         if parameter is None or value is None:
             raise CdcDecodeError
 
-        return cls(value)
+        return cls(bytes(value))
+
 
+class ErrorResponse(FlyweightMixin, NoneEncoder, NoneDecoder, CdcResponse):
 
-class ErrorResponse(NoneEncoder, NoneDecoder, CdcResponse):
+    __slots__ = ()
 
     def __init__(self):
         super().__init__(CdcStatus.ERROR)
 
 
-class TestRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class TestRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
 
+    __slots__ = ()
 
-class TestResponse(NoneEncoder, NoneDecoder, CdcResponse):
+
+class TestResponse(FlyweightMixin, NoneEncoder, NoneDecoder, CdcResponse):
+
+    __slots__ = ()
 
     def __init__(self):
         super().__init__(CdcStatus.OK)
 
 
-class ResetRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class ResetRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class ResetResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
-class TrResetRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class TrResetRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class TrResetResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
-class InfoRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class InfoRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class InfoResponse(InfoEncoder, InfoDecoder, CdcResponse):
 
+    __slots__ = ("type", "version", "id")
+    _fields = CdcResponse._fields + __slots__
+
     def __init__(self, type, version, id):
         super().__init__(CdcStatus.OK)
-        self.type = type
-        self.version = version
-        self.id = id
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "id", id)
 
 
-class TrInfoRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class TrInfoRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class TrInfoResponse(TrInfoEncoder, TrInfoDecoder, CdcResponse):
 
+    __slots__ = ("info",)
+    _fields = CdcResponse._fields + __slots__
+
     def __init__(self, info):
         super().__init__(CdcStatus.OK)
-        self.info = info
+        object.__setattr__(self, "info", bytes(info))
 
 
-class IndicationRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class IndicationRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class IndicationResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
-class SpiStatusRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class SpiStatusRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class SpiStatusResponse(SpiStatusEncoder, SpiStatusDecoder, CdcResponse):
 
+    __slots__ = ("spi_status",)
+    _fields = CdcResponse._fields + __slots__
+
     def __init__(self, spi_status):
         super().__init__(CdcStatus.OK)
-        self.spi_status = spi_status
+        object.__setattr__(self, "spi_status", bytes(spi_status))
 
 
 class DataSendRequest(DataEncoder, DataDecoder, CdcRequest):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
+
+    def prepare(self):
+        frame = self.encode()
+        return PreparedRequest(type(self), frame, len(frame) - len(self.data) - 1, len(self.data))
 
 
 class DataSendResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
 class DataReceivedReaction(DataEncoder, DataDecoder, CdcReaction):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
 
 
-class SwitchToCustomClassRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class SwitchToCustomClassRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class SwitchToCustomClassResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
-class SwitchToUartRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class SwitchToUartRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class SwitchToUartResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
 
-class SwitchToSpiRequest(NoneEncoder, NoneDecoder, CdcRequest):
-    pass
+class SwitchToSpiRequest(FlyweightMixin, NoneEncoder, NoneDecoder, CdcRequest):
+
+    __slots__ = ()
 
 
 class SwitchToSpiResponse(StatusEncoder, StatusDecoder, CdcResponse):
 
+    __slots__ = ()
+
     def __init__(self, status):
         super().__init__(status)
 
-register_cdc_response(ErrorResponse, b"ERR")
 
-register_cdc_request(TestRequest, b"")
-register_cdc_response(TestResponse, b"OK")
+# The built-in messages, registered on first use of the registries.
+_DEFAULT_REQUESTS = [
+    (TestRequest, b""),
+    (ResetRequest, b"R"),
+    (TrResetRequest, b"RT"),
+    (InfoRequest, b"I"),
+    (TrInfoRequest, b"IT"),
+    (IndicationRequest, b"B"),
+    (SpiStatusRequest, b"S"),
+    (DataSendRequest, b"DS"),
+    (SwitchToCustomClassRequest, b"U"),
+    (SwitchToUartRequest, b"UU"),
+    (SwitchToSpiRequest, b"US")
+]
 
-register_cdc_request(ResetRequest, b"R")
-register_cdc_response(ResetResponse, b"R")
+_DEFAULT_RESPONSES = [
+    (ErrorResponse, b"ERR"),
+    (TestResponse, b"OK"),
+    (ResetResponse, b"R"),
+    (TrResetResponse, b"RT"),
+    (InfoResponse, b"I"),
+    (TrInfoResponse, b"IT"),
+    (IndicationResponse, b"B"),
+    (SpiStatusResponse, b"S"),
+    (DataSendResponse, b"DS"),
+    (SwitchToCustomClassResponse, b"U"),
+    (SwitchToUartResponse, b"UU"),
+    (SwitchToSpiResponse, b"US")
+]
 
-register_cdc_request(TrResetRequest, b"RT")
-register_cdc_response(TrResetResponse, b"RT")
+_DEFAULT_REACTIONS = [
+    (DataReceivedReaction, b"DR")
+]
 
-register_cdc_request(InfoRequest, b"I")
-register_cdc_response(InfoResponse, b"I")
 
-register_cdc_request(TrInfoRequest, b"IT")
-register_cdc_response(TrInfoResponse, b"IT")
+_TERMINATOR_BYTE = CdcToken.TERMINATOR[0]
+_SEPARATOR_BYTE = CdcToken.SEPARATOR[0]
+_DIRECTIONS = (CdcToken.REQUEST[0], CdcToken.RESPONSE[0])
 
-register_cdc_request(IndicationRequest, b"B")
-register_cdc_response(IndicationResponse, b"B")
 
-register_cdc_request(SpiStatusRequest, b"S")
-register_cdc_response(SpiStatusResponse, b"S")
+def find_cdc_frame(buffer, start=0, end=None):
+    """Returns the end of the frame starting at ``start`` in the buffer, or -1
+    if the frame is incomplete. Frames of length prefixed messages are cut by
+    their length byte, as their binary value may contain the terminator; any
+    other frame ends with the first terminator.
 
-register_cdc_request(DataSendRequest, b"DS")
-register_cdc_response(DataSendResponse, b"DS")
+    :param buffer: A bytes-like object holding the frame.
+    :param end: The end of the valid data in the buffer.
+    """
 
-register_cdc_reaction(DataReceivedReaction, b"DR")
+    if end is None:
+        end = len(buffer)
 
-register_cdc_request(SwitchToCustomClassRequest, b"U")
-register_cdc_response(SwitchToCustomClassResponse, b"U")
+    if _DISPATCH is None:
+        _dispatch_table()
 
-register_cdc_request(SwitchToUartRequest, b"UU")
-register_cdc_response(SwitchToUartResponse, b"UU")
+    if end - start >= 4 and bytes(buffer[start:start + 3]) in _LENGTH_PREFIXED:
+        boundary = start + buffer[start + 3] + 6
 
-register_cdc_request(SwitchToSpiRequest, b"US")
-register_cdc_response(SwitchToSpiResponse, b"US")
+        if boundary > end:
+            return -1
 
+        # A frame not terminated where its length says is garbage, which is
+        # then resynchronised on the next terminator.
+        if buffer[boundary - 1] == _TERMINATOR_BYTE:
+            return boundary
 
-def tokenize_cdc_message(data):
-    match = CdcToken.PATTERN.match(data)
+    index = buffer.find(CdcToken.TERMINATOR, start, end)
 
-    if match is None:
-        raise CdcDecodeError
+    return -1 if index < 0 else index + 1
 
-    direction = match.group(1)
-    identifier = match.group(2)
-    data = match.group(3)
 
-    if len(data) == 0:
-        parameter = None
-        value = None
-    else:
-        index = data.find(CdcToken.SEPARATOR)
+def _tokenize(data):
+    frame = data if type(data) is bytes else bytes(data)
+    length = len(frame)
 
-        if index == 0:
-            parameter = None
-        else:
-            parameter = data[:index]
+    if length < 2 or frame[-1] != _TERMINATOR_BYTE:
+        raise CdcDecodeError("Missing terminator!")
 
-        value = data[index + 1:]
+    table = _DISPATCH if _DISPATCH is not None else _dispatch_table()
 
-    return direction, identifier, parameter, value
+    # The identifier usually runs up to the separator or the terminator, or
+    # up to the length byte preceding the separator.
+    index = frame.find(CdcToken.SEPARATOR, 1, length - 1)
+    size = length - 1 if index < 0 else index
+    entry = table.get(frame[:size])
 
+    if entry is None and size > 1:
+        size -= 1
+        entry = table.get(frame[:size])
 
-def decode_cdc_message(data):
-    direction, identifier, parameter, value = tokenize_cdc_message(data)
+    if entry is None:
+        entry, size = _longest_identifier(table, frame)
+
+    cls, prefixed = entry
+    view = memoryview(frame)
+
+    if prefixed:
+        if length - size < 3 or frame[size + 1] != _SEPARATOR_BYTE or frame[size] != length - size - 3:
+            raise CdcDecodeError("Invalid data length!")
+
+        return size, cls, view[size:size + 1], view[size + 2:length - 1]
+
+    if size == length - 1:
+        return size, cls, None, None
+
+    if index < 0:
+        return size, cls, view[size:length - 1], None
 
-    if direction == CdcToken.REQUEST:
-        type = get_cdc_request_type(identifier)
-    elif direction == CdcToken.RESPONSE:
-        type = get_cdc_response_type(identifier)
+    return size, cls, view[size:index] if index > size else None, view[index + 1:length - 1]
 
-        if type is None:
-            type = get_cdc_reaction_type(identifier)
-    else:
+
+def _longest_identifier(table, frame):
+    """Returns the entry of the longest registered identifier, which is a run
+    of up to three capitals, and the size of its header."""
+
+    if frame[0] not in _DIRECTIONS:
         raise CdcDecodeError("Unknown direction!")
 
-    if type is None:
-        raise CdcDecodeError("Unknown message!")
+    letters = 0
+    while letters < 3 and letters + 2 < len(frame) and 0x41 <= frame[letters + 1] <= 0x5a:
+        letters += 1
+
+    for size in range(letters + 1, 0, -1):
+        entry = table.get(frame[:size])
+
+        if entry is not None:
+            return entry, size
+
+    raise CdcDecodeError("Unknown message!")
+
 
-    decoded = type.decode(parameter, value)
+def tokenize_cdc_message(data):
+    """Splits a frame into its direction, identifier, parameter and value. The
+    parameter and value are :class:`memoryview` slices of the frame."""
+
+    size, _, parameter, value = _tokenize(data)
+    header = bytes(data[:size])
+
+    return header[:1], header[1:], parameter, value
+
+
+def decode_cdc_message(data):
+    _, cls, parameter, value = _tokenize(data)
+    decoded = cls.decode(parameter, value)
 
     logger.debug("Decoded '%s' as: %s.", data, decoded)
 
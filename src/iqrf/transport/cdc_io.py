@@ -12,24 +12,42 @@ An implementation of communication channel with IQRF USB CDC devices.
 """
 
 import collections
+import concurrent.futures
+import io
+import threading
 import time
 
 import serial
 
-from .cdc_codec import CdcToken, CdcRequest, CdcResponse, CdcReaction, decode_cdc_message
-from ..util.io import IoError, to_iotime, wait
+from .cdc_codec import CdcCodecError, CdcToken, CdcRequest, CdcResponse, CdcReaction, decode_cdc_message, find_cdc_frame
+from ..util.capture import CaptureReplay
+from ..util.codec import message_type
+from ..util.io import FrameBuffer, IoError, IoTimeoutError, ReadableWaiter, time_left, to_deadline, wait
+from ..util.log import logger
+from ..util.queue import OverflowPolicy, QueueClosedError, QueueOverflowError, ReactionQueue
 
 __all__ = [
-    "RawCdcIo", "BufferedCdcIo",
+    "RawCdcIo", "BufferedCdcIo", "ThreadedCdcIo", "ReplayCdcIo",
     "open"
 ]
 
 
 class RawCdcIo:
 
+    # The :class:`iqrf.util.capture.CaptureWriter` recording the traffic of
+    # the channel, None while capturing is disabled.
+    capture = None
+
     def __init__(self, port):
         self._serial = serial.Serial(port=port, baudrate=9600, timeout=None)
 
+        try:
+            self._waiter = ReadableWaiter(self._serial.fileno())
+        except (AttributeError, io.UnsupportedOperation, ValueError):
+            # Platforms without selectable serial ports (e.g. Windows) fall
+            # back to polling the input buffer.
+            self._waiter = None
+
     def __enter__(self):
         return self
 
@@ -39,65 +57,123 @@ class RawCdcIo:
     def remaining(self):
         return self._serial.in_waiting
 
+    def _wait_available(self, timeout=None):
+        if self._waiter is None:
+            delta, available = wait(self.remaining, lambda x: x > 0, timeout=timeout)
+        else:
+            self._waiter.wait(timeout)
+            # A readable descriptor with an empty input buffer means the device
+            # got disconnected, in which case the blocking read raises.
+            available = max(self.remaining(), 1)
+
+        return available
+
     def read(self, size, timeout=None):
-        delta, available = wait(self.remaining, lambda x: x > 0, timeout=timeout)
-        return self._serial.read(min(size, available))
+        available = self._wait_available(timeout)
+        data = self._serial.read(min(size, available))
+
+        if self.capture is not None:
+            self.capture.incoming(data)
+
+        return data
+
+    def readinto(self, buffer, timeout=None):
+        available = self._wait_available(timeout)
+        count = self._serial.readinto(buffer[:min(len(buffer), available)])
+
+        if self.capture is not None:
+            self.capture.incoming(buffer[:count])
+
+        return count
 
     def write(self, data, timeout=None):
+        if self.capture is not None:
+            self.capture.outgoing(data)
+
         return self._serial.write(data)
 
     def close(self):
+        if self._waiter is not None:
+            self._waiter.close()
+
         self._serial.close()
 
 
 class BufferedCdcIo(RawCdcIo):
 
+    # The :class:`iqrf.util.metrics.TransportMetrics` of the channel, None
+    # while metrics are disabled.
+    metrics = None
+
     def __init__(self, port):
         super().__init__(port)
+        self._init_buffers()
+
+    def _init_buffers(self):
+        """Initialises the framing state, shared with :class:`ReplayCdcIo`
+        which has no port to open."""
 
-        self._buffer = bytearray()
+        self._frames = FrameBuffer(CdcToken.TERMINATOR, framer=find_cdc_frame)
         self._reactions = collections.deque()
 
     def _read_cdc_message(self, timeout=None):
-        timeout = to_iotime(timeout)
+        deadline = to_deadline(timeout)
 
         while True:
-            start = time.time()
-            if len(self._buffer) > 0:
-                boundary = self._buffer.find(CdcToken.TERMINATOR)
-                if boundary != -1:
-                    boundary += 1
-                    data = bytes(self._buffer[:boundary])
-                    self._buffer = self._buffer[boundary:]
+            frame = self._frames.next_frame()
+            if frame is not None:
+                if self.metrics is not None:
+                    return self._decode_counted(frame)
+
+                return decode_cdc_message(frame)
+
+            self._frames.fill(lambda buffer: self.readinto(buffer, timeout=time_left(deadline)))
 
-                    return decode_cdc_message(data)
+    def _decode_counted(self, frame):
+        metrics = self.metrics
+        metrics.frames_in += 1
+        metrics.bytes_in += len(frame)
 
-            self._buffer.extend(self.read(1024, timeout=timeout))
-            timeout -= time.time() - start
+        try:
+            return decode_cdc_message(frame)
+        except CdcCodecError:
+            metrics.decode_errors += 1
+            raise
+
+    def _write_counted(self, data, timeout=None):
+        metrics = self.metrics
+
+        if metrics is not None:
+            metrics.frames_out += 1
+            metrics.bytes_out += len(data)
+
+        self.write(data, timeout=timeout)
 
     def send(self, message, timeout=None):
-        if not isinstance(message, CdcRequest):
+        if not issubclass(message_type(message), CdcRequest):
             raise TypeError("Invalid message type!")
 
-        timeout = to_iotime(timeout)
+        deadline = to_deadline(timeout)
+        start = time.monotonic()
 
-        start = time.time()
-        self.write(message.encode(), timeout=timeout)
-        timeout -= time.time() - start
+        self._write_counted(message.encode(), timeout=timeout)
 
         while True:
-            start = time.time()
-            message = self._read_cdc_message(timeout=timeout)
+            message = self._read_cdc_message(timeout=time_left(deadline))
 
             if isinstance(message, CdcReaction):
                 self._reactions.append(message)
+
+                if self.metrics is not None:
+                    self.metrics.reactions_queued += 1
             elif isinstance(message, CdcResponse):
+                if self.metrics is not None:
+                    self.metrics.send_latency.record(time.monotonic() - start)
+
                 return message
             else:
                 raise IoError
 
-            timeout -= time.time() - start
-
     def receive(self, timeout=None):
         if len(self._reactions) > 0:
             return self._reactions.popleft()
@@ -110,5 +186,220 @@ class BufferedCdcIo(RawCdcIo):
         return message
 
 
-def open(port):
+class ThreadedCdcIo(BufferedCdcIo):
+    """A CDC channel that drains the serial port continuously in a background
+    reader thread. Responses are handed to the pending :meth:`send` through a
+    future and reactions are pushed into a bounded :class:`ReactionQueue`, so
+    unsolicited reactions don't pile up in the device buffers while the
+    caller is busy.
+
+    :param queue_size: The capacity of the reaction queue or None for an
+        unbounded queue.
+    :param overflow: The :class:`OverflowPolicy` applied when the reaction
+        queue is full. With :attr:`OverflowPolicy.RAISE` the overflow is
+        reported by the next :meth:`receive`. With
+        :attr:`OverflowPolicy.BLOCK` the reader holds the reactions that don't
+        fit until space is freed, and keeps reading responses meanwhile.
+    """
+
+    # The reader thread checks whether it should stop at this interval, and
+    # whether the queue has space for blocked reactions at the shorter one.
+    READ_INTERVAL = 0.1
+    BACKLOG_INTERVAL = 0.01
+
+    def __init__(self, port, queue_size=1024, overflow=OverflowPolicy.DROP_OLDEST):
+        super().__init__(port)
+
+        self._reactions = ReactionQueue(queue_size, overflow)
+        self._lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._pending = None
+        self._overflow = None
+        self._error = None
+        self._running = True
+
+        self._reader = threading.Thread(target=self._read_loop, name="CdcReader({})".format(port), daemon=True)
+        self._reader.start()
+
+    def _read_loop(self):
+        # Reactions waiting for space in a full queue with the
+        # OverflowPolicy.BLOCK policy, kept here so that responses are still
+        # read meanwhile.
+        backlog = collections.deque()
+
+        while self._running:
+            self._enqueue(backlog)
+
+            try:
+                message = self._read_cdc_message(timeout=self.BACKLOG_INTERVAL if backlog else self.READ_INTERVAL)
+            except IoTimeoutError:
+                continue
+            except CdcCodecError as error:
+                logger.warning("Dropping undecodable CDC message: %s.", error)
+                continue
+            except (serial.SerialException, OSError) as error:
+                if self._running:
+                    self._fail(IoError(error))
+                return
+
+            if isinstance(message, CdcReaction):
+                backlog.append(message)
+                self._enqueue(backlog)
+            elif isinstance(message, CdcResponse):
+                with self._lock:
+                    pending = self._pending
+
+                if pending is not None and not pending.done():
+                    pending.set_result(message)
+                else:
+                    logger.warning("Dropping unsolicited CDC response: %s.", message)
+
+    def _enqueue(self, backlog):
+        """Moves the reactions of the backlog into the queue, in order, as long
+        as they fit."""
+
+        while backlog:
+            try:
+                self._reactions.put(backlog[0], timeout=0)
+            except QueueOverflowError as error:
+                if self._reactions.overflow == OverflowPolicy.BLOCK:
+                    return
+
+                self._overflow = error
+
+                if self.metrics is not None:
+                    self.metrics.reactions_dropped += 1
+            except QueueClosedError:
+                backlog.clear()
+                return
+            else:
+                if self.metrics is not None:
+                    self.metrics.reactions_queued += 1
+                    self.metrics.reactions_dropped = self._reactions.dropped
+
+            backlog.popleft()
+
+    def _fail(self, error):
+        with self._lock:
+            self._error = error
+            pending = self._pending
+
+        if pending is not None and not pending.done():
+            pending.set_exception(error)
+
+        self._reactions.close(error)
+
+    @property
+    def dropped(self):
+        """The number of reactions dropped because the queue was full."""
+
+        return self._reactions.dropped
+
+    def send(self, message, timeout=None):
+        if not issubclass(message_type(message), CdcRequest):
+            raise TypeError("Invalid message type!")
+
+        with self._send_lock:
+            future = concurrent.futures.Future()
+
+            with self._lock:
+                if self._error is not None:
+                    raise self._error
+
+                self._pending = future
+
+            try:
+                start = time.monotonic()
+                self._write_counted(message.encode(), timeout=timeout)
+                response = future.result(timeout)
+
+                if self.metrics is not None:
+                    self.metrics.send_latency.record(time.monotonic() - start)
+
+                return response
+            except concurrent.futures.TimeoutError:
+                raise IoTimeoutError
+            finally:
+                with self._lock:
+                    self._pending = None
+
+    def receive(self, timeout=None):
+        overflow, self._overflow = self._overflow, None
+
+        if overflow is not None:
+            raise overflow
+
+        return self._reactions.get(timeout)
+
+    def close(self):
+        self._running = False
+
+        if self._reader is not threading.current_thread():
+            self._reader.join()
+
+        self._reactions.close()
+        super().close()
+
+
+class ReplayCdcIo(BufferedCdcIo):
+    """A CDC channel that plays a capture back instead of talking to a
+    device. The captured incoming data is read at its original pace scaled
+    by ``speed``, and each write consumes the next captured write and
+    resynchronises the replay clock to it, so responses keep their captured
+    latency no matter how long the caller took to send the request. A write
+    that differs from the capture is logged and replayed anyway.
+
+    :param capture: The path of a capture file or an iterable of
+        :class:`iqrf.util.capture.CaptureRecord`.
+    :param speed: The replay speed relative to the capture or None to replay
+        as fast as possible.
+    :raises iqrf.util.capture.CaptureEndError: From reads and writes once the
+        capture is exhausted.
+    """
+
+    def __init__(self, capture, speed=1.0):
+        self._init_buffers()
+
+        self._replay = CaptureReplay(capture, speed)
+        self._pending = memoryview(b"")
+
+    def remaining(self):
+        return len(self._pending)
+
+    def _next_chunk(self, timeout):
+        if len(self._pending) == 0:
+            self._pending = memoryview(self._replay.read(timeout).data)
+
+        return self._pending
+
+    def read(self, size, timeout=None):
+        chunk = self._next_chunk(timeout)
+        self._pending = chunk[size:]
+
+        return bytes(chunk[:size])
+
+    def readinto(self, buffer, timeout=None):
+        chunk = self._next_chunk(timeout)
+        count = min(len(buffer), len(chunk))
+        buffer[:count] = chunk[:count]
+        self._pending = chunk[count:]
+
+        return count
+
+    def write(self, data, timeout=None):
+        record = self._replay.written()
+
+        if record.data != bytes(data):
+            logger.warning("Replayed CDC write %r differs from the captured %r.", bytes(data), bytes(record.data))
+
+        return len(data)
+
+    def close(self):
+        self._replay.close()
+
+
+def open(port, threaded=False, **kwargs):
+    if threaded:
+        return ThreadedCdcIo(port, **kwargs)
+
     return BufferedCdcIo(port)
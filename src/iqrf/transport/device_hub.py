@@ -0,0 +1,425 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF Device Hub
+===============
+
+Drives many IQRF devices from a single thread. CDC dongles and the socket
+shared by UDP gateways are multiplexed with :mod:`selectors`, SPI modules,
+which have no selectable descriptor, are polled for their status at a fixed
+interval. Reactions are routed into per-device queues, responses are
+handed to the :meth:`HubDevice.send` waiting for them, and a single
+:meth:`DeviceHub.poll` or :meth:`DeviceHub.run` loop services all devices.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import selectors
+import time
+
+import serial
+
+from .cdc_codec import CdcCodecError, CdcRequest, CdcReaction, CdcResponse, CdcToken, decode_cdc_message, find_cdc_frame
+from .spi_codec import DataReceivedReaction as SpiReaction, SpiRequest
+from .udp_codec import UdpReaction, UdpRequest, UdpResponse
+from .udp_hub import UdpHub
+
+from ..util.codec import message_type
+from ..util.io import FrameBuffer, IoError, IoTimeoutError, time_left, to_deadline
+from ..util.log import logger
+
+__all__ = [
+    "HubDevice", "CdcDevice", "SpiDevice", "UdpDevice",
+    "DeviceHub"
+]
+
+
+class HubDevice:
+    """Common base of the devices driven by a :class:`DeviceHub`. Reactions
+    are queued, at most ``queue_size`` of them, and the oldest ones are
+    dropped and counted by :attr:`dropped` once the queue is full. A device
+    which fails is removed from the hub and the error is raised by its next
+    :meth:`send` or :meth:`receive`.
+    """
+
+    request_type = object
+    reaction_type = object
+    response_type = object
+
+    def __init__(self, name, queue_size=1024):
+        self.name = name
+        self.hub = None
+        self.error = None
+        self.dropped = 0
+
+        self._reactions = collections.deque(maxlen=queue_size)
+        self._responses = collections.deque()
+
+    def __len__(self):
+        return len(self._reactions)
+
+    def __repr__(self):
+        return "{}({!r})".format(type(self).__name__, self.name)
+
+    def _deliver(self, message):
+        if isinstance(message, self.reaction_type):
+            if len(self._reactions) == self._reactions.maxlen:
+                self.dropped += 1
+
+            self._reactions.append(message)
+        elif isinstance(message, self.response_type):
+            self._responses.append(message)
+        else:
+            logger.debug("Dropping an unexpected message from %r: %r.", self, message)
+
+    def _fail(self, error):
+        logger.warning("Removing failed device %r: %s.", self, error)
+
+        self.error = error
+        self.hub.remove(self)
+
+    def _check(self):
+        if self.error is not None:
+            raise self.error
+
+    def _write(self, message):
+        raise NotImplementedError
+
+    def _match(self, request, response):
+        return True
+
+    def _wait(self, predicate, timeout):
+        deadline = to_deadline(timeout)
+
+        while not predicate():
+            self._check()
+            left = time_left(deadline)
+
+            if left == 0:
+                raise IoTimeoutError
+
+            self.hub.poll(left)
+
+    def send(self, message, timeout=None):
+        """Sends the request and returns its response. All devices of the hub
+        are serviced while waiting.
+
+        :raises IoTimeoutError: If the response doesn't arrive in time.
+        """
+
+        if not issubclass(message_type(message), self.request_type):
+            raise TypeError("Invalid message type!")
+
+        self._check()
+        self._responses.clear()
+        self._write(message)
+
+        def matched():
+            while len(self._responses) > 0:
+                if self._match(message, self._responses[0]):
+                    return True
+
+                logger.debug("Dropping an unsolicited response from %r: %r.", self, self._responses.popleft())
+
+            return False
+
+        self._wait(matched, timeout)
+
+        return self._responses.popleft()
+
+    def receive(self, timeout=None):
+        """Returns the next queued reaction, polling the hub until one
+        arrives.
+
+        :raises IoTimeoutError: If no reaction arrives in time.
+        """
+
+        if len(self._reactions) == 0:
+            self._wait(lambda: len(self._reactions) > 0, timeout)
+
+        return self._reactions.popleft()
+
+    def close(self):
+        pass
+
+
+class CdcDevice(HubDevice):
+    """An IQRF USB CDC dongle read without blocking whenever its port is
+    readable."""
+
+    request_type = CdcRequest
+    reaction_type = CdcReaction
+    response_type = CdcResponse
+
+    def __init__(self, port, name=None, queue_size=1024):
+        super().__init__(port if name is None else name, queue_size=queue_size)
+
+        self._serial = serial.Serial(port=port, baudrate=9600, timeout=0)
+        self._frames = FrameBuffer(CdcToken.TERMINATOR, framer=find_cdc_frame)
+
+    def fileno(self):
+        return self._serial.fileno()
+
+    def _on_readable(self):
+        try:
+            self._frames.fill(self._serial.readinto)
+        except (serial.SerialException, OSError) as error:
+            self._fail(IoError(error))
+            return
+
+        while True:
+            frame = self._frames.next_frame()
+            if frame is None:
+                break
+
+            try:
+                message = decode_cdc_message(frame)
+            except CdcCodecError as error:
+                logger.warning("Dropping undecodable CDC message '%s': %s.", bytes(frame), error)
+                continue
+
+            self._deliver(message)
+
+    def _write(self, message):
+        try:
+            self._serial.write(message.encode())
+        except (serial.SerialException, OSError) as error:
+            self._fail(IoError(error))
+            raise self.error
+
+    def close(self):
+        self._serial.close()
+
+
+class SpiDevice(HubDevice):
+    """An IQRF SPI module driven through a
+    :class:`iqrf.transport.spi_io.BufferedSpiIo`. Its status is checked at
+    the SPI interval of the hub, as SPI offers nothing to select on;
+    :meth:`send` is synchronous."""
+
+    request_type = SpiRequest
+    reaction_type = SpiReaction
+
+    def __init__(self, io, name=None, queue_size=1024):
+        super().__init__("spi" if name is None else name, queue_size=queue_size)
+
+        # Deferred, spi_io requires periphery and Linux.
+        from .spi_io import _is_readable
+
+        self.io = io
+        self._is_readable = _is_readable
+
+    def _on_poll(self):
+        try:
+            status = self.io._check_status()
+
+            if self._is_readable(status):
+                self._deliver(self.io._read_reaction(status))
+        except IoError as error:
+            self._fail(error)
+
+    def send(self, message, timeout=None):
+        self._check()
+        response = self.io.send(message, timeout=timeout)
+
+        # Reactions read while waiting for the communication mode.
+        while len(self.io._reactions) > 0:
+            self._deliver(self.io._reactions.popleft())
+
+        return response
+
+    def close(self):
+        self.io.close()
+
+
+class UdpDevice(HubDevice):
+    """An IQRF UDP gateway registered with the :class:`UdpHub` shared by all
+    UDP devices of a :class:`DeviceHub`. Responses are matched by PACID."""
+
+    request_type = UdpRequest
+    reaction_type = UdpReaction
+    response_type = UdpResponse
+
+    def __init__(self, udp_hub, host, port, name=None, queue_size=1024):
+        super().__init__("{}:{}".format(host, port) if name is None else name, queue_size=queue_size)
+
+        self.gateway = udp_hub.register(host, port, callback=self._on_message)
+        self._pacid = None
+
+    def _on_message(self, gateway, message):
+        # The payload is a view of the shared receive buffer.
+        self._deliver(message.detach())
+
+    def _write(self, message):
+        self._pacid = self.gateway.send(message)
+
+    def _match(self, request, response):
+        return response.pacid == self._pacid
+
+    def close(self):
+        try:
+            self.gateway.hub.unregister(self.gateway)
+        except ValueError:
+            # Already unregistered when the device was removed from the hub.
+            pass
+
+
+class DeviceHub:
+    """Multiplexes any number of CDC, SPI and UDP devices in one thread.
+
+    :param udp_port: The local port of the socket shared by UDP devices,
+        bound when the first one is added.
+    :param spi_interval: The number of seconds between the status checks of
+        SPI devices, which bounds the latency of their reactions. The default
+        matches the longest pause of
+        :class:`iqrf.util.io.PollingScheduler`.
+    """
+
+    # The period at which :meth:`run` checks for :meth:`stop`.
+    RUN_INTERVAL = 0.1
+
+    def __init__(self, udp_port=0, spi_interval=0.05):
+        self.spi_interval = spi_interval
+
+        self._selector = selectors.DefaultSelector()
+        self._devices = collections.OrderedDict()
+        self._polled = []
+        self._polled_at = None
+        self._udp_port = udp_port
+        self._udp_hub = None
+        self._running = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def __len__(self):
+        return len(self._devices)
+
+    def __iter__(self):
+        return iter(list(self._devices.values()))
+
+    def __getitem__(self, name):
+        return self._devices[name]
+
+    @property
+    def udp_hub(self):
+        if self._udp_hub is None:
+            self._udp_hub = UdpHub(self._udp_port)
+            self._selector.register(self._udp_hub, selectors.EVENT_READ, lambda: self._udp_hub.poll(0))
+
+        return self._udp_hub
+
+    def _add(self, device):
+        if device.name in self._devices:
+            device.close()
+            raise ValueError("Duplicate device name!")
+
+        device.hub = self
+        self._devices[device.name] = device
+
+        if isinstance(device, CdcDevice):
+            self._selector.register(device, selectors.EVENT_READ, device._on_readable)
+        elif isinstance(device, SpiDevice):
+            self._polled.append(device)
+
+        return device
+
+    def add_cdc(self, port, name=None, queue_size=1024):
+        return self._add(CdcDevice(port, name=name, queue_size=queue_size))
+
+    def add_spi(self, io, name=None, queue_size=1024):
+        """Adds an SPI module driven by the given
+        :class:`iqrf.transport.spi_io.BufferedSpiIo`."""
+
+        return self._add(SpiDevice(io, name=name, queue_size=queue_size))
+
+    def add_udp(self, host, port, name=None, queue_size=1024):
+        return self._add(UdpDevice(self.udp_hub, host, port, name=name, queue_size=queue_size))
+
+    def remove(self, device):
+        """Removes the device from the hub without closing it."""
+
+        if self._devices.get(device.name) is not device:
+            return
+
+        del self._devices[device.name]
+
+        if isinstance(device, CdcDevice):
+            self._selector.unregister(device)
+        elif isinstance(device, SpiDevice):
+            self._polled.remove(device)
+        elif isinstance(device, UdpDevice):
+            self.udp_hub.unregister(device.gateway)
+
+    def poll(self, timeout=None):
+        """Waits up to ``timeout`` for any device to become readable and
+        services the ready devices. SPI devices are checked once
+        :attr:`spi_interval` has elapsed since their last check, which caps
+        the wait by the time left until then.
+
+        :return: The number of serviced devices.
+        """
+
+        if len(self._polled) > 0:
+            due = 0.0 if self._polled_at is None else max(self._polled_at + self.spi_interval - time.monotonic(), 0.0)
+            timeout = due if timeout is None else min(timeout, due)
+
+        serviced = 0
+
+        if len(self._selector.get_map()) > 0:
+            for key, _ in self._selector.select(timeout):
+                key.data()
+                serviced += 1
+        elif timeout is None or timeout > 0:
+            # Nothing to select on, which not every selector can sleep on.
+            time.sleep(self.RUN_INTERVAL if timeout is None else timeout)
+
+        if len(self._polled) > 0:
+            now = time.monotonic()
+
+            if self._polled_at is None or now - self._polled_at >= self.spi_interval:
+                self._polled_at = now
+
+                for device in list(self._polled):
+                    device._on_poll()
+                    serviced += 1
+
+        return serviced
+
+    def run(self, handler=None):
+        """Polls the devices until :meth:`stop` is called.
+
+        :param handler: A callable invoked as ``handler(device, reaction)``
+            for every reaction instead of leaving it in the device queue.
+        """
+
+        self._running = True
+
+        while self._running:
+            self.poll(self.RUN_INTERVAL)
+
+            if handler is not None:
+                for device in self:
+                    while len(device._reactions) > 0:
+                        handler(device, device._reactions.popleft())
+
+    def stop(self):
+        self._running = False
+
+    def close(self):
+        self.stop()
+
+        for device in self:
+            self.remove(device)
+            device.close()
+
+        if self._udp_hub is not None:
+            self._udp_hub.close()
+
+        self._selector.close()
@@ -1,15 +1,13 @@
-import sys
-
-if sys.platform != "linux":
-    raise NotImplementedError("Unfortunately, this module has not been implemented on your platform yet.")
-
+from . import spi_aio
 from . import spi_codec
 from . import spi_io
 
+from .spi_aio import *
 from .spi_codec import *
 from .spi_io import *
 
 __all__ = (
+    spi_aio.__all__ +
     spi_codec.__all__ +
     spi_io.__all__
 )
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF SPI Asynchronous IO
+========================
+
+An :mod:`asyncio` adapter for IQRF SPI devices. The SPI bus offers no
+descriptor to wait on, so the blocking :class:`BufferedSpiIo` runs in a
+dedicated single-threaded executor which also serializes the bus access.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import asyncio
+import concurrent.futures
+
+from .spi_io import BufferedSpiIo
+from ..util.io import IoTimeoutError, time_left, to_deadline
+
+__all__ = [
+    "AsyncSpiIo",
+    "open_async"
+]
+
+
+class AsyncSpiIo:
+
+    # Blocking receives are sliced so that sends are not starved while waiting
+    # for a reaction.
+    POLL_INTERVAL = 0.25
+
+    def __init__(self, io, loop=None):
+        self._loop = loop if loop is not None else asyncio.get_event_loop()
+        self._io = io
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        await self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.receive()
+
+    async def send(self, message, timeout=None):
+        return await self._loop.run_in_executor(self._executor, self._io.send, message, timeout)
+
+    async def receive(self, timeout=None):
+        deadline = to_deadline(timeout)
+
+        while True:
+            remaining = time_left(deadline)
+            interval = self.POLL_INTERVAL if remaining is None else min(remaining, self.POLL_INTERVAL)
+
+            try:
+                return await self._loop.run_in_executor(self._executor, self._io.receive, interval)
+            except IoTimeoutError:
+                if deadline is not None and time_left(deadline) == 0:
+                    raise
+
+    async def close(self):
+        await self._loop.run_in_executor(self._executor, self._io.close)
+        self._executor.shutdown(wait=False)
+
+
+async def open_async(port, loop=None):
+    loop = loop if loop is not None else asyncio.get_event_loop()
+    io = await loop.run_in_executor(None, BufferedSpiIo, port)
+
+    return AsyncSpiIo(io, loop=loop)
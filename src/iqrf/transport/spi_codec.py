@@ -13,8 +13,8 @@ This is a concrete implementation of IQRF SPI serialization.
 
 import enum
 
-from ..util.codec import CodecError, Request, Reaction, Response
-from ..util.common import CommonEqualityMixin
+from ..util.codec import CodecError, PreparedRequest, Request, Reaction, Response
+from ..util.common import FlyweightMixin, ValueMixin
 
 __all__ = [
     "SpiCodecError", "SpiEncodeError", "SpiDecodeError",
@@ -22,6 +22,7 @@ __all__ = [
     "SpiStatus",
 
     "SpiRequest", "SpiResponse", "SpiReaction",
+    "PreparedSpiRequest",
 
     "TrInfoRequest", "TrInfoResponse",
     "DataSendRequest", "DataSendResponse",
@@ -55,22 +56,22 @@ class SpiStatus(enum.Enum):
     INACTIVE = 2
 
 
-class SpiRequest(Request, CommonEqualityMixin):
+class SpiRequest(Request, ValueMixin):
     """Abstract base for all SPI request messages."""
 
-    pass
+    __slots__ = ()
 
 
-class SpiResponse(Response, CommonEqualityMixin):
+class SpiResponse(Response, ValueMixin):
     """Abstract base for all SPI response messages."""
 
-    pass
+    __slots__ = ()
 
 
-class SpiReaction(Reaction, CommonEqualityMixin):
+class SpiReaction(Reaction, ValueMixin):
     """Abstract base for all SPI reaction messages."""
 
-    pass
+    __slots__ = ()
 
 
 class SpiToken:
@@ -92,12 +93,31 @@ class SpiToken:
     DATA_READY_MAX = 0x7f
 
 
+def xor_fold(data):
+    """Returns the XOR of all bytes in the bytes-like object. The bytes are
+    read as a single integer which is repeatedly folded in halves, so the
+    number of operations grows logarithmically with the length."""
+
+    value = int.from_bytes(data, "little")
+    bits = len(data) * 8
+    shift = 8
+
+    # The first fold splits the smallest power of two bytes holding the data.
+    while shift < bits:
+        shift <<= 1
+
+    while shift > 8:
+        shift >>= 1
+        value = (value ^ value >> shift) & ((1 << shift) - 1)
+
+    return value
+
+
 def calculate_crc(data, offset, length):
-    crc = 0x5f
-    for i in range(offset, length):
-        crc ^= data[i]
+    if isinstance(data, list):
+        data = bytes(data)
 
-    return crc
+    return 0x5f ^ xor_fold(memoryview(data)[offset:length])
 
 
 def encode_command_type(direction, length):
@@ -111,6 +131,38 @@ def decode_command_type(byte):
 def generate_clock_data(length):
     return [0x00 for i in range(length)]
 
+
+def _build_frame(command, direction, data):
+    length = len(data)
+    frame = bytearray(length + 4)
+    frame[0] = command
+    frame[1] = encode_command_type(direction, length)
+    frame[2:length + 2] = data
+    frame[length + 2] = calculate_crc(frame, 0, length + 2)
+    frame[length + 3] = SpiToken.COMMAND_CHECK
+
+    return bytes(frame)
+
+
+def _check_frame(data, direction):
+    view = memoryview(data)
+    length = len(view)
+
+    if length < 4 or view[-1] != SpiToken.STATUS_CRC_OK:
+        raise SpiDecodeError
+
+    if calculate_crc(view, 2, length - 2) ^ encode_command_type(direction, length - 4) != view[-2]:
+        raise SpiDecodeError
+
+    return view
+
+
+MAX_DATA_LENGTH = 64
+
+# Frames that never change are encoded only once.
+_TR_INFO_FRAME = _build_frame(SpiToken.COMMAND_TR_INFO, 0, bytes(16))
+_RECEIVE_FRAMES = [None] + [_build_frame(SpiToken.COMMAND_READ_WRITE, 0, bytes(length)) for length in range(1, MAX_DATA_LENGTH + 1)]
+
 # class StatusRequest(SpiRequest):
 #
 #     def encode(self):
@@ -156,108 +208,115 @@ def generate_clock_data(length):
 #         raise SpiDecodeError
 
 
-class TrInfoRequest(SpiRequest):
+class PreparedSpiRequest(PreparedRequest):
+    """A prepared SPI request whose CRC is recalculated when its payload is
+    substituted."""
 
-    def encode(self):
-        data = []
-        data.append(SpiToken.COMMAND_TR_INFO)
-        data.append(encode_command_type(0, 16))
-        data.extend(generate_clock_data(16))
-        data.append(calculate_crc(data, 0, len(data)))
-        data.append(SpiToken.COMMAND_CHECK)
+    __slots__ = ()
+
+    def _seal(self, frame):
+        end = self.offset + self.length
+        frame[end] = calculate_crc(frame, 0, end)
+
+
+class TrInfoRequest(FlyweightMixin, SpiRequest):
 
-        return bytes(data)
+    __slots__ = ()
+
+    def encode(self):
+        return _TR_INFO_FRAME
 
 
 class TrInfoResponse(SpiResponse):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
 
     @classmethod
     def decode(cls, data):
-        data = list(data)
-
         if len(data) != 20:
             raise SpiDecodeError
 
-        if data[-1] != SpiToken.STATUS_CRC_OK:
-            raise SpiDecodeError
-
-        if calculate_crc(data, 2, 18) ^ encode_command_type(0, 16) != data[18]:
-            raise SpiDecodeError
-
-        data = data[2:-2]
+        view = _check_frame(data, 0)
 
-        return cls(data)
+        return cls(bytes(view[2:-2]))
 
 
 class DataSendRequest(SpiRequest):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
 
     def encode(self):
-        data = []
-        data.append(SpiToken.COMMAND_READ_WRITE)
-        data.append(encode_command_type(1, len(self.data)))
-        data.extend(self.data)
-        data.append(calculate_crc(data, 0, len(data)))
-        data.append(SpiToken.COMMAND_CHECK)
+        length = len(self.data)
 
-        return bytes(data)
+        if length == 0 or length > MAX_DATA_LENGTH:
+            raise SpiEncodeError("Invalid data length!")
 
+        frame = bytearray(length + 4)
+        frame[0] = SpiToken.COMMAND_READ_WRITE
+        frame[1] = encode_command_type(1, length)
+        frame[2:length + 2] = self.data
+        frame[length + 2] = calculate_crc(frame, 0, length + 2)
+        frame[length + 3] = SpiToken.COMMAND_CHECK
 
-class DataSendResponse(SpiResponse):
+        return bytes(frame)
 
-    @classmethod
-    def decode(cls, data):
-        data = list(data)
+    def prepare(self):
+        return PreparedSpiRequest(type(self), self.encode(), 2, len(self.data))
 
-        if data[-1] != SpiToken.STATUS_CRC_OK:
-            raise SpiDecodeError
 
-        if calculate_crc(data, 2, len(data) - 2) ^ encode_command_type(1, len(data) - 4) != data[-2]:
-            raise SpiDecodeError
+class DataSendResponse(FlyweightMixin, SpiResponse):
+
+    __slots__ = ()
+
+    @classmethod
+    def decode(cls, data):
+        _check_frame(data, 1)
 
         return cls()
 
 
 class _DataReceiveRequest(SpiRequest):
 
+    __slots__ = ("length",)
+    _fields = __slots__
+
     def __init__(self, length):
-        self.length = length
+        object.__setattr__(self, "length", length)
 
     def encode(self):
-        data = []
-        data.append(SpiToken.COMMAND_READ_WRITE)
-        data.append(encode_command_type(0, self.length))
-        data.extend(generate_clock_data(self.length))
-        data.append(calculate_crc(data, 0, len(data)))
-        data.append(SpiToken.COMMAND_CHECK)
+        if self.length < 1 or self.length > MAX_DATA_LENGTH:
+            raise SpiEncodeError("Invalid data length!")
 
-        return bytes(data)
+        return _RECEIVE_FRAMES[self.length]
 
 
 class _DataReceiveResponse(SpiRequest):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
 
     @classmethod
     def decode(cls, data):
-        data = list(data)
-
-        if data[-1] != SpiToken.STATUS_CRC_OK:
-            raise SpiDecodeError
+        view = _check_frame(data, 0)
 
-        if calculate_crc(data, 2, len(data) - 2) ^ encode_command_type(0, len(data) - 4) != data[-2]:
-            raise SpiDecodeError
-
-        return cls(bytes(data[2:-2]))
+        return cls(bytes(view[2:-2]))
 
 
 class DataReceivedReaction(SpiReaction):
 
+    __slots__ = ("data",)
+    _fields = __slots__
+
     def __init__(self, data):
-        self.data = data
+        object.__setattr__(self, "data", bytes(data))
@@ -11,10 +11,11 @@ An implementation of communication channel with IQRF SPI devices.
 
 """
 
-import array
 import collections
 import ctypes
 import fcntl
+import sys
+import time
 
 from periphery import gpio, spi
 
@@ -28,163 +29,386 @@ from .spi_codec import (
     DataReceivedReaction
 )
 
-from ..util.io import IoError, to_iotime, wait
+from ..util.capture import CaptureEndError, CaptureReplay
+from ..util.codec import message_type
+from ..util.io import IoError, PollingScheduler, time_left, to_deadline
 
 __all__ = [
     "SpiError",
-    "RawSpiIo", "BufferedSpiIo",
+    "SpiTransferEngine", "SpiReplayEngine", "spi_ioc_message",
+    "RawSpiIo", "BufferedSpiIo", "ReplaySpiIo",
     "open"
 ]
 
-spi.SPI._SPI_IOC_MESSAGE_2 = 0x40406b00
+_SPI_IOC_MAGIC = 0x6b
+_SPI_IOC_SIZEBITS = 14
+
+
+def spi_ioc_message(count):
+    """Returns the ``SPI_IOC_MESSAGE(count)`` ioctl request number."""
+
+    size = count * ctypes.sizeof(spi._CSpiIocTransfer)
+
+    if size >= 1 << _SPI_IOC_SIZEBITS:
+        raise ValueError("Too many transfers in a single SPI message.")
+
+    return 0x40000000 | size << 16 | _SPI_IOC_MAGIC << 8
 
 
 class SpiError(IoError):
     pass
 
 
-class RawSpiIo:
+class SpiTransferEngine:
+    """Submits a whole IQRF SPI packet in a single ``SPI_IOC_MESSAGE(N)``
+    ioctl. The packet is sent byte by byte as the TR module requires a pause
+    after every byte, which is expressed by the ``delay_usecs`` of the
+    individual transfers instead of separate system calls. Within one message
+    a set ``cs_change`` deselects the chip after the transfer, so it is left
+    clear to keep CS asserted for the whole packet. The transfer descriptors
+    and the data buffer are allocated once per packet length and reused.
+
+    :param fd: The file descriptor of the spidev device.
+    :param speed_hz: The clock speed of the transfers.
+    :param ioctl: The ioctl implementation, replaceable for testing.
+    """
+
+    INITIAL_DELAY = 5
+    BYTE_DELAY = 150
+    FINAL_DELAY = 5
+
+    def __init__(self, fd, speed_hz=250000, ioctl=fcntl.ioctl):
+        self._fd = fd
+        self._speed_hz = speed_hz
+        self._ioctl = ioctl
+        self._messages = {}
+
+    def _describe(self, transfer, address, length, delay, cs_change):
+        transfer.tx_buf = address
+        transfer.rx_buf = address
+        transfer.len = length
+        transfer.delay_usecs = delay
+        transfer.speed_hz = self._speed_hz
+        transfer.bits_per_word = 8
+        transfer.cs_change = cs_change
+        transfer.tx_nbits = 0
+        transfer.rx_nbits = 0
+
+    def _message(self, length):
+        message = self._messages.get(length)
+
+        if message is None:
+            buffer = (ctypes.c_ubyte * length)()
+            transfers = (spi._CSpiIocTransfer * (length + 1))()
+            address = ctypes.addressof(buffer)
+
+            self._describe(transfers[0], 0, 0, self.INITIAL_DELAY, 0)
+
+            for i in range(length):
+                last = i == length - 1
+                delay = self.FINAL_DELAY if last and length > 1 else self.BYTE_DELAY
+                self._describe(transfers[i + 1], address + i, 1, delay, 0)
+
+            message = (buffer, transfers, spi_ioc_message(length + 1), ctypes.addressof(transfers))
+            self._messages[length] = message
+
+        return message
 
-    def __init__(self, port):
-        try:
-            self._ce0_pin = gpio.GPIO(8, "low")
-            self._pwr_pin = gpio.GPIO(23, "high")
-            self._spi = spi.SPI(port, 0, 250000, bit_order="msb", bits_per_word=8, extra_flags=0)
-        except IOError as error:
-            raise SpiError(error)
+    def transfer(self, data):
+        """Transfers the data and returns the bytes received meanwhile.
 
-    def __enter__(self):
-        return self
+        :param data: A bytes-like object or a list of integers.
+        :rtype: bytes
+        """
 
-    def __exit__(self, *args, **kwargs):
-        self.close()
+        length = len(data)
 
-    def transfer(self, data):
-        if not isinstance(data, bytes) and not isinstance(data, bytearray) and not isinstance(data, list):
-            raise TypeError("Invalid data type, should be bytes, bytearray, or list.")
+        if length == 0:
+            raise ValueError("Nothing to transfer.")
+
+        buffer, transfers, request, address = self._message(length)
 
         try:
-            buf = array.array('B', data)
-        except OverflowError:
+            ctypes.memmove(buffer, bytes(data), length)
+        except (TypeError, ValueError):
             raise ValueError("Invalid data bytes.")
 
-        buf_addr, buf_len = buf.buffer_info()
-
-        xfer_init = spi._CSpiIocTransfer()
-        xfer_init.tx_buf = 0
-        xfer_init.rx_buf = 0
-        xfer_init.len = 0
-        xfer_init.delay_usecs = 5
-        xfer_init.speed_hz = 250000
-        xfer_init.bits_per_word = 8
-        xfer_init.cs_change = 0
-        xfer_init.tx_nbits = 0
-        xfer_init.rx_nbits = 0
-
-        xfer_data = spi._CSpiIocTransfer()
-        xfer_data.tx_buf = buf_addr
-        xfer_data.rx_buf = buf_addr
-        xfer_data.len = 1
-        xfer_data.delay_usecs = 150
-        xfer_data.speed_hz = 250000
-        xfer_data.bits_per_word = 8
-        xfer_data.cs_change = 0
-        xfer_data.tx_nbits = 0
-        xfer_data.rx_nbits = 0
-
-        if buf_len > 1:
-            xfer_data.cs_change = 1
-
         try:
-            spi_xfer = (spi._CSpiIocTransfer * 2)()
-            spi_xfer[0] = xfer_init
-            spi_xfer[1] = xfer_data
-
-            fcntl.ioctl(self._spi._fd, spi.SPI._SPI_IOC_MESSAGE_2, ctypes.addressof(spi_xfer))
+            self._ioctl(self._fd, request, address)
         except OSError as error:
-            raise SpiError(error.errno, "SPI initial transfer: " + error.strerror)
+            raise SpiError(error.errno, "SPI transfer: " + error.strerror)
+
+        return bytes(buffer)
+
+
+class SpiReplayEngine:
+    """Answers SPI transfers from a capture instead of a TR module. Status
+    checks are answered by the captured status checks which are due on the
+    replay clock, so a caller polling at a different rate than the captured
+    one still sees the statuses change at their captured times. Any other
+    transfer is answered by the next captured transfer that isn't a status
+    check, after which the replay clock is resynchronised to it.
+
+    :param replay: The :class:`iqrf.util.capture.CaptureReplay` to answer
+        from.
+    """
 
-        for i in range(1, buf_len):
-            xfer_data.tx_buf = buf_addr + i
-            xfer_data.rx_buf = buf_addr + i
+    def __init__(self, replay):
+        self._replay = replay
+        self._status = SpiToken.STATUS_INACTIVE
 
-            if i == buf_len - 1:
-                xfer_data.delay_usecs = 5
-                xfer_data.cs_change = 0
+    def _pop_exchange(self):
+        sent, received = self._replay.peek(), self._replay.peek(1)
+
+        if sent is None or received is None:
+            raise CaptureEndError("End of capture.")
+
+        self._replay.pop()
+        self._replay.pop()
+
+        return sent, received
+
+    def transfer(self, data):
+        if self._replay.peek() is None:
+            raise CaptureEndError("End of capture.")
+
+        if len(data) == 1:
+            while True:
+                sent = self._replay.peek()
+
+                if sent is None or len(sent.data) != 1 or not self._replay.is_due(sent):
+                    return bytes([self._status])
+
+                self._status = self._pop_exchange()[1].data[0]
+
+        while True:
+            sent, received = self._pop_exchange()
+
+            if len(sent.data) != 1:
+                break
+
+            self._status = received.data[0]
+
+        self._replay.sync(sent)
+
+        if len(received.data) != len(data):
+            raise SpiError("The replayed SPI transfer doesn't match the capture.")
+
+        return bytes(received.data)
+
+
+class RawSpiIo:
+
+    # The :class:`iqrf.util.capture.CaptureWriter` recording the traffic of
+    # the channel, None while capturing is disabled.
+    capture = None
+
+    def __init__(self, port, engine=None):
+        self._spi = None
+        self._pwr_pin = None
+        self._ce0_pin = None
+
+        if engine is None:
+            if sys.platform != "linux":
+                raise NotImplementedError("Unfortunately, the SPI transport has not been implemented on your platform yet.")
 
             try:
-                fcntl.ioctl(self._spi._fd, spi.SPI._SPI_IOC_MESSAGE_1, xfer_data)
-            except OSError as error:
-                raise SpiError(error.errno, "SPI transfer: " + error.strerror)
+                self._ce0_pin = gpio.GPIO(8, "low")
+                self._pwr_pin = gpio.GPIO(23, "high")
+                self._spi = spi.SPI(port, 0, 250000, bit_order="msb", bits_per_word=8, extra_flags=0)
+            except IOError as error:
+                self._close_devices()
+                raise SpiError(error)
+
+            engine = SpiTransferEngine(self._spi._fd, speed_hz=250000)
+
+        self._engine = engine
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def transfer(self, data):
+        if not isinstance(data, bytes) and not isinstance(data, bytearray) and not isinstance(data, list):
+            raise TypeError("Invalid data type, should be bytes, bytearray, or list.")
+
+        transfer = self._engine.transfer(data)
+
+        if self.capture is not None:
+            self.capture.exchange(data if isinstance(data, bytes) else bytes(data), transfer)
 
         if isinstance(data, bytes):
-            return bytes(bytearray(buf))
+            return transfer
         elif isinstance(data, bytearray):
-            return bytearray(buf)
+            return bytearray(transfer)
         elif isinstance(data, list):
-            return buf.tolist()
+            return list(transfer)
+
+    def _close_devices(self):
+        for device in (self._spi, self._pwr_pin, self._ce0_pin):
+            if device is not None:
+                device.close()
 
     def close(self):
         try:
-            self._spi.close()
-            self._pwr_pin.close()
-            self._ce0_pin.close()
+            self._close_devices()
         except IOError as error:
             raise SpiError(error)
 
 
+def _is_readable(status):
+    return SpiToken.DATA_READY_MIN <= status <= SpiToken.DATA_READY_MAX
+
+
+def _readable_length(status):
+    return 64 if status == SpiToken.DATA_READY_MIN else status - SpiToken.DATA_READY_MIN
+
+
 class BufferedSpiIo(RawSpiIo):
+    """Buffered IQRF SPI channel. The SPI status is polled through a
+    :class:`PollingScheduler`, which spins briefly and then backs off
+    exponentially. When the TR module signals pending data on a GPIO pin, pass
+    its number as ``interrupt_pin``, or an opened GPIO input as ``interrupt``,
+    and the polling sleeps until the edge instead of a fixed interval.
+    """
 
-    def __init__(self, port):
-        super().__init__(port)
+    # The :class:`iqrf.util.metrics.TransportMetrics` of the channel, None
+    # while metrics are disabled.
+    metrics = None
+
+    def __init__(self, port, engine=None, scheduler=None, interrupt_pin=None, interrupt_edge="rising", interrupt=None):
+        super().__init__(port, engine=engine)
 
         self._reactions = collections.deque()
+        self._scheduler = scheduler if scheduler is not None else PollingScheduler()
+        self._interrupt = interrupt
+
+        if interrupt_pin is not None:
+            try:
+                self._interrupt = gpio.GPIO(interrupt_pin, "in")
+                self._interrupt.edge = interrupt_edge
+            except IOError as error:
+                super().close()
+                raise SpiError(error)
+
+        if self._interrupt is not None:
+            # The scheduler of the caller is left intact as it may be shared.
+            base = self._scheduler
+            self._scheduler = PollingScheduler(base.spin, base.initial_interval, base.maximum_interval, base.factor, self._wait_interrupt)
+
+    def _wait_interrupt(self, timeout):
+        # An edge stays signalled until the pin is read, which would turn
+        # every further wait into a busy loop.
+        if self._interrupt.poll(timeout):
+            self._interrupt.read()
+
+    def _check_status(self):
+        if self.metrics is not None:
+            self.metrics.status_polls += 1
+
+        return self.transfer(bytes([SpiToken.COMMAND_CHECK]))[0]
+
+    def _decode_counted(self, type, transfer):
+        metrics = self.metrics
+        metrics.frames_in += 1
+        metrics.bytes_in += len(transfer)
+
+        try:
+            return type.decode(transfer)
+        except SpiCodecError:
+            metrics.decode_errors += 1
+            raise
+
+    def _read_reaction(self, status):
+        transfer = self.transfer(_DataReceiveRequest(_readable_length(status)).encode())
+
+        if self.metrics is not None:
+            response = self._decode_counted(_DataReceiveResponse, transfer)
+        else:
+            response = _DataReceiveResponse.decode(transfer)
+
+        return DataReceivedReaction(response.data)
 
     def _wait_until_readable(self, timeout=None):
-        _, result = wait(lambda: self.transfer([SpiToken.COMMAND_CHECK]), lambda x: x[0] in range(SpiToken.DATA_READY_MIN, SpiToken.DATA_READY_MAX), timeout=timeout)
-        readable = result[0]
-        return 64 if readable == SpiToken.DATA_READY_MIN else readable - SpiToken.DATA_READY_MIN
+        _, status = self._scheduler.wait(self._check_status, _is_readable, timeout=timeout)
+        return status
 
     def send(self, message, timeout=None):
-        if not isinstance(message, SpiRequest):
+        request = message_type(message)
+
+        if not issubclass(request, SpiRequest):
             raise TypeError("Invalid message type!")
 
-        while True:
-            timeout = to_iotime(timeout)
-            delta, result = wait(lambda: self.transfer([SpiToken.COMMAND_CHECK]), lambda x: x[0] == SpiToken.STATUS_COMMUNICATION_MODE or x[0] in range(SpiToken.DATA_READY_MIN, SpiToken.DATA_READY_MAX), timeout=timeout)
+        deadline = to_deadline(timeout)
 
-            timeout -= delta
-            result = result[0]
+        while True:
+            _, status = self._scheduler.wait(self._check_status, lambda x: x == SpiToken.STATUS_COMMUNICATION_MODE or _is_readable(x), timeout=time_left(deadline))
 
-            if result == SpiToken.STATUS_COMMUNICATION_MODE:
+            if status == SpiToken.STATUS_COMMUNICATION_MODE:
                 break
-            else:
-                readable = 64 if result == SpiToken.DATA_READY_MIN else result - SpiToken.DATA_READY_MIN
-
-                transfer = self.transfer(_DataReceiveRequest(readable).encode())
-                response = _DataReceiveResponse.decode(transfer)
 
-                self._reactions.append(DataReceivedReaction(response.data))
+            self._reactions.append(self._read_reaction(status))
 
-        transfer = self.transfer(message.encode())
+            if self.metrics is not None:
+                self.metrics.reactions_queued += 1
 
-        if isinstance(message, TrInfoRequest):
-            return TrInfoResponse.decode(transfer)
-        elif isinstance(message, DataSendRequest):
-            return DataSendResponse.decode(transfer)
+        if issubclass(request, TrInfoRequest):
+            type = TrInfoResponse
+        elif issubclass(request, DataSendRequest):
+            type = DataSendResponse
         else:
             raise SpiCodecError
 
+        encoded = message.encode()
+        start = time.monotonic()
+        transfer = self.transfer(encoded)
+        metrics = self.metrics
+
+        if metrics is not None:
+            metrics.frames_out += 1
+            metrics.bytes_out += len(encoded)
+            response = self._decode_counted(type, transfer)
+            metrics.send_latency.record(time.monotonic() - start)
+        else:
+            response = type.decode(transfer)
+
+        return response
+
     def receive(self, timeout=None):
         if len(self._reactions) > 0:
             return self._reactions.popleft()
 
-        readable = self._wait_until_readable(timeout)
+        return self._read_reaction(self._wait_until_readable(timeout))
 
-        transfer = self.transfer(_DataReceiveRequest(readable).encode())
-        response = _DataReceiveResponse.decode(transfer)
-        return DataReceivedReaction(response.data)
+    def close(self):
+        try:
+            if self._interrupt is not None:
+                self._interrupt.close()
+        finally:
+            super().close()
+
+
+class ReplaySpiIo(BufferedSpiIo):
+    """A buffered SPI channel answered by a :class:`SpiReplayEngine`.
+
+    :param capture: The path of a capture file or an iterable of
+        :class:`iqrf.util.capture.CaptureRecord`.
+    :param speed: The replay speed relative to the capture or None to replay
+        as fast as possible.
+    """
+
+    def __init__(self, capture, speed=1.0, scheduler=None):
+        self._replay = CaptureReplay(capture, speed)
+        super().__init__(None, engine=SpiReplayEngine(self._replay), scheduler=scheduler)
+
+    def close(self):
+        try:
+            self._replay.close()
+        finally:
+            super().close()
 
 
-def open(port):
-    return BufferedSpiIo(port)
+def open(port, **kwargs):
+    return BufferedSpiIo(port, **kwargs)
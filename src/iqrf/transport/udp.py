@@ -1,7 +1,19 @@
+from . import udp_aio
+from . import udp_codec
+from . import udp_hub
 from . import udp_io
+from . import udp_reliable
 
+from .udp_aio import *
+from .udp_codec import *
+from .udp_hub import *
 from .udp_io import *
+from .udp_reliable import *
 
 __all__ = (
-    udp_io.__all__
+    udp_aio.__all__ +
+    udp_codec.__all__ +
+    udp_hub.__all__ +
+    udp_io.__all__ +
+    udp_reliable.__all__
 )
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF UDP Asynchronous IO
+========================
+
+An :mod:`asyncio` implementation of communication channel with IQRF UDP
+devices built on top of a datagram protocol.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import asyncio
+
+from ..util.io import IoError, IoTimeoutError
+
+__all__ = [
+    "AsyncUdpIo",
+    "open_async"
+]
+
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+
+    def __init__(self, datagrams):
+        self._datagrams = datagrams
+
+    def datagram_received(self, data, address):
+        self._datagrams.put_nowait(data)
+
+    def error_received(self, error):
+        self._datagrams.put_nowait(IoError(error))
+
+
+class AsyncUdpIo:
+
+    def __init__(self, transport, datagrams, remote_address):
+        self.remote_address = remote_address
+        self._transport = transport
+        self._datagrams = datagrams
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args, **kwargs):
+        self.close()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.receive()
+
+    async def send(self, message):
+        self._transport.sendto(message, self.remote_address)
+
+    async def receive(self, timeout=None):
+        try:
+            data = await asyncio.wait_for(self._datagrams.get(), timeout)
+        except asyncio.TimeoutError:
+            raise IoTimeoutError
+
+        if isinstance(data, IoError):
+            raise data
+
+        return data
+
+    def close(self):
+        self._transport.close()
+
+
+async def open_async(host, port, loop=None):
+    loop = loop if loop is not None else asyncio.get_event_loop()
+    datagrams = asyncio.Queue()
+
+    transport, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(datagrams), local_addr=("0.0.0.0", port))
+
+    return AsyncUdpIo(transport, datagrams, (host, port))
@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF UDP Codec
+==============
+
+This is a concrete implementation of the IQRF UDP gateway protocol
+serialization. Every datagram consists of a 9 byte header (GW_ADDR, CMD,
+SUBCMD, two reserved bytes, PACID and DLEN, both big endian), DLEN bytes of
+data and a big endian CRC16-CCITT trailer.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import binascii
+import struct
+
+from ..util.codec import CodecError, MessageRegistry, PreparedRequest, Request, Reaction, Response
+from ..util.common import ValueMixin
+
+__all__ = [
+    "UdpCodecError", "UdpEncodeError", "UdpDecodeError",
+
+    "UdpToken",
+
+    "UdpMessage", "UdpRequest", "UdpResponse", "UdpReaction",
+    "PreparedUdpRequest",
+
+    "IdentificationRequest", "IdentificationResponse",
+    "StatusRequest", "StatusResponse",
+    "DataSendRequest", "DataSendResponse",
+    "DataReceivedReaction",
+
+    "register_udp_message", "get_udp_message_type",
+    "calculate_crc16",
+    "encode_udp_request",
+    "decode_udp_message"
+]
+
+
+class UdpCodecError(CodecError):
+    """An error indicating general UDP codec exception."""
+
+    pass
+
+
+class UdpEncodeError(UdpCodecError):
+    """An error thrown when exception raises during UDP message encoding."""
+
+    pass
+
+
+class UdpDecodeError(UdpCodecError):
+    """An error thrown when exception raises during UDP message decoding."""
+
+    pass
+
+
+class UdpToken:
+
+    GW_ADDR = 0x22
+
+    CMD_IDENTIFICATION = 0x01
+    CMD_STATUS = 0x02
+    CMD_DATA_SEND = 0x03
+    CMD_DATA_RECEIVED = 0x04
+    CMD_RESPONSE = 0x80
+
+    SUBCMD_NONE = 0x00
+    SUBCMD_OK = 0x50
+    SUBCMD_ERROR_FULL = 0x60
+    SUBCMD_ERROR_CRC = 0x61
+
+    HEADER_SIZE = 9
+    CRC_SIZE = 2
+
+
+_HEADER = struct.Struct(">BBBBBHH")
+_PACID = struct.Struct(">H")
+_CRC = struct.Struct(">H")
+
+# The offset of the PACID in the header.
+_PACID_OFFSET = 5
+
+
+def calculate_crc16(data):
+    """Calculates the CRC16-CCITT (polynomial 0x1021, initial value 0) of the
+    bytes-like object. :func:`binascii.crc_hqx` implements exactly this CRC
+    with a precomputed lookup table in C."""
+
+    return binascii.crc_hqx(data, 0)
+
+
+class UdpMessage(ValueMixin):
+    """Common base of all UDP gateway messages. Messages are immutable values
+    and the PACID takes part in their equality, as two datagrams differing in
+    it belong to different exchanges.
+
+    A decoded message carries a :class:`memoryview` of the datagram, which is
+    only valid until the receive buffer is reused and can't be hashed unless
+    the buffer is read-only; :meth:`detach` returns a copy owning its payload.
+
+    :param subcmd: The subcommand byte of the message.
+    :param pacid: The packet identifier or None to let the transport assign
+        one.
+    :param data: The payload carried by the message.
+    """
+
+    __slots__ = ("subcmd", "pacid", "data")
+    _fields = __slots__
+
+    def __init__(self, subcmd=UdpToken.SUBCMD_NONE, pacid=None, data=b""):
+        object.__setattr__(self, "subcmd", subcmd)
+        object.__setattr__(self, "pacid", pacid)
+        object.__setattr__(self, "data", data)
+
+    def __repr__(self):
+        return "{}(subcmd={:#04x}, pacid={!r}, data={!r})".format(type(self).__name__, self.subcmd, self.pacid, bytes(self.data))
+
+    def detach(self):
+        """Returns the message with its payload copied into :class:`bytes`,
+        or the message itself if the payload already is."""
+
+        if isinstance(self.data, bytes):
+            return self
+
+        return type(self).decode(self.subcmd, self.pacid, bytes(self.data))
+
+    def encode(self, pacid=None):
+        """Returns the frame of the message.
+
+        :param pacid: The PACID to encode instead of the message's own.
+        """
+
+        cmd = MESSAGES.get_id(type(self))
+
+        if cmd is None:
+            raise UdpEncodeError("Unknown UDP message type!")
+
+        length = len(self.data)
+        frame = bytearray(UdpToken.HEADER_SIZE + length + UdpToken.CRC_SIZE)
+
+        try:
+            _HEADER.pack_into(frame, 0, UdpToken.GW_ADDR, cmd, self.subcmd, 0, 0, (self.pacid if pacid is None else pacid) or 0, length)
+        except struct.error as error:
+            raise UdpEncodeError(error)
+
+        frame[UdpToken.HEADER_SIZE:UdpToken.HEADER_SIZE + length] = self.data
+        _CRC.pack_into(frame, UdpToken.HEADER_SIZE + length, calculate_crc16(memoryview(frame)[:UdpToken.HEADER_SIZE + length]))
+
+        return bytes(frame)
+
+    @classmethod
+    def decode(cls, subcmd, pacid, data):
+        return cls(subcmd, pacid, data)
+
+
+class UdpRequest(UdpMessage, Request):
+    """Abstract base for all UDP request messages."""
+
+    __slots__ = ()
+
+    def prepare(self):
+        return PreparedUdpRequest(type(self), self.encode(), UdpToken.HEADER_SIZE, len(self.data))
+
+
+class PreparedUdpRequest(PreparedRequest):
+    """A prepared UDP request. Its PACID is patched in whenever it is sent and
+    its CRC is recalculated, see :func:`encode_udp_request`."""
+
+    __slots__ = ()
+
+    def _seal(self, frame):
+        end = self.offset + self.length
+        _CRC.pack_into(frame, end, calculate_crc16(memoryview(frame)[:end]))
+
+    def encode(self, pacid=None):
+        """Returns the frame, with the given PACID if any."""
+
+        if pacid is None:
+            return self.frame
+
+        frame = bytearray(self.frame)
+        _PACID.pack_into(frame, _PACID_OFFSET, pacid)
+        self._seal(frame)
+
+        return bytes(frame)
+
+
+class UdpResponse(UdpMessage, Response):
+    """Abstract base for all UDP response messages."""
+
+    __slots__ = ()
+
+    @property
+    def ok(self):
+        return self.subcmd == UdpToken.SUBCMD_OK
+
+
+class UdpReaction(UdpMessage, Reaction):
+    """Abstract base for all UDP reaction messages."""
+
+    __slots__ = ()
+
+
+class IdentificationRequest(UdpRequest):
+
+    __slots__ = ()
+
+
+class IdentificationResponse(UdpResponse):
+
+    __slots__ = ()
+
+
+class StatusRequest(UdpRequest):
+
+    __slots__ = ()
+
+
+class StatusResponse(UdpResponse):
+
+    __slots__ = ()
+
+
+class DataSendRequest(UdpRequest):
+
+    __slots__ = ()
+
+    def __init__(self, data, pacid=None):
+        super().__init__(UdpToken.SUBCMD_NONE, pacid, data)
+
+    @classmethod
+    def decode(cls, subcmd, pacid, data):
+        return cls(data, pacid)
+
+
+class DataSendResponse(UdpResponse):
+
+    __slots__ = ()
+
+
+class DataReceivedReaction(UdpReaction):
+
+    __slots__ = ()
+
+    def __init__(self, data, pacid=None):
+        super().__init__(UdpToken.SUBCMD_NONE, pacid, data)
+
+    @classmethod
+    def decode(cls, subcmd, pacid, data):
+        return cls(data, pacid)
+
+
+MESSAGES = MessageRegistry(UdpMessage, "message")
+
+
+def register_udp_message(cls, cmd):
+    MESSAGES.register(cls, cmd)
+
+
+def get_udp_message_type(cmd):
+    return MESSAGES.get_type(cmd)
+
+
+register_udp_message(IdentificationRequest, UdpToken.CMD_IDENTIFICATION)
+register_udp_message(IdentificationResponse, UdpToken.CMD_IDENTIFICATION | UdpToken.CMD_RESPONSE)
+
+register_udp_message(StatusRequest, UdpToken.CMD_STATUS)
+register_udp_message(StatusResponse, UdpToken.CMD_STATUS | UdpToken.CMD_RESPONSE)
+
+register_udp_message(DataSendRequest, UdpToken.CMD_DATA_SEND)
+register_udp_message(DataSendResponse, UdpToken.CMD_DATA_SEND | UdpToken.CMD_RESPONSE)
+
+register_udp_message(DataReceivedReaction, UdpToken.CMD_DATA_RECEIVED)
+
+
+def encode_udp_request(message, next_pacid):
+    """Returns the PACID and the frame of a request. A request without a PACID
+    gets the one returned by ``next_pacid`` on every call, and a
+    :class:`PreparedUdpRequest` always gets a new one. The request itself is
+    left unchanged, so sending it again doesn't reuse the PACID.
+
+    :raises TypeError: If the message isn't a UDP request.
+    """
+
+    if isinstance(message, PreparedUdpRequest):
+        pacid = next_pacid()
+        return pacid, message.encode(pacid)
+
+    if not isinstance(message, UdpRequest):
+        raise TypeError("Invalid message type!")
+
+    pacid = next_pacid() if message.pacid is None else message.pacid
+
+    return pacid, message.encode(pacid)
+
+
+def decode_udp_message(data):
+    """Decodes a datagram into a UDP message. The payload of the returned
+    message is a :class:`memoryview` of the datagram.
+
+    :raises UdpDecodeError: If the datagram is malformed, its CRC doesn't
+        match or its command is unknown.
+    """
+
+    view = data if isinstance(data, memoryview) else memoryview(data)
+
+    if len(view) < UdpToken.HEADER_SIZE + UdpToken.CRC_SIZE:
+        raise UdpDecodeError("Datagram too short!")
+
+    gw_addr, cmd, subcmd, _, _, pacid, length = _HEADER.unpack_from(view)
+    end = UdpToken.HEADER_SIZE + length
+
+    if len(view) != end + UdpToken.CRC_SIZE:
+        raise UdpDecodeError("Invalid data length!")
+
+    if _CRC.unpack_from(view, end)[0] != calculate_crc16(view[:end]):
+        raise UdpDecodeError("CRC mismatch!")
+
+    type = MESSAGES.get_type(cmd)
+
+    if type is None:
+        raise UdpDecodeError("Unknown command!")
+
+    return type.decode(subcmd, pacid, view[UdpToken.HEADER_SIZE:end])
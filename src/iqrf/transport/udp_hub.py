@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF UDP Hub
+============
+
+Drives a fleet of IQRF UDP gateways over a single socket. Inbound datagrams
+are demultiplexed by their source address into per-gateway queues or handed
+to per-gateway callbacks, and every gateway keeps its own PACID sequence.
+The hub exposes :meth:`UdpHub.fileno`, so it can be registered with a
+:mod:`selectors` selector and serviced by :meth:`UdpHub.poll` whenever the
+socket is readable.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import socket
+
+from .udp_codec import UdpCodecError, decode_udp_message, encode_udp_request
+from .udp_io import MAX_DATAGRAM_SIZE
+
+from ..util.io import IoTimeoutError, time_left, to_deadline
+from ..util.log import logger
+
+__all__ = [
+    "UdpGateway", "UdpHub"
+]
+
+
+class UdpGateway:
+    """A gateway registered with a :class:`UdpHub`. Messages from the gateway
+    are queued unless a callback was given at the registration; the queue
+    keeps at most ``queue_size`` messages and drops the oldest ones, counted
+    by :attr:`dropped`.
+    """
+
+    def __init__(self, hub, address, callback=None, queue_size=1024):
+        self.hub = hub
+        self.address = address
+        self.callback = callback
+        self.dropped = 0
+
+        self._messages = collections.deque(maxlen=queue_size)
+        self._pacid = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __repr__(self):
+        return "UdpGateway({}:{})".format(*self.address)
+
+    def next_pacid(self):
+        self._pacid = (self._pacid + 1) & 0xffff
+        return self._pacid
+
+    def _deliver(self, message):
+        if self.callback is not None:
+            self.callback(self, message)
+            return
+
+        if len(self._messages) == self._messages.maxlen:
+            self.dropped += 1
+
+        self._messages.append(message.detach())
+
+    def send(self, message):
+        """Sends the message to the gateway, see :meth:`UdpHub.send`."""
+
+        return self.hub.send(self, message)
+
+    def receive(self, timeout=None):
+        """Returns the next queued message of the gateway, polling the hub
+        until one arrives.
+
+        :raises IoTimeoutError: If no message arrives in time.
+        """
+
+        deadline = to_deadline(timeout)
+
+        # The hub is polled at least once, so that a non-blocking receive
+        # still returns a datagram that is already waiting.
+        while len(self._messages) == 0:
+            self.hub.poll(time_left(deadline))
+
+            if len(self._messages) == 0 and time_left(deadline) == 0:
+                raise IoTimeoutError
+
+        return self._messages.popleft()
+
+
+class UdpHub:
+    """A single UDP socket shared by any number of gateways.
+
+    :param port: The local port to bind, 0 picks a free one.
+    :param host: The local address to bind.
+    """
+
+    # The maximal number of datagrams dispatched by a single poll, so that a
+    # flooding gateway can't starve the caller.
+    POLL_BATCH = 64
+
+    def __init__(self, port=0, host=""):
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind((host, port))
+
+        # Datagrams from unregistered addresses and undecodable datagrams.
+        self.unknown = 0
+        self.invalid = 0
+
+        self._gateways = {}
+        self._buffer = memoryview(bytearray(MAX_DATAGRAM_SIZE))
+        self._timeout = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def __len__(self):
+        return len(self._gateways)
+
+    def __iter__(self):
+        return iter(list(self._gateways.values()))
+
+    def fileno(self):
+        return self.socket.fileno()
+
+    @property
+    def address(self):
+        return self.socket.getsockname()
+
+    def register(self, host, port, callback=None, queue_size=1024):
+        """Registers a gateway and returns its :class:`UdpGateway`. The host
+        is resolved to an IPv4 address, as datagrams are matched by their
+        numeric source address.
+
+        :param callback: A callable invoked as ``callback(gateway, message)``
+            for every message instead of queuing it. The payload of the
+            message is a view of the hub's buffer, valid only during the call.
+        """
+
+        address = (socket.gethostbyname(host), port)
+
+        if address in self._gateways:
+            raise ValueError("Duplicate gateway address!")
+
+        gateway = UdpGateway(self, address, callback=callback, queue_size=queue_size)
+        self._gateways[address] = gateway
+
+        return gateway
+
+    def unregister(self, gateway):
+        if self._gateways.get(gateway.address) is not gateway:
+            raise ValueError("Unknown gateway!")
+
+        del self._gateways[gateway.address]
+
+    def send(self, gateway, message):
+        """Sends the request to the gateway. A request without a PACID gets the
+        next one of the gateway's sequence, as does every prepared request.
+
+        :return: The PACID of the sent request.
+        """
+
+        pacid, frame = encode_udp_request(message, gateway.next_pacid)
+        self.socket.sendto(frame, gateway.address)
+
+        return pacid
+
+    def _set_timeout(self, timeout):
+        if timeout != self._timeout:
+            self.socket.settimeout(timeout)
+            self._timeout = timeout
+
+    def _dispatch(self, count, address):
+        gateway = self._gateways.get(address)
+
+        if gateway is None:
+            self.unknown += 1
+            logger.debug("Dropping a datagram from an unknown address %s:%s.", *address)
+            return
+
+        try:
+            message = decode_udp_message(self._buffer[:count])
+        except UdpCodecError as error:
+            self.invalid += 1
+            logger.debug("Dropping an invalid datagram from %r: %s", gateway, error)
+            return
+
+        gateway._deliver(message)
+
+    def poll(self, timeout=None):
+        """Waits up to ``timeout`` for a datagram and dispatches it together
+        with the datagrams already pending.
+
+        :return: The number of received datagrams, 0 on timeout.
+        """
+
+        self._set_timeout(timeout)
+        received = 0
+
+        while received < self.POLL_BATCH:
+            try:
+                count, address = self.socket.recvfrom_into(self._buffer)
+            except (socket.timeout, BlockingIOError):
+                break
+
+            received += 1
+            self._set_timeout(0)
+            self._dispatch(count, address)
+
+        return received
+
+    def close(self):
+        self.socket.close()
@@ -6,47 +6,235 @@ IQRF UDP IO
 
 An implementation of communication channel with IQRF UDP devices.
 
+Datagrams are received into a small pool of preallocated buffers and returned
+as :class:`memoryview` slices of them. A returned datagram stays valid until
+the pool wraps around, i.e. for the next :attr:`RawUdpIo.POOL_SIZE` - 1
+received datagrams; copy it with :class:`bytes` to keep it longer.
+
+:class:`BufferedUdpIo` exchanges typed :mod:`iqrf.transport.udp_codec`
+messages instead of raw datagrams.
+
 :copyright: (c) 2016 by Tomáš Rottenberg.
 :license:  Apache 2, see license.txt for more details.
 
 """
 
+import collections
 import socket
+import time
+
+from .udp_codec import UdpCodecError, UdpReaction, UdpResponse, decode_udp_message, encode_udp_request
+
+from ..util.io import BufferPool, IoTimeoutError, time_left, to_deadline
+from ..util.log import logger
 
-BUFFER_SIZE = 1024 * 1024
+# Large enough for the gateway header, the longest DPA frame and the CRC.
+MAX_DATAGRAM_SIZE = 1024
 
 __all__ = [
-    "RawUdpIo",
+    "RawUdpIo", "BufferedUdpIo",
     "open"
 ]
 
 
 class RawUdpIo:
 
+    POOL_SIZE = 16
+
+    # The :class:`iqrf.util.metrics.TransportMetrics` of the channel, None
+    # while metrics are disabled.
+    metrics = None
+
+    # The :class:`iqrf.util.capture.CaptureWriter` recording the traffic of
+    # the channel, None while capturing is disabled.
+    capture = None
+
     def __init__(self, host, port):
         self.remote_address = (host, port)
         self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         self.socket.bind(("", port))
 
+        self._pool = BufferPool(MAX_DATAGRAM_SIZE, self.POOL_SIZE)
+        self._timeout = None
+
     def __enter__(self):
         return self
 
     def __exit__(self, *args, **kwargs):
         self.close()
 
+    def _set_timeout(self, timeout):
+        if timeout != self._timeout:
+            self.socket.settimeout(timeout)
+            self._timeout = timeout
+
+    def _receive_into(self, view):
+        count = self.socket.recv_into(view)
+
+        if self.metrics is not None:
+            self.metrics.frames_in += 1
+            self.metrics.bytes_in += count
+
+        if self.capture is not None:
+            self.capture.incoming(view[:count])
+
+        return view[:count]
+
     def send(self, message):
+        if self.capture is not None:
+            self.capture.outgoing(message)
+
         self.socket.sendto(message, self.remote_address)
 
+        if self.metrics is not None:
+            self.metrics.frames_out += 1
+            self.metrics.bytes_out += len(message)
+
     def receive(self, timeout=None):
-        self.socket.settimeout(timeout)
+        self._set_timeout(timeout)
+
+        try:
+            return self._receive_into(self._pool.acquire())
+        except (socket.timeout, BlockingIOError):
+            raise IoTimeoutError
+
+    def receive_many(self, count=None, timeout=None):
+        """Waits for a datagram and then drains the datagrams that are already
+        pending without blocking again.
+
+        :param count: The maximal number of datagrams to return. It is capped
+            by the buffer pool size so that all returned views stay valid.
+        :return: A list of :class:`memoryview` datagrams.
+        """
+
+        count = len(self._pool) if count is None else min(count, len(self._pool))
+        datagrams = [RawUdpIo.receive(self, timeout)]
+
+        if len(datagrams) < count:
+            self._set_timeout(0)
 
-        data, _ = self.socket.recvfrom(BUFFER_SIZE)
+        while len(datagrams) < count:
+            try:
+                datagrams.append(self._receive_into(self._pool.acquire()))
+            except BlockingIOError:
+                break
 
-        return data
+        return datagrams
 
     def close(self):
         self.socket.close()
 
 
-def open(host, port):
-    return RawUdpIo(host, port)
+class BufferedUdpIo(RawUdpIo):
+    """Buffered IQRF UDP channel exchanging typed gateway messages. Requests
+    without a PACID get the next one of the channel, and :meth:`send` waits
+    for the response carrying the same PACID. Reactions received meanwhile
+    are copied out of the buffer pool and queued for :meth:`receive`.
+    """
+
+    def __init__(self, host, port):
+        super().__init__(host, port)
+
+        self._reactions = collections.deque()
+        self._pacid = 0
+
+    def _next_pacid(self):
+        self._pacid = (self._pacid + 1) & 0xffff
+        return self._pacid
+
+    def _receive_message(self, timeout):
+        """Receives and decodes a datagram. A corrupt or foreign datagram is
+        logged and dropped, returning None, so that it doesn't abandon a
+        request in flight.
+        """
+
+        datagram = RawUdpIo.receive(self, timeout)
+
+        try:
+            return decode_udp_message(datagram)
+        except UdpCodecError as error:
+            if self.metrics is not None:
+                self.metrics.decode_errors += 1
+
+            logger.warning("Dropping undecodable UDP datagram: %s.", error)
+
+            return None
+
+    def send(self, message, timeout=None):
+        pacid, frame = encode_udp_request(message, self._next_pacid)
+
+        deadline = to_deadline(timeout)
+        start = time.monotonic()
+        RawUdpIo.send(self, frame)
+
+        response = self._wait_response(pacid, deadline)
+
+        if self.metrics is not None:
+            self.metrics.send_latency.record(time.monotonic() - start)
+
+        return response
+
+    def _wait_response(self, pacid, deadline):
+        while True:
+            received = self._receive_message(time_left(deadline))
+
+            if received is None:
+                continue
+            elif isinstance(received, UdpReaction):
+                self._reactions.append(received.detach())
+
+                if self.metrics is not None:
+                    self.metrics.reactions_queued += 1
+            elif isinstance(received, UdpResponse) and received.pacid == pacid:
+                return received
+            else:
+                self._drop(received)
+
+    def _drop(self, message):
+        logger.debug("Dropping an unexpected UDP message: %r.", message)
+
+    def receive(self, timeout=None):
+        if len(self._reactions) > 0:
+            return self._reactions.popleft()
+
+        deadline = to_deadline(timeout)
+
+        while True:
+            received = self._receive_message(time_left(deadline))
+
+            if isinstance(received, UdpReaction):
+                return received
+
+            if received is not None:
+                self._drop(received)
+
+    def receive_many(self, count=None, timeout=None):
+        """Waits for a reaction and then collects the reactions that are
+        already pending without blocking again.
+
+        :param count: The maximal number of reactions to return, by default
+            the buffer pool size so that all returned payload views stay
+            valid.
+        :return: A list of :class:`UdpReaction` messages.
+        """
+
+        count = len(self._pool) if count is None else min(count, len(self._pool))
+        reactions = [self.receive(timeout)]
+
+        while len(reactions) < count:
+            try:
+                reactions.append(self.receive(0))
+            except IoTimeoutError:
+                break
+
+        return reactions
+
+
+def open(host, port, buffered=False, reliable=False, **kwargs):
+    if reliable:
+        from .udp_reliable import ReliableUdpIo
+        return ReliableUdpIo(host, port, **kwargs)
+    elif buffered:
+        return BufferedUdpIo(host, port)
+    else:
+        return RawUdpIo(host, port)
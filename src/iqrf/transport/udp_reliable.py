@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+IQRF UDP Reliable IO
+====================
+
+An opt-in reliability layer for the IQRF UDP transport. Every request is
+tracked by its PACID and retransmitted when its response doesn't arrive
+within the retransmission timeout. The timeout adapts to the measured round
+trip time following RFC 6298 (SRTT/RTTVAR with Karn's algorithm), so a lost
+datagram costs roughly one RTT estimate instead of the whole caller timeout.
+Responses to already completed requests, e.g. answers to both the original
+and the retransmitted datagram, are recognised and dropped.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import time
+
+from .udp_codec import UdpResponse, encode_udp_request
+from .udp_io import BufferedUdpIo, RawUdpIo
+
+from ..util.io import IoTimeoutError, time_left, to_deadline
+from ..util.log import logger
+
+__all__ = [
+    "RttEstimator", "ReliableUdpIo"
+]
+
+
+class RttEstimator:
+    """Round trip time estimator computing the retransmission timeout as
+    described by RFC 6298. All times are in seconds.
+
+    :param initial_rto: The timeout used before the first measurement.
+    :param min_rto: The lower bound of the timeout. RFC 6298 recommends one
+        second for the internet, a LAN gateway answers much sooner.
+    :param max_rto: The upper bound of the timeout.
+    :param granularity: The clock granularity G.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+    K = 4
+
+    def __init__(self, initial_rto=1.0, min_rto=0.02, max_rto=4.0, granularity=0.001):
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.granularity = granularity
+
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+        self.samples = 0
+
+    def _clamp(self, rto):
+        return min(max(rto, self.min_rto), self.max_rto)
+
+    def update(self, rtt):
+        """Updates the estimate with a round trip time measured on a request
+        that wasn't retransmitted."""
+
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+
+        self.samples += 1
+        self.rto = self._clamp(self.srtt + max(self.granularity, self.K * self.rttvar))
+
+    def backoff(self):
+        """Doubles the timeout after a retransmission. It stays backed off
+        until the next valid measurement."""
+
+        self.rto = self._clamp(self.rto * 2)
+
+
+class ReliableUdpIo(BufferedUdpIo):
+    """Buffered IQRF UDP channel retransmitting unanswered requests.
+
+    :param max_retransmissions: How many times a request is resent before
+        :meth:`send` gives up with :class:`IoTimeoutError`.
+    :param rtt: The :class:`RttEstimator`, a default one is created if None.
+    """
+
+    # The number of completed PACIDs remembered for duplicate detection.
+    HISTORY_SIZE = 64
+
+    def __init__(self, host, port, max_retransmissions=5, rtt=None):
+        super().__init__(host, port)
+
+        self.max_retransmissions = max_retransmissions
+        self.rtt = rtt if rtt is not None else RttEstimator()
+
+        # Datagrams sent including retransmissions, retransmissions alone,
+        # requests given up and dropped duplicate responses.
+        self.sent = 0
+        self.retransmitted = 0
+        self.lost = 0
+        self.duplicates = 0
+
+        self._completed = collections.deque(maxlen=self.HISTORY_SIZE)
+
+    @property
+    def loss_ratio(self):
+        """The fraction of sent datagrams that had to be retransmitted."""
+
+        return self.retransmitted / self.sent if self.sent else 0.0
+
+    def _drop(self, message):
+        if isinstance(message, UdpResponse) and message.pacid in self._completed:
+            self.duplicates += 1
+        else:
+            super()._drop(message)
+
+    def send(self, message, timeout=None):
+        pacid, frame = encode_udp_request(message, self._next_pacid)
+        deadline = to_deadline(timeout)
+        retransmissions = 0
+        start = time.monotonic()
+
+        while True:
+            sent = time.monotonic()
+            RawUdpIo.send(self, frame)
+            self.sent += 1
+
+            left = time_left(deadline)
+            wait = self.rtt.rto if left is None else min(self.rtt.rto, left)
+
+            try:
+                response = self._wait_response(pacid, to_deadline(wait))
+                break
+            except IoTimeoutError:
+                if retransmissions == self.max_retransmissions or time_left(deadline) == 0:
+                    self.lost += 1
+                    raise
+
+            retransmissions += 1
+            self.retransmitted += 1
+            self.rtt.backoff()
+            logger.debug("Retransmitting UDP request %#06x, timeout %.3f s.", pacid, self.rtt.rto)
+
+        # Karn's algorithm: the response to a retransmitted request can't be
+        # attributed to a particular transmission.
+        if retransmissions == 0:
+            self.rtt.update(time.monotonic() - sent)
+
+        if self.metrics is not None:
+            self.metrics.send_latency.record(time.monotonic() - start)
+
+        self._completed.append(pacid)
+
+        return response
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+"""
+Capture
+=======
+
+Recording and replaying of the raw bytes exchanged with IQRF devices. A
+:class:`CaptureWriter` attached to a channel appends every chunk the channel
+reads or writes to an append-only capture file, and :class:`CaptureReader`
+scans such files through a memory map.
+
+A capture file starts with a header of the magic ``IQRFCP``, the format
+version, flags and the wall-clock start time. Records follow, each made of
+the microseconds elapsed since the start, the direction and the length of
+the data, and the data itself. Compressed captures group the records into
+zlib blocks prefixed by their compressed length. A truncated last record or
+block, e.g. after a crash, is ignored by the reader.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from .io import IoError, IoTimeoutError, time_left, to_deadline
+
+__all__ = [
+    "CaptureError", "CaptureEndError",
+    "CaptureToken",
+    "CaptureRecord",
+    "CaptureWriter", "CaptureReader", "CaptureReplay",
+    "capture_files", "read_capture"
+]
+
+
+class CaptureError(Exception):
+    """An error indicating an invalid capture file."""
+
+    pass
+
+
+class CaptureEndError(IoError):
+    """Raised by a replayed channel when its capture is exhausted."""
+
+    pass
+
+
+class CaptureToken:
+    MAGIC = b"IQRFCP"
+    VERSION = 1
+
+    FLAG_COMPRESSED = 0x01
+
+    DIRECTION_IN = 0
+    DIRECTION_OUT = 1
+
+    MAX_RECORD_DATA = 0xffff
+    BLOCK_SIZE = 64 * 1024
+
+
+_HEADER = struct.Struct("<6sBBd")
+_RECORD = struct.Struct("<QBH")
+_BLOCK = struct.Struct("<I")
+
+CaptureRecord = collections.namedtuple("CaptureRecord", ["timestamp", "direction", "data"])
+CaptureRecord.__doc__ = """A captured chunk of data with its wall-clock timestamp in seconds and
+its direction, :attr:`CaptureToken.DIRECTION_IN` for data received from the
+device."""
+
+
+class CaptureWriter:
+    """Appends timestamped chunks to a capture file. Attach the writer to a
+    channel with :meth:`attach`; the channel then reports everything it reads
+    and writes, from any thread.
+
+    :param path: The path of the capture file, truncated when opened.
+    :param compress: Whether to compress the records in zlib blocks. The
+        records of a block reach the file when the block is full or on
+        :meth:`flush`.
+    :param max_size: The size in bytes after which the file is rotated, or
+        None to never rotate.
+    :param backup_count: The number of rotated files kept as ``path.1`` (the
+        newest) to ``path.N``; with 0 the file is truncated on rotation.
+    """
+
+    def __init__(self, path, compress=False, max_size=None, backup_count=0):
+        self.path = path
+        self.compress = compress
+        self.max_size = max_size
+        self.backup_count = backup_count
+
+        self._lock = threading.Lock()
+        self._block = bytearray()
+        self._file = None
+        self._open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    def _open(self):
+        self._file = open(self.path, "wb")
+        self._start = time.monotonic()
+        self._size = _HEADER.size
+
+        flags = CaptureToken.FLAG_COMPRESSED if self.compress else 0
+        self._file.write(_HEADER.pack(CaptureToken.MAGIC, CaptureToken.VERSION, flags, time.time()))
+
+    def _rotate(self):
+        self._flush_block()
+        self._file.close()
+
+        if self.backup_count > 0:
+            for index in range(self.backup_count - 1, 0, -1):
+                source = "{}.{}".format(self.path, index)
+
+                if os.path.exists(source):
+                    os.replace(source, "{}.{}".format(self.path, index + 1))
+
+            os.replace(self.path, self.path + ".1")
+
+        self._open()
+
+    def _write(self, data):
+        self._file.write(data)
+        self._size += len(data)
+
+    def _flush_block(self):
+        if self._block:
+            block = zlib.compress(bytes(self._block))
+            self._write(_BLOCK.pack(len(block)) + block)
+            del self._block[:]
+
+    def _append(self, direction, data):
+        offset = int((time.monotonic() - self._start) * 1000000)
+        view = memoryview(data)
+
+        while True:
+            chunk = view[:CaptureToken.MAX_RECORD_DATA]
+            view = view[CaptureToken.MAX_RECORD_DATA:]
+            record = _RECORD.pack(offset, direction, len(chunk))
+
+            if self.compress:
+                self._block += record
+                self._block += chunk
+
+                if len(self._block) >= CaptureToken.BLOCK_SIZE:
+                    self._flush_block()
+            else:
+                self._write(record)
+                self._write(chunk)
+
+            if len(view) == 0:
+                break
+
+        if self.max_size is not None and self._size >= self.max_size:
+            self._rotate()
+
+    def record(self, direction, data):
+        """Appends a chunk of data going in the given direction."""
+
+        with self._lock:
+            if self._file is not None:
+                self._append(direction, data)
+
+    def incoming(self, data):
+        """Appends a chunk of data received from the device."""
+
+        self.record(CaptureToken.DIRECTION_IN, data)
+
+    def outgoing(self, data):
+        """Appends a chunk of data sent to the device."""
+
+        self.record(CaptureToken.DIRECTION_OUT, data)
+
+    def exchange(self, sent, received):
+        """Appends the two halves of a full-duplex transfer at once."""
+
+        with self._lock:
+            if self._file is not None:
+                self._append(CaptureToken.DIRECTION_OUT, sent)
+                self._append(CaptureToken.DIRECTION_IN, received)
+
+    def attach(self, io):
+        """Starts capturing the traffic of the channel."""
+
+        io.capture = self
+        return self
+
+    def flush(self):
+        """Writes the pending records to the operating system."""
+
+        with self._lock:
+            if self._file is not None:
+                self._flush_block()
+                self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._flush_block()
+                self._file.close()
+                self._file = None
+
+
+class CaptureReader:
+    """Reads a capture file through a memory map. Iterating the reader yields
+    :class:`CaptureRecord` tuples in the order they were written.
+
+    :param path: The path of the capture file.
+    :raises CaptureError: If the file isn't a capture.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < _HEADER.size:
+                raise CaptureError("The capture file is too short.")
+
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.flags, self.start = _HEADER.unpack_from(self._map)
+
+        if magic != CaptureToken.MAGIC:
+            self._map.close()
+            raise CaptureError("Not a capture file.")
+
+        if version != CaptureToken.VERSION:
+            self._map.close()
+            raise CaptureError("Unsupported capture version {}.".format(version))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def compressed(self):
+        return bool(self.flags & CaptureToken.FLAG_COMPRESSED)
+
+    def _records(self, data, position, end):
+        start = self.start
+        unpack = _RECORD.unpack_from
+        header = _RECORD.size
+
+        while position + header <= end:
+            offset, direction, length = unpack(data, position)
+            position += header
+
+            if position + length > end:
+                return
+
+            yield CaptureRecord(start + offset / 1000000, direction, data[position:position + length])
+            position += length
+
+    def _blocks(self):
+        data = self._map
+        position = _HEADER.size
+
+        while position + _BLOCK.size <= len(data):
+            length, = _BLOCK.unpack_from(data, position)
+            position += _BLOCK.size
+
+            if position + length > len(data):
+                return
+
+            try:
+                yield zlib.decompress(data[position:position + length])
+            except zlib.error:
+                return
+
+            position += length
+
+    def __iter__(self):
+        if not self.compressed:
+            return self._records(self._map, _HEADER.size, len(self._map))
+
+        return (record for block in self._blocks() for record in self._records(block, 0, len(block)))
+
+    def close(self):
+        self._map.close()
+
+
+def capture_files(path):
+    """Returns the existing files of a rotated capture, the oldest first."""
+
+    files = []
+    index = 1
+
+    while os.path.exists("{}.{}".format(path, index)):
+        files.append("{}.{}".format(path, index))
+        index += 1
+
+    files.reverse()
+
+    if os.path.exists(path):
+        files.append(path)
+
+    return files
+
+
+def read_capture(path):
+    """Yields the records of a capture including its rotated files."""
+
+    for name in capture_files(path):
+        with CaptureReader(name) as reader:
+            yield from reader
+
+
+class CaptureReplay:
+    """Plays captured records back on a clock. A record becomes due once the
+    time elapsed since the replay started, multiplied by ``speed``, reaches
+    its offset in the capture. Outgoing records mark the points where the
+    replayed channel has to write: :meth:`written` resynchronises the clock
+    to them and incoming records after an outgoing one aren't delivered
+    before it is written.
+
+    :param records: An iterable of :class:`CaptureRecord` or the path of a
+        capture file.
+    :param speed: The replay speed relative to the capture or None to replay
+        as fast as possible.
+    """
+
+    def __init__(self, records, speed=1.0):
+        if isinstance(records, str):
+            records = read_capture(records)
+
+        self.speed = speed
+
+        self._records = iter(records)
+        self._pending = collections.deque()
+        self._origin = None
+        self._base = None
+        # Notified whenever an outgoing record is consumed.
+        self._written = threading.Condition()
+
+    def _fetch(self):
+        record = next(self._records, None)
+
+        if record is not None:
+            if self._origin is None:
+                self._origin = record.timestamp
+                self._base = time.monotonic()
+
+            self._pending.append(record)
+
+        return record
+
+    def _due(self, record):
+        if self.speed is None:
+            return 0.0
+
+        return self._base + (record.timestamp - self._origin) / self.speed
+
+    def sync(self, record):
+        """Shifts the clock so that the record is due right now."""
+
+        if self.speed is not None:
+            self._base = time.monotonic() - (record.timestamp - self._origin) / self.speed
+
+    def peek(self, index=0):
+        """Returns a record ahead without consuming it, or None at the end."""
+
+        while len(self._pending) <= index:
+            if self._fetch() is None:
+                return None
+
+        return self._pending[index]
+
+    def pop(self):
+        return self._pending.popleft()
+
+    def is_due(self, record):
+        return time.monotonic() >= self._due(record)
+
+    def wait(self, record, timeout=None):
+        """Waits until the record is due.
+
+        :raises IoTimeoutError: If the record doesn't become due in time.
+        """
+
+        deadline = to_deadline(timeout)
+        delay = self._due(record) - time.monotonic()
+
+        if delay > 0:
+            if deadline is not None and time_left(deadline) < delay:
+                time.sleep(time_left(deadline))
+                raise IoTimeoutError
+
+            time.sleep(delay)
+
+    def read(self, timeout=None):
+        """Returns the next incoming record once it is due. While an outgoing
+        record has to be written first, the caller waits for the write.
+
+        :raises IoTimeoutError: If the record isn't due in time.
+        :raises CaptureEndError: If the capture is exhausted.
+        """
+
+        deadline = to_deadline(timeout)
+
+        with self._written:
+            while True:
+                record = self.peek()
+
+                if record is None:
+                    raise CaptureEndError("End of capture.")
+
+                if record.direction == CaptureToken.DIRECTION_IN:
+                    break
+
+                if not self._written.wait(time_left(deadline)):
+                    raise IoTimeoutError
+
+        self.wait(record, time_left(deadline))
+        return self.pop()
+
+    def close(self):
+        """Releases the capture files being replayed."""
+
+        close = getattr(self._records, "close", None)
+
+        if close is not None:
+            close()
+
+    def written(self):
+        """Consumes the next outgoing record, keeping the incoming records
+        that precede it, and resynchronises the clock to it.
+
+        :return: The outgoing record.
+        :raises CaptureEndError: If the capture has no more outgoing records.
+        """
+
+        index = 0
+
+        with self._written:
+            while True:
+                if index == len(self._pending) and self._fetch() is None:
+                    raise CaptureEndError("End of capture.")
+
+                record = self._pending[index]
+
+                if record.direction == CaptureToken.DIRECTION_OUT:
+                    del self._pending[index]
+                    self.sync(record)
+                    self._written.notify_all()
+
+                    return record
+
+                index += 1
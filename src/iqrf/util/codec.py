@@ -12,10 +12,14 @@ scalable data serializers.
 
 """
 
+import threading
+
 __all__ = [
     "CodecError",
     "Encoder", "Decoder",
-    "Message", "Request", "Response", "Reaction"
+    "Message", "Request", "Response", "Reaction",
+    "PreparedRequest", "message_type",
+    "MessageRegistry"
 ]
 
 
@@ -28,6 +32,8 @@ class CodecError(Exception):
 class Encoder:
     """A mixin that turns regular classes into encodable messages."""
 
+    __slots__ = ()
+
     def encode(self):
         """Encodes the message to bytes."""
 
@@ -39,6 +45,8 @@ class Decoder:
     bytes. Note that this mixin doesn't provide a recognition algorithm that
     would match a byte message to the corresponding class."""
 
+    __slots__ = ()
+
     @classmethod
     def decode(cls, **kwargs):
         """Decodes the message from the given tokens."""
@@ -49,6 +57,8 @@ class Decoder:
 class Message:
     """Abstract message that is capable of serialization."""
 
+    __slots__ = ()
+
     def encode(self):
         """Encodes the message to byte. A common practice is to add the desired
         sublcass of :class:`Encoder` mixin to your message declaration to
@@ -69,18 +79,188 @@ class Request(Message):
     """A message that is expected to be responded to with a an instance of the
     :class:`Response` class."""
 
-    pass
+    __slots__ = ()
+
+    def prepare(self):
+        """Encodes the request once to a :class:`PreparedRequest`, which the
+        channels send as is. Transports whose requests carry a payload or a
+        checksum override this method to support templates."""
+
+        return PreparedRequest(type(self), self.encode())
 
 
 class Response(Message):
     """A message that is sent as a response to a received instance of the
     :class:`Request` class."""
 
-    pass
+    __slots__ = ()
 
 
 class Reaction(Message):
     """A message that can be sent at any time without any kind of foregoing
     request and is simply a reaction to the ongoing events."""
 
-    pass
+    __slots__ = ()
+
+
+class PreparedRequest:
+    """A request frozen into its wire bytes by :meth:`Request.prepare`, for
+    requests sent over and over again. Channels accept it in place of the
+    request and send :attr:`frame` without encoding anything.
+
+    A prepared request with a payload is also a template: :meth:`substitute`
+    returns a copy with some payload bytes replaced.
+
+    :param type: The type of the prepared request.
+    :param frame: The encoded request.
+    :param offset: The offset of the payload in the frame, or None if the
+        payload can't be substituted.
+    :param length: The length of the payload.
+    """
+
+    __slots__ = ("type", "frame", "offset", "length")
+
+    def __init__(self, type, frame, offset=None, length=0):
+        self.type = type
+        self.frame = frame
+        self.offset = offset
+        self.length = length
+
+    def __repr__(self):
+        return "{}({}, {!r})".format(type(self).__name__, self.type.__name__, self.frame)
+
+    def encode(self):
+        return self.frame
+
+    def _seal(self, frame):
+        """Updates the frame after its payload was substituted, e.g. its
+        checksum."""
+
+        pass
+
+    def substitute(self, position, data):
+        """Returns a copy of the prepared request with the payload bytes from
+        ``position`` replaced by the data; the frame length never changes.
+
+        :raises ValueError: If the request has no payload or the data doesn't
+            fit in it.
+        """
+
+        if self.offset is None or position < 0 or position + len(data) > self.length:
+            raise ValueError("The data doesn't fit in the payload!")
+
+        frame = bytearray(self.frame)
+        start = self.offset + position
+        frame[start:start + len(data)] = data
+        self._seal(frame)
+
+        prepared = object.__new__(type(self))
+
+        for name in PreparedRequest.__slots__:
+            setattr(prepared, name, getattr(self, name))
+
+        prepared.frame = bytes(frame)
+
+        return prepared
+
+
+def message_type(message):
+    """Returns the type of the message, or the type of the request a
+    :class:`PreparedRequest` was made from."""
+
+    return message.type if isinstance(message, PreparedRequest) else type(message)
+
+
+class MessageRegistry:
+    """A bidirectional mapping between message types and their wire
+    identifiers. Both directions are resolved in constant time and neither
+    types nor identifiers may be registered twice.
+
+    :param base: The class all registered types must derive from.
+    :param kind: A human readable name of the registered messages used in
+        error messages, e.g. ``"request"``.
+    :param defaults: An optional callable returning the ``(type, id)`` pairs
+        of the built-in messages. They are registered on first use of the
+        registry instead of when the declaring module is imported.
+    """
+
+    def __init__(self, base, kind, defaults=None):
+        self._base = base
+        self._kind = kind
+        self._types = {}
+        self._ids = {}
+        self._defaults = defaults
+        self._lock = threading.Lock()
+
+    def __contains__(self, cls):
+        if self._defaults is not None:
+            self._load()
+
+        return cls in self._ids
+
+    def __iter__(self):
+        if self._defaults is not None:
+            self._load()
+
+        return iter(self._ids)
+
+    def __len__(self):
+        if self._defaults is not None:
+            self._load()
+
+        return len(self._ids)
+
+    def _load(self):
+        with self._lock:
+            if self._defaults is not None:
+                for cls, id in self._defaults():
+                    self._register(cls, id)
+
+                self._defaults = None
+
+    def _register(self, cls, id):
+        if not isinstance(cls, type) or not issubclass(cls, self._base):
+            raise ValueError("Not a {} type!".format(self._kind))
+
+        if cls in self._ids:
+            raise ValueError("Duplicate {} type!".format(self._kind))
+
+        if id in self._types:
+            raise ValueError("Duplicate {} id!".format(self._kind))
+
+        self._types[id] = cls
+        self._ids[cls] = id
+
+    def register(self, cls, id):
+        """Registers a message type under the given identifier.
+
+        :raises ValueError: If the type doesn't derive from the base class or
+            if either the type or the identifier is already registered.
+        """
+
+        if self._defaults is not None:
+            self._load()
+
+        self._register(cls, id)
+
+    def get_type(self, id):
+        """Returns the type registered under the identifier or None."""
+
+        cls = self._types.get(id)
+
+        if cls is None and self._defaults is not None:
+            self._load()
+            cls = self._types.get(id)
+
+        return cls
+
+    def get_id(self, cls):
+        """Returns the identifier of the registered type or None."""
+
+        id = self._ids.get(cls)
+
+        if id is None and self._defaults is not None:
+            self._load()
+            id = self._ids.get(cls)
+
+        return id
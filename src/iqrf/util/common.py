@@ -5,3 +5,78 @@ class CommonEqualityMixin:
 
     def __ne__(self, other):
         return not self.__eq__(other)
+
+
+class ValueMixin:
+    """A mixin of slotted immutable value types. The fields listed in
+    ``_fields`` determine equality and the hash, so their values must be
+    hashable. Constructors set them once with :func:`object.__setattr__`.
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable.".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} is immutable.".format(type(self).__name__))
+
+    def _values(self):
+        return tuple(getattr(self, name) for name in self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return False
+
+        for name in self._fields:
+            if getattr(self, name) != getattr(other, name):
+                return False
+
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((type(self),) + self._values())
+
+    def __repr__(self):
+        return "{}({})".format(type(self).__name__, ", ".join("{}={!r}".format(name, getattr(self, name)) for name in self._fields))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return _restore_value, (type(self), self._values())
+
+
+def _restore_value(cls, values):
+    instance = object.__new__(cls)
+
+    for name, value in zip(cls._fields, values):
+        object.__setattr__(instance, name, value)
+
+    return instance
+
+
+class FlyweightMixin(ValueMixin):
+    """A mixin of value types without arguments, whose instances are all one
+    shared instance."""
+
+    __slots__ = ()
+
+    def __new__(cls):
+        instance = cls.__dict__.get("_instance")
+
+        if instance is None:
+            instance = super().__new__(cls)
+            cls._instance = instance
+
+        return instance
+
+    def __reduce__(self):
+        return type(self), ()
@@ -1,3 +1,4 @@
+import selectors
 import sys
 import time
 
@@ -17,6 +18,20 @@ def to_iotime(time):
     return time
 
 
+def to_deadline(timeout):
+    if timeout is None:
+        return None
+
+    return time.monotonic() + timeout
+
+
+def time_left(deadline):
+    if deadline is None:
+        return None
+
+    return max(deadline - time.monotonic(), 0)
+
+
 def wait(expression, condition, timeout=None):
     timeout = to_iotime(timeout)
 
@@ -45,3 +60,222 @@ def wait(expression, condition, timeout=None):
         delta += time.time() - start
 
     raise IoTimeoutError
+
+
+class PollingScheduler:
+    """Repeatedly evaluates an expression until its result satisfies a
+    condition. The expression is first evaluated in a tight loop for a short
+    spin period, after which the pauses between evaluations grow
+    exponentially up to a maximum interval.
+
+    :param spin: The number of seconds to poll without pausing.
+    :param initial_interval: The first pause after the spin period.
+    :param maximum_interval: The upper bound of the pauses.
+    :param factor: The factor the pause grows by after each evaluation.
+    :param wakeup: An optional callable accepting a timeout that is used
+        instead of sleeping. It is expected to return early when the polled
+        resource signals a change, e.g. on a GPIO edge.
+    """
+
+    def __init__(self, spin=0.0003, initial_interval=0.0005, maximum_interval=0.05, factor=2.0, wakeup=None):
+        self.spin = spin
+        self.initial_interval = initial_interval
+        self.maximum_interval = maximum_interval
+        self.factor = factor
+        self.wakeup = wakeup
+        self.iterations = 0
+
+    def wait(self, expression, condition, timeout=None):
+        """Polls the expression until the condition holds for its result.
+
+        :return: A tuple of the elapsed time and the accepted result.
+        :raises IoTimeoutError: If the condition didn't hold in time.
+        """
+
+        start = time.monotonic()
+        deadline = to_deadline(timeout)
+        spin_deadline = start + self.spin
+        interval = self.initial_interval
+
+        while True:
+            result = expression()
+            self.iterations += 1
+
+            if condition(result):
+                return time.monotonic() - start, result
+
+            now = time.monotonic()
+
+            if deadline is not None and now >= deadline:
+                raise IoTimeoutError
+
+            if now < spin_deadline:
+                continue
+
+            pause = interval if deadline is None else min(interval, deadline - now)
+
+            if self.wakeup is None:
+                time.sleep(pause)
+            else:
+                self.wakeup(pause)
+
+            interval = min(interval * self.factor, self.maximum_interval)
+
+
+class ReadableWaiter:
+    """Blocks the caller until a file object becomes readable. The underlying
+    selector is created once and reused, so each wait costs a single system
+    call instead of a polling loop."""
+
+    def __init__(self, fileobj):
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fileobj, selectors.EVENT_READ)
+
+    def wait(self, timeout=None):
+        """Waits until the file object is readable or the timeout elapses.
+
+        :param timeout: The number of seconds to wait or None to wait forever.
+        :raises IoTimeoutError: If the file object didn't become readable in
+            time.
+        """
+
+        if not self._selector.select(timeout):
+            raise IoTimeoutError
+
+    def close(self):
+        self._selector.close()
+
+
+class FrameBuffer:
+    """A preallocated buffer that splits a byte stream into frames ending with
+    a terminator. Incoming data is written directly into the free space of the
+    buffer and complete frames are handed out as :class:`memoryview` slices,
+    so neither reading nor framing reallocates the buffer. A returned frame
+    is only valid until the buffer is filled again.
+
+    :param terminator: The bytes terminating each frame.
+    :param capacity: The initial capacity of the buffer. The buffer grows
+        when a single frame doesn't fit into it.
+    :param framer: An optional callable ``framer(buffer, start, end)``
+        returning the end of the frame starting at ``start`` or -1 while it
+        is incomplete. It replaces the terminator search for protocols whose
+        frames may contain the terminator.
+    """
+
+    MINIMAL_READ = 256
+
+    def __init__(self, terminator, capacity=4096, framer=None):
+        self._terminator = terminator
+        self._framer = framer
+        self._buffer = bytearray(capacity)
+        self._view = memoryview(self._buffer)
+        self._start = 0
+        self._end = 0
+        self._scan = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _reserve(self):
+        if self._start == self._end:
+            self._start = self._end = self._scan = 0
+
+        if len(self._buffer) - self._end >= self.MINIMAL_READ:
+            return
+
+        pending = self._end - self._start
+
+        if len(self._buffer) - pending >= self.MINIMAL_READ:
+            self._view[:pending] = self._buffer[self._start:self._end]
+        else:
+            buffer = bytearray(max(2 * len(self._buffer), pending + self.MINIMAL_READ))
+            buffer[:pending] = self._view[self._start:self._end]
+            self._buffer = buffer
+            self._view = memoryview(buffer)
+
+        self._scan -= self._start
+        self._start = 0
+        self._end = pending
+
+    def fill(self, readinto):
+        """Reads more data into the buffer.
+
+        :param readinto: A callable that receives a writable
+            :class:`memoryview` of the free space and returns the number of
+            bytes written into it.
+        :return: The number of bytes read.
+        """
+
+        self._reserve()
+        count = readinto(self._view[self._end:])
+        self._end += count
+
+        return count
+
+    def extend(self, data):
+        """Copies the data into the buffer."""
+
+        view = memoryview(data)
+
+        while len(view) > 0:
+            self._reserve()
+            count = min(len(view), len(self._buffer) - self._end)
+            self._view[self._end:self._end + count] = view[:count]
+            self._end += count
+            view = view[count:]
+
+    def next_frame(self):
+        """Returns the next complete frame including its terminator as a
+        :class:`memoryview` or None if no complete frame is buffered."""
+
+        if self._framer is not None:
+            if self._start == self._end:
+                return None
+
+            boundary = self._framer(self._buffer, self._start, self._end)
+
+            if boundary < 0:
+                return None
+
+            frame = self._view[self._start:boundary]
+            self._start = self._scan = boundary
+
+            return frame
+
+        index = self._buffer.find(self._terminator, self._scan, self._end)
+
+        if index == -1:
+            self._scan = max(self._start, self._end - len(self._terminator) + 1)
+            return None
+
+        boundary = index + len(self._terminator)
+        frame = self._view[self._start:boundary]
+        self._start = self._scan = boundary
+
+        return frame
+
+
+class BufferPool:
+    """A fixed ring of preallocated buffers handed out in turns. A buffer
+    acquired from the pool is reused after ``count`` further acquisitions, so
+    the data it holds must be consumed or copied before then.
+
+    :param size: The size of each buffer in bytes.
+    :param count: The number of buffers in the pool.
+    """
+
+    def __init__(self, size, count=8):
+        self.size = size
+        self._views = [memoryview(bytearray(size)) for _ in range(count)]
+        self._index = 0
+
+    def __len__(self):
+        return len(self._views)
+
+    def acquire(self):
+        """Returns a writable :class:`memoryview` of the next buffer."""
+
+        view = self._views[self._index]
+        self._index = (self._index + 1) % len(self._views)
+
+        return view
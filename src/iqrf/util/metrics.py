@@ -0,0 +1,252 @@
+# -*- coding: utf-8 -*-
+
+"""
+Metrics
+=======
+
+Counters and latency histograms of the transport channels, exportable in the
+Prometheus text format. Metrics are disabled unless a channel gets a
+:class:`TransportMetrics` attached, e.g. by :meth:`MetricsRegistry.attach`;
+a disabled channel only checks its ``metrics`` attribute for None.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import http.server
+import threading
+
+__all__ = [
+    "Histogram",
+    "TransportMetrics",
+    "MetricsRegistry",
+    "MetricsServer"
+]
+
+
+class Histogram:
+    """A log-linear histogram in the manner of HdrHistogram. Values are
+    counted in integer multiples of ``unit``; every power of two range is
+    split into ``2 ** precision`` buckets, so the relative error of the
+    reported percentiles is at most ``2 ** -precision``.
+
+    :param precision: The number of significant bits kept per value.
+    :param unit: The resolution of the recorded values.
+    """
+
+    def __init__(self, precision=5, unit=1e-6):
+        self.precision = precision
+        self.unit = unit
+
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+
+        self._buckets = 1 << precision
+        self._counts = [0] * (self._buckets * 2)
+
+    def __len__(self):
+        return self.count
+
+    def _index(self, value):
+        if value < self._buckets:
+            return value
+
+        shift = value.bit_length() - self.precision - 1
+        return shift * self._buckets + (value >> shift)
+
+    def _highest(self, index):
+        if index < self._buckets * 2:
+            return index
+
+        shift = index // self._buckets - 1
+        return ((index - shift * self._buckets + 1) << shift) - 1
+
+    def record(self, value):
+        """Records a non-negative value, e.g. a duration in seconds."""
+
+        index = self._index(max(int(value / self.unit), 0))
+
+        if index >= len(self._counts):
+            self._counts.extend([0] * (index + 1 - len(self._counts)))
+
+        self._counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Returns the highest value equivalent to the given percentile, or
+        None if nothing was recorded."""
+
+        if self.count == 0:
+            return None
+
+        rank = max(1, int(round(fraction * self.count)))
+        seen = 0
+
+        for index, count in enumerate(self._counts):
+            seen += count
+
+            if seen >= rank:
+                return min((self._highest(index) + 1) * self.unit, self.max)
+
+        return self.max
+
+
+class TransportMetrics:
+    """Counters and the send latency histogram of a single channel. The
+    counters are plain attributes incremented by the channel."""
+
+    COUNTERS = [
+        ("frames_in", "Frames received."),
+        ("frames_out", "Frames sent."),
+        ("bytes_in", "Bytes received."),
+        ("bytes_out", "Bytes sent."),
+        ("decode_errors", "Received frames which failed to decode."),
+        ("reactions_queued", "Reactions queued for the application."),
+        ("reactions_dropped", "Reactions dropped because the queue was full."),
+        ("status_polls", "Device status checks.")
+    ]
+
+    def __init__(self, transport, device):
+        self.transport = transport
+        self.device = device
+
+        for name, _ in self.COUNTERS:
+            setattr(self, name, 0)
+
+        self.send_latency = Histogram()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """A set of channel metrics rendered together."""
+
+    QUANTILES = (0.5, 0.9, 0.99, 0.999)
+    PREFIX = "iqrf_transport_"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = []
+
+    def __len__(self):
+        return len(self._metrics)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._metrics))
+
+    def transport(self, transport, device):
+        """Creates and registers metrics of a channel.
+
+        :param transport: The transport name, e.g. ``"cdc"``.
+        :param device: The device name, e.g. its port.
+        """
+
+        metrics = TransportMetrics(transport, device)
+
+        with self._lock:
+            self._metrics.append(metrics)
+
+        return metrics
+
+    def attach(self, io, device):
+        """Enables metrics of the channel. The transport name is derived from
+        the module of the channel class."""
+
+        transport = type(io).__module__.rpartition(".")[2].partition("_")[0]
+        io.metrics = self.transport(transport, device)
+
+        return io.metrics
+
+    def remove(self, metrics):
+        with self._lock:
+            self._metrics.remove(metrics)
+
+    def render(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+
+        lines = []
+        metrics = list(self)
+
+        for name, help in TransportMetrics.COUNTERS:
+            lines.append("# HELP {}{}_total {}".format(self.PREFIX, name, help))
+            lines.append("# TYPE {}{}_total counter".format(self.PREFIX, name))
+
+            for item in metrics:
+                lines.append("{}{}_total{{transport=\"{}\",device=\"{}\"}} {}".format(
+                    self.PREFIX, name, _escape(item.transport), _escape(item.device), getattr(item, name)))
+
+        name = self.PREFIX + "send_latency_seconds"
+        lines.append("# HELP {} Latency between sending a request and receiving its response.".format(name))
+        lines.append("# TYPE {} summary".format(name))
+
+        for item in metrics:
+            labels = "transport=\"{}\",device=\"{}\"".format(_escape(item.transport), _escape(item.device))
+            histogram = item.send_latency
+
+            for quantile in self.QUANTILES:
+                value = histogram.percentile(quantile)
+                lines.append("{}{{{},quantile=\"{}\"}} {}".format(name, labels, quantile, "NaN" if value is None else repr(value)))
+
+            lines.append("{}_sum{{{}}} {}".format(name, labels, repr(histogram.sum)))
+            lines.append("{}_count{{{}}} {}".format(name, labels, histogram.count))
+
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Serves the metrics of a registry over HTTP at ``/metrics`` from a
+    background thread.
+
+    :param host: The local address to listen on.
+    :param port: The local port to listen on, 0 picks a free one.
+    """
+
+    def __init__(self, registry, host="127.0.0.1", port=9108):
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = http.server.HTTPServer((host, port), Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args, **kwargs):
+        self.close()
+
+    @property
+    def address(self):
+        return self._server.server_address
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+"""
+Queue
+=====
+
+A bounded thread-safe queue used to hand over reactions received by
+background readers to their consumers.
+
+:copyright: (c) 2016 by Tomáš Rottenberg.
+:license:  Apache 2, see license.txt for more details.
+
+"""
+
+import collections
+import enum
+import threading
+
+from .io import IoError, IoTimeoutError
+
+__all__ = [
+    "OverflowPolicy",
+    "QueueOverflowError", "QueueClosedError",
+    "ReactionQueue"
+]
+
+
+class OverflowPolicy(enum.Enum):
+    """Determines what happens when an item is put into a full queue."""
+
+    DROP_OLDEST = 0
+    BLOCK = 1
+    RAISE = 2
+
+
+class QueueOverflowError(IoError):
+    """An error thrown when an item doesn't fit into a full queue."""
+
+    pass
+
+
+class QueueClosedError(IoError):
+    """An error thrown when getting an item from an empty closed queue."""
+
+    pass
+
+
+class ReactionQueue:
+    """A bounded FIFO queue with a configurable overflow policy.
+
+    :param maxsize: The maximal number of queued items or None for an
+        unbounded queue.
+    :param overflow: The :class:`OverflowPolicy` applied when the queue is
+        full.
+    """
+
+    def __init__(self, maxsize=1024, overflow=OverflowPolicy.DROP_OLDEST):
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.dropped = 0
+
+        self._items = collections.deque()
+        self._condition = threading.Condition()
+        self._error = None
+
+    def __len__(self):
+        return len(self._items)
+
+    def _full(self):
+        return self.maxsize is not None and len(self._items) >= self.maxsize
+
+    def put(self, item, timeout=None):
+        """Appends the item to the queue.
+
+        :param timeout: The number of seconds to wait for free space when the
+            :attr:`OverflowPolicy.BLOCK` policy is used.
+        :raises QueueOverflowError: If the queue is full and the policy is
+            :attr:`OverflowPolicy.RAISE`, or if no space was freed in time.
+        :raises QueueClosedError: If the queue is closed, also while waiting
+            for free space.
+        """
+
+        with self._condition:
+            if self._error is not None:
+                raise QueueClosedError("Queue is closed!")
+
+            if self._full():
+                if self.overflow == OverflowPolicy.DROP_OLDEST:
+                    self._items.popleft()
+                    self.dropped += 1
+                elif self.overflow == OverflowPolicy.RAISE:
+                    self.dropped += 1
+                    raise QueueOverflowError("Queue is full!")
+                elif not self._condition.wait_for(lambda: not self._full() or self._error is not None, timeout):
+                    raise QueueOverflowError("Queue is full!")
+                elif self._error is not None:
+                    raise QueueClosedError("Queue is closed!")
+
+            self._items.append(item)
+            self._condition.notify_all()
+
+    def get(self, timeout=None):
+        """Removes and returns the oldest item of the queue.
+
+        :raises IoTimeoutError: If no item arrived in time.
+        :raises QueueClosedError: If the queue is empty and closed.
+        """
+
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._items or self._error is not None, timeout):
+                raise IoTimeoutError
+
+            if not self._items:
+                raise self._error
+
+            item = self._items.popleft()
+            self._condition.notify_all()
+
+            return item
+
+    def close(self, error=None):
+        """Closes the queue. Queued items can still be retrieved, after which
+        :meth:`get` raises the given error."""
+
+        with self._condition:
+            self._error = error if error is not None else QueueClosedError("Queue is closed!")
+            self._condition.notify_all()
@@ -0,0 +1,54 @@
+import asyncio
+import os
+import pty
+import tty
+import unittest
+
+from iqrf.transport import cdc
+from iqrf.util.io import IoTimeoutError
+
+
+class AsyncCdcIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.io = self.loop.run_until_complete(cdc.open_async(os.ttyname(self.slave), loop=self.loop))
+
+    def tearDown(self):
+        self.io.close()
+        os.close(self.slave)
+        os.close(self.master)
+        self.loop.close()
+
+    def test_send_routes_reactions(self):
+        async def exchange():
+            self.loop.call_later(0.01, os.write, self.master, b"<DR\x03:Hi!\r<OK\r")
+            response = await self.io.send(cdc.TestRequest(), timeout=1)
+            reaction = await self.io.receive(timeout=1)
+            return response, reaction
+
+        response, reaction = self.loop.run_until_complete(exchange())
+
+        self.assertEqual(response, cdc.TestResponse())
+        self.assertEqual(reaction, cdc.DataReceivedReaction(b"Hi!"))
+        self.assertEqual(os.read(self.master, 1024), b">\r")
+
+    def test_iterate_reactions(self):
+        async def collect():
+            os.write(self.master, b"<DR\x01:a\r<DR\x01:b\r")
+            reactions = []
+            async for reaction in self.io:
+                reactions.append(reaction)
+                if len(reactions) == 2:
+                    break
+            return reactions
+
+        reactions = self.loop.run_until_complete(collect())
+
+        self.assertEqual(reactions, [cdc.DataReceivedReaction(b"a"), cdc.DataReceivedReaction(b"b")])
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.loop.run_until_complete(self.io.receive(timeout=0.05))
@@ -0,0 +1,114 @@
+import os
+import pty
+import threading
+import time
+import tty
+import unittest
+
+from iqrf.transport import cdc
+from iqrf.util.io import IoTimeoutError
+from iqrf.util.queue import OverflowPolicy, QueueOverflowError
+
+
+class PtyTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.io = cdc.BufferedCdcIo(os.ttyname(self.slave))
+
+    def tearDown(self):
+        self.io.close()
+        os.close(self.slave)
+        os.close(self.master)
+
+
+class RawCdcIoTests(PtyTestCase):
+
+    def test_read_available_data(self):
+        os.write(self.master, b"<OK\r")
+        self.assertEqual(self.io.read(1024, timeout=1), b"<OK\r")
+
+    def test_read_timeout(self):
+        start = time.monotonic()
+
+        with self.assertRaises(IoTimeoutError):
+            self.io.read(1024, timeout=0.1)
+
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+class BufferedCdcIoTests(PtyTestCase):
+
+    def test_send_returns_response(self):
+        os.write(self.master, b"<DR\x03:Hi!\r<OK\r")
+
+        self.assertEqual(self.io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse())
+        self.assertEqual(os.read(self.master, 1024), b">\r")
+        self.assertEqual(self.io.receive(timeout=1), cdc.DataReceivedReaction(b"Hi!"))
+
+    def test_receive_binary_payload(self):
+        payload = bytes(range(0x0a, 0x0e)) * 3
+        os.write(self.master, cdc.DataReceivedReaction(payload).encode() + b"<DR\x01:\r\r")
+
+        self.assertEqual(self.io.receive(timeout=1).data, payload)
+        self.assertEqual(self.io.receive(timeout=1).data, b"\r")
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.io.receive(timeout=0.05)
+
+
+class ThreadedCdcIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+
+    def tearDown(self):
+        os.close(self.slave)
+        os.close(self.master)
+
+    def test_send_and_receive(self):
+        with cdc.ThreadedCdcIo(os.ttyname(self.slave)) as io:
+            os.write(self.master, b"<DR\x03:Hi!\r")
+
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"Hi!"))
+
+            threading.Timer(0.02, os.write, (self.master, b"<DR\x01:a\r<OK\r")).start()
+
+            self.assertEqual(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse())
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"a"))
+
+    def test_send_timeout(self):
+        with cdc.ThreadedCdcIo(os.ttyname(self.slave)) as io:
+            with self.assertRaises(IoTimeoutError):
+                io.send(cdc.TestRequest(), timeout=0.05)
+
+    def test_overflow_drop_oldest(self):
+        with cdc.ThreadedCdcIo(os.ttyname(self.slave), queue_size=2) as io:
+            os.write(self.master, b"<DR\x01:a\r<DR\x01:b\r<DR\x01:c\r")
+            threading.Timer(0.02, os.write, (self.master, b"<OK\r")).start()
+            io.send(cdc.TestRequest(), timeout=1)
+
+            self.assertEqual(io.dropped, 1)
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"b"))
+
+    def test_overflow_raise(self):
+        with cdc.ThreadedCdcIo(os.ttyname(self.slave), queue_size=1, overflow=OverflowPolicy.RAISE) as io:
+            threading.Timer(0.02, os.write, (self.master, b"<DR\x01:a\r<DR\x01:b\r<OK\r")).start()
+            io.send(cdc.TestRequest(), timeout=1)
+
+            with self.assertRaises(QueueOverflowError):
+                io.receive(timeout=1)
+
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"a"))
+
+    def test_overflow_block_keeps_reading_responses(self):
+        with cdc.ThreadedCdcIo(os.ttyname(self.slave), queue_size=1, overflow=OverflowPolicy.BLOCK) as io:
+            threading.Timer(0.02, os.write, (self.master, b"<DR\x01:a\r<DR\x01:b\r<OK\r")).start()
+
+            self.assertEqual(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse())
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"a"))
+            self.assertEqual(io.receive(timeout=1), cdc.DataReceivedReaction(b"b"))
+            self.assertEqual(io.dropped, 0)
@@ -1,6 +1,6 @@
 import unittest
 
-from iqrf.transport import cdc
+from iqrf.transport import cdc, cdc_codec
 
 SIMPLE_MESSAGES = {
     b"<ERR\r": cdc.ErrorResponse(),
@@ -93,3 +93,103 @@ class EncoderDecoderTests(unittest.TestCase):
 
             self.assertEqual(re_decoded.encode(), encoded)
             self.assertEqual(cdc.decode_cdc_message(re_encoded), decoded)
+
+
+class BinaryPayloadTests(unittest.TestCase):
+
+    def test_payloads_containing_terminators(self):
+        for data in (b"\r", b"\x01\r\x02", b"\n\r:", bytes(range(256))[:13], bytes(range(10)), b"<OK\r"):
+            for message in (cdc.DataSendRequest(data), cdc.DataReceivedReaction(data)):
+                self.assertEqual(cdc.decode_cdc_message(message.encode()), message)
+
+    def test_length_byte_matching_identifier_letters(self):
+        message = cdc.DataReceivedReaction(b"\x00" * ord("A"))
+        self.assertEqual(cdc.decode_cdc_message(message.encode()), message)
+
+    def test_invalid_data_length(self):
+        for encoded in (b"<DR\x04:Hi!\r", b"<DR\x02:Hi!\r", b"<DR\x03Hi!\r", b"<DR\r"):
+            with self.assertRaises(cdc.CdcDecodeError):
+                cdc.decode_cdc_message(encoded)
+
+    def test_invalid_frames(self):
+        for encoded in (b"", b"\r", b"<OK", b"!OK\r", b"<XYZ\r", b">XYZ\r"):
+            with self.assertRaises(cdc.CdcDecodeError):
+                cdc.decode_cdc_message(encoded)
+
+    def test_tokens_are_views(self):
+        direction, identifier, parameter, value = cdc_codec.tokenize_cdc_message(b"<DR\x03:Hi!\r")
+
+        self.assertEqual((direction, identifier), (b"<", b"DR"))
+        self.assertIsInstance(value, memoryview)
+        self.assertEqual((bytes(parameter), bytes(value)), (b"\x03", b"Hi!"))
+
+    def test_find_frames(self):
+        stream = b"<DR\x03:\r\n\r\r" + b"<OK\r" + b">DS\x01:\r\r" + b"<DS:OK\r"
+        frames = []
+        start = 0
+
+        while start < len(stream):
+            end = cdc.find_cdc_frame(stream, start)
+            frames.append(stream[start:end])
+            start = end
+
+        self.assertEqual(frames, [b"<DR\x03:\r\n\r\r", b"<OK\r", b">DS\x01:\r\r", b"<DS:OK\r"])
+
+    def test_find_incomplete_frames(self):
+        for partial in (b"", b"<", b"<DR", b"<DR\x03", b"<DR\x03:\r\n\r\r"[:-1], b"<OK"):
+            self.assertEqual(cdc.find_cdc_frame(partial), -1)
+
+    def test_find_resynchronises_on_garbage(self):
+        self.assertEqual(cdc.find_cdc_frame(b"<DR\x01:ab\r<OK\r"), len(b"<DR\x01:ab\r"))
+
+
+class ValueTests(unittest.TestCase):
+
+    def test_equal_messages_hash_equally(self):
+        messages = {cdc.DataReceivedReaction(b"\x01"), cdc.DataReceivedReaction(bytearray(b"\x01")), cdc.DataSendRequest(b"\x01")}
+        self.assertEqual(len(messages), 2)
+        self.assertIn(cdc.DataReceivedReaction(b"\x01"), messages)
+        self.assertNotEqual(cdc.ResetResponse(cdc.CdcStatus.OK), cdc.IndicationResponse(cdc.CdcStatus.OK))
+        self.assertEqual(hash(cdc.InfoResponse("GW", "1.0", "01")), hash(cdc.InfoResponse("GW", "1.0", "01")))
+
+    def test_messages_are_immutable(self):
+        reaction = cdc.DataReceivedReaction(b"\x01")
+
+        with self.assertRaises(AttributeError):
+            reaction.data = b"\x02"
+
+        with self.assertRaises(AttributeError):
+            cdc.TestResponse().status = cdc.CdcStatus.ERROR
+
+        self.assertFalse(hasattr(reaction, "__dict__"))
+        self.assertFalse(hasattr(cdc.InfoResponse("GW", "1.0", "01"), "__dict__"))
+
+    def test_payload_less_messages_are_shared(self):
+        self.assertIs(cdc.TestRequest(), cdc.TestRequest())
+        self.assertIs(cdc.InfoRequest(), cdc.decode_cdc_message(b">I\r"))
+        self.assertIs(cdc.ErrorResponse(), cdc.decode_cdc_message(b"<ERR\r"))
+        self.assertIsNot(cdc.TestRequest(), cdc.ResetRequest())
+        self.assertEqual(cdc.ErrorResponse().status, cdc.CdcStatus.ERROR)
+
+
+class PreparedTests(unittest.TestCase):
+
+    def test_prepared_frames(self):
+        for message in (cdc.TestRequest(), cdc.SpiStatusRequest(), cdc.DataSendRequest(b"\x01\r\x02")):
+            prepared = message.prepare()
+
+            self.assertIs(prepared.type, type(message))
+            self.assertEqual(prepared.encode(), message.encode())
+
+    def test_substitute(self):
+        template = cdc.DataSendRequest(b"\x00\x00\x06\x01\xff\xff").prepare()
+        prepared = template.substitute(0, b"\x05\x00").substitute(3, b"\x00")
+
+        self.assertEqual(prepared.frame, cdc.DataSendRequest(b"\x05\x00\x06\x00\xff\xff").encode())
+        self.assertEqual(template.frame, cdc.DataSendRequest(b"\x00\x00\x06\x01\xff\xff").encode())
+
+        with self.assertRaises(ValueError):
+            template.substitute(5, b"\x00\x00")
+
+        with self.assertRaises(ValueError):
+            cdc.TestRequest().prepare().substitute(0, b"\x00")
@@ -0,0 +1,94 @@
+import pickle
+import unittest
+
+from iqrf import dpa
+
+LEDG_ON = bytes([0x01, 0x00, 0x07, 0x01, 0xff, 0xff])
+LEDG_ON_CONFIRMATION = bytes([0x01, 0x00, 0x07, 0x01, 0xff, 0xff, 0xff, 0x32, 0x01, 0x06, 0x01])
+LEDG_ON_RESPONSE = bytes([0x01, 0x00, 0x07, 0x81, 0x02, 0x00, 0x00, 0x32])
+OS_READ_RESPONSE = bytes([0x05, 0x00, 0x02, 0x80, 0x34, 0x12, 0x00, 0x40]) + bytes(range(12))
+ASYNC_REACTION = bytes([0x03, 0x00, 0x20, 0x81, 0xff, 0xff, 0x80, 0x00, 0xaa])
+
+
+class DpaRequestTests(unittest.TestCase):
+
+    def test_encode(self):
+        self.assertEqual(dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x01).encode(), LEDG_ON)
+
+    def test_decode(self):
+        request = dpa.DpaRequest.decode(LEDG_ON + b"\x05")
+
+        self.assertEqual(request, dpa.DpaRequest(1, 7, 1, 0xffff, b"\x05"))
+
+    def test_too_much_data(self):
+        with self.assertRaises(dpa.DpaEncodeError):
+            dpa.DpaRequest(1, 7, 1, pdata=bytes(57)).encode()
+
+
+class DecodeDpaMessageTests(unittest.TestCase):
+
+    def test_confirmation(self):
+        confirmation = dpa.decode_dpa_message(LEDG_ON_CONFIRMATION)
+
+        self.assertEqual(confirmation, dpa.DpaConfirmation(1, 7, 1, 0xffff, 0x32, 1, 6, 1))
+        self.assertEqual(confirmation.encode(), LEDG_ON_CONFIRMATION)
+        self.assertAlmostEqual(confirmation.response_timeout(0), 0.2)
+
+    def test_response(self):
+        response = dpa.decode_dpa_message(LEDG_ON_RESPONSE)
+
+        self.assertIsInstance(response, dpa.DpaResponse)
+        self.assertTrue(response.ok)
+        self.assertEqual(response.command, 0x01)
+        self.assertEqual((response.nadr, response.pnum, response.hwpid, response.dpa_value), (1, 7, 0x0002, 0x32))
+        self.assertEqual(response.encode(), LEDG_ON_RESPONSE)
+
+    def test_response_data_is_a_view(self):
+        buffer = bytearray(OS_READ_RESPONSE)
+        response = dpa.decode_dpa_message(memoryview(buffer))
+
+        self.assertIsInstance(response.pdata, memoryview)
+        self.assertEqual(response.pdata, bytes(range(12)))
+        self.assertEqual(response.hwpid, 0x1234)
+
+        buffer[8] = 0xff
+        self.assertEqual(response.pdata[0], 0xff)
+
+    def test_reaction(self):
+        reaction = dpa.decode_dpa_message(ASYNC_REACTION)
+
+        self.assertIsInstance(reaction, dpa.DpaReaction)
+        self.assertEqual(reaction.status, 0x00)
+        self.assertEqual(reaction.pdata, b"\xaa")
+
+    def test_invalid(self):
+        with self.assertRaises(dpa.DpaDecodeError):
+            dpa.decode_dpa_message(b"\x01\x00\x07")
+
+        with self.assertRaises(dpa.DpaDecodeError):
+            dpa.decode_dpa_message(LEDG_ON + b"\x00\x00")
+
+    def test_slots(self):
+        self.assertFalse(hasattr(dpa.decode_dpa_message(LEDG_ON_RESPONSE), "__dict__"))
+
+
+class ValueTests(unittest.TestCase):
+
+    def test_equal_messages_hash_equally(self):
+        decoded = dpa.decode_dpa_message(bytearray(OS_READ_RESPONSE))
+        response = dpa.DpaResponse(0x05, 0x02, 0x80, 0x1234, 0x00, 0x40, bytes(range(12)))
+
+        self.assertEqual(decoded, response)
+        self.assertEqual(hash(decoded), hash(response))
+        self.assertEqual(len({dpa.DpaRequest(1, 7, 1), dpa.DpaRequest(1, 7, 1), dpa.DpaRequest(2, 7, 1)}), 2)
+
+    def test_messages_are_immutable(self):
+        request = dpa.DpaRequest(1, 7, 1)
+
+        with self.assertRaises(AttributeError):
+            request.nadr = 2
+
+    def test_pickle_copies_data(self):
+        decoded = dpa.decode_dpa_message(bytearray(ASYNC_REACTION))
+
+        self.assertEqual(pickle.loads(pickle.dumps(decoded)), decoded)
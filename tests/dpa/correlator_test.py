@@ -0,0 +1,124 @@
+import collections
+import time
+import unittest
+
+from iqrf import dpa
+from iqrf.util.io import IoTimeoutError
+
+
+class FakeLink:
+
+    def __init__(self):
+        self.sent = []
+        self.inbound = collections.deque()
+
+    def send(self, frame, timeout=None):
+        self.sent.append(dpa.DpaRequest.decode(frame))
+
+    def receive(self, timeout=None):
+        if not self.inbound:
+            time.sleep(min(timeout, 0.005) if timeout is not None else 0.005)
+            raise IoTimeoutError
+
+        return self.inbound.popleft()
+
+
+def confirmation(request):
+    return dpa.DpaConfirmation(request.nadr, request.pnum, request.pcmd, request.hwpid, 0, 0, 1, 0).encode()
+
+
+def response(request, pdata=b"", hwpid=0x0002):
+    return dpa.DpaResponse(request.nadr, request.pnum, request.pcmd | 0x80, hwpid, pdata=pdata).encode()
+
+
+class DpaCorrelatorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.link = FakeLink()
+        self.correlator = dpa.DpaCorrelator(self.link, confirmation_timeout=0.2, coordinator_timeout=0.2, response_margin=0.1)
+
+    def test_pipelined_requests(self):
+        first = dpa.DpaRequest(1, dpa.DpaToken.PNUM_LEDG, 0x01)
+        second = dpa.DpaRequest(2, dpa.DpaToken.PNUM_LEDG, 0x01)
+
+        futures = [self.correlator.submit(first), self.correlator.submit(second)]
+        self.assertEqual(len(self.correlator), 2)
+
+        self.link.inbound.extend([confirmation(first), confirmation(second), response(second, b"\x02"), response(first, b"\x01")])
+        self.correlator.wait(futures, timeout=1)
+
+        self.assertEqual(futures[0].result().pdata, b"\x01")
+        self.assertEqual(futures[1].result().pdata, b"\x02")
+        self.assertEqual(len(self.correlator), 0)
+
+    def test_identical_requests_in_flight(self):
+        request = dpa.DpaRequest(1, dpa.DpaToken.PNUM_LEDG, 0x01)
+        routed = dpa.DpaConfirmation(1, dpa.DpaToken.PNUM_LEDG, 0x01, 0x0002, 0, 10, 6, 10).encode()
+
+        futures = [self.correlator.submit(request), self.correlator.submit(request)]
+        self.link.inbound.extend([routed, routed])
+
+        # Outlive the confirmation timeout, the responses take several hops.
+        deadline = time.monotonic() + 0.4
+        while time.monotonic() < deadline:
+            self.correlator.poll(timeout=0.05)
+
+        self.assertFalse(any(future.done() for future in futures))
+
+        self.link.inbound.extend([response(request, b"\x01"), response(request, b"\x02")])
+        self.correlator.wait(futures, timeout=1)
+
+        self.assertEqual([future.result().pdata for future in futures], [b"\x01", b"\x02"])
+
+    def test_reactions_are_separated(self):
+        request = dpa.DpaRequest(0, dpa.DpaToken.PNUM_OS, 0x00)
+        reaction = dpa.DpaReaction(3, 0x20, 0x81, 0xffff, 0x80, 0, b"\xaa")
+
+        self.link.inbound.extend([reaction.encode(), response(request)])
+
+        self.assertEqual(self.correlator.request(request, timeout=1).nadr, 0)
+        self.assertEqual(self.correlator.reactions.get(timeout=0), reaction)
+
+    def test_hwpid_must_match(self):
+        request = dpa.DpaRequest(1, dpa.DpaToken.PNUM_LEDG, 0x01, hwpid=0x1234)
+        future = self.correlator.submit(request)
+
+        self.link.inbound.extend([confirmation(request), response(request, hwpid=0x4321), response(request, hwpid=0x1234)])
+        self.correlator.wait([future], timeout=1)
+
+        self.assertEqual(future.result().hwpid, 0x1234)
+
+    def test_broadcast_resolves_with_confirmation(self):
+        request = dpa.DpaRequest(0xff, dpa.DpaToken.PNUM_LEDG, 0x01)
+        self.link.inbound.append(confirmation(request))
+
+        self.assertIsInstance(self.correlator.request(request, timeout=1), dpa.DpaConfirmation)
+
+    def test_missing_response(self):
+        request = dpa.DpaRequest(1, dpa.DpaToken.PNUM_LEDG, 0x01)
+        self.link.inbound.append(confirmation(request))
+
+        start = time.monotonic()
+
+        with self.assertRaises(IoTimeoutError):
+            self.correlator.request(request, timeout=5)
+
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(len(self.correlator), 0)
+
+
+class SimulatedCoordinatorTests(unittest.TestCase):
+
+    def test_requests_over_simulated_spi(self):
+        from iqrf.simulator.common import LinkProfile, SimulatedCoordinator
+        from iqrf.simulator.spi import SimulatedTrModule
+
+        coordinator = SimulatedCoordinator(LinkProfile(latency=0.01, jitter=0.01, seed=7))
+        coordinator.handlers[(dpa.DpaToken.PNUM_OS, 0x00)] = lambda request: bytes([request.nadr])
+        module = SimulatedTrModule(coordinator=coordinator)
+        correlator = dpa.DpaCorrelator(dpa.SpiDpaLink(module.open(interrupt=True)))
+
+        futures = [correlator.submit(dpa.DpaRequest(nadr, dpa.DpaToken.PNUM_OS, 0x00)) for nadr in range(1, 6)]
+        correlator.wait(futures, timeout=2)
+
+        self.assertEqual([future.result().pdata for future in futures], [bytes([nadr]) for nadr in range(1, 6)])
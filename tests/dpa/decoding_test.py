@@ -0,0 +1,59 @@
+import math
+import struct
+import unittest
+import unittest.mock
+
+from iqrf.dpa import decoding
+
+PAYLOADS = [struct.pack("<BhIB", 0x01, value, value * 1000 & 0xffffffff, 0xaa) for value in (-0x8000, -16, 0, 400, 0x7fff)]
+
+
+class DecodingTests(unittest.TestCase):
+    """Checks both decoding paths: NumPy, if installed, and the fallback."""
+
+    def paths(self):
+        yield
+        with unittest.mock.patch.object(decoding, "numpy", None):
+            yield
+
+    def test_unpack_bitmap(self):
+        for _ in self.paths():
+            self.assertEqual(list(decoding.unpack_bitmap(b"\x05\x80")), [1, 0, 1, 0, 0, 0, 0, 0] + [0] * 7 + [1])
+            self.assertEqual(list(decoding.unpack_bitmap(b"\xff", 3)), [1, 1, 1])
+            self.assertEqual(list(decoding.bitmap_indices(b"\x06\x00\x01")), [1, 2, 16])
+
+    def test_decode_array(self):
+        data = struct.pack("<hhH", -2, 300, 0xffff)
+
+        for _ in self.paths():
+            self.assertEqual(list(decoding.decode_array(data, "h", count=2)), [-2, 300])
+            self.assertEqual(list(decoding.decode_array(data, "H", offset=4)), [0xffff])
+            self.assertEqual(list(decoding.decode_array(data, "B", offset=5)), [0xff])
+
+            with self.assertRaises(ValueError):
+                decoding.decode_array(data, "i", offset=4, count=1)
+
+            with self.assertRaises(ValueError):
+                decoding.decode_array(data, "q")
+
+    def test_decode_column(self):
+        for _ in self.paths():
+            self.assertEqual(list(decoding.decode_column(PAYLOADS, "h", 1)), [-0x8000, -16, 0, 400, 0x7fff])
+            self.assertEqual(list(decoding.decode_column(PAYLOADS, "i", 3)), [-0x8000 * 1000, -16000, 0, 400000, 0x7fff * 1000])
+            self.assertEqual(list(decoding.decode_column(PAYLOADS + [PAYLOADS[1] + b"\x00"], "h", 1))[-1], -16)
+            self.assertEqual(list(decoding.decode_column([], "h")), [])
+
+            with self.assertRaises(ValueError):
+                decoding.decode_column([b"\x00"], "h")
+
+    def test_decode_quantity(self):
+        for _ in self.paths():
+            temperatures = list(decoding.decode_quantity(PAYLOADS, 0x01, 1))
+
+            self.assertTrue(math.isnan(temperatures[0]))
+            self.assertEqual(temperatures[1:], [-1.0, 0.0, 25.0, 0x7fff / 16])
+
+            humidity = list(decoding.decode_quantity([b"\x50", b"\xee"], decoding.SENSOR_QUANTITIES[0x80]))
+
+            self.assertEqual(humidity[0], 40.0)
+            self.assertTrue(math.isnan(humidity[1]))
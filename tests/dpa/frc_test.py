@@ -0,0 +1,193 @@
+import collections
+import struct
+import time
+import unittest
+
+from iqrf import dpa
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.common import LinkProfile, SimulatedCoordinator
+from iqrf.transport import cdc
+from iqrf.util.io import IoTimeoutError, time_left, to_deadline
+
+
+class CoordinatorLink:
+    """Passes DPA frames straight to a simulated coordinator, delivering its
+    answers after their delay."""
+
+    def __init__(self, coordinator):
+        self.coordinator = coordinator
+        self.inbound = collections.deque()
+
+    def send(self, frame, timeout=None):
+        self.coordinator.handle(frame, lambda data, delay: self.inbound.append((time.monotonic() + delay, data)))
+
+    def receive(self, timeout=None):
+        deadline = to_deadline(timeout)
+
+        while not self.inbound or self.inbound[0][0] > time.monotonic():
+            if time_left(deadline) == 0:
+                raise IoTimeoutError
+
+            time.sleep(0.005)
+
+        return self.inbound.popleft()[1]
+
+
+class SimulatedFrc:
+    """Registers FRC handlers answering with the values of the nodes."""
+
+    def __init__(self, coordinator, values):
+        self.values = values
+        self.rounds = []
+        self._data = bytes(64)
+
+        coordinator.handlers[(dpa.DpaToken.PNUM_FRC, dpa.FrcToken.CMD_SEND)] = self._send
+        coordinator.handlers[(dpa.DpaToken.PNUM_FRC, dpa.FrcToken.CMD_SEND_SELECTIVE)] = self._send_selective
+        coordinator.handlers[(dpa.DpaToken.PNUM_FRC, dpa.FrcToken.CMD_EXTRA_RESULT)] = lambda request: self._data[55:]
+
+    def _results(self, command, slots):
+        data = bytearray(64)
+        size = dpa.frc_result_size(command)
+        slots = [(index, node) for index, node in slots if size == 2 or (index + 1) * size // 8 <= 64]
+
+        for index, node in slots:
+            value = self.values.get(node, 0)
+
+            if size == 2:
+                data[index >> 3] |= (value & 1) << (index & 7)
+                data[32 + (index >> 3)] |= (value >> 1) << (index & 7)
+            elif size == 8:
+                data[index] = value
+            else:
+                struct.pack_into("<H", data, index * 2, value)
+
+        self._data = bytes(data)
+        responded = sum(1 for _, node in slots if node in self.values)
+
+        return bytes([responded]) + self._data[:55]
+
+    def _send(self, request):
+        self.rounds.append(None)
+        return self._results(request.pdata[0], [(node, node) for node in range(1, 240)])
+
+    def _send_selective(self, request):
+        selection = bytes(request.pdata[1:31])
+        nodes = [node for node in range(240) if selection[node >> 3] >> (node & 7) & 1]
+        self.rounds.append(nodes)
+
+        return self._results(request.pdata[0], list(enumerate(nodes, 1)))
+
+
+class FrcDecodeTests(unittest.TestCase):
+
+    def test_result_sizes(self):
+        self.assertEqual([dpa.frc_result_size(command) for command in (0x00, 0x7f, 0x80, 0xdf, 0xe0, 0xff)], [2, 2, 8, 8, 16, 16])
+
+    def test_decode_bits(self):
+        data = bytearray(64)
+        data[0] = 0b00000010
+        data[32] = 0b00000110
+        data[29] = 0x80
+        data[61] = 0x80
+
+        self.assertEqual(list(dpa.decode_frc_results(data, 2, [1, 2, 3, 239])), [3, 2, 0, 3])
+
+    def test_decode_bytes_and_words(self):
+        data = bytes(range(64))
+
+        self.assertEqual(list(dpa.decode_frc_results(data, 8, [1, 63])), [1, 63])
+        self.assertEqual(list(dpa.decode_frc_results(data, 16, [1, 31])), [0x0302, 0x3f3e])
+
+    def test_decode_short_data(self):
+        with self.assertRaises(ValueError):
+            dpa.decode_frc_results(bytes(55), 8, [55])
+
+
+class FrcCollectorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = SimulatedCoordinator()
+        correlator = dpa.DpaCorrelator(CoordinatorLink(self.coordinator), coordinator_timeout=0.2)
+        self.collector = dpa.FrcCollector(correlator)
+
+    def test_bits_in_one_round(self):
+        frc = SimulatedFrc(self.coordinator, {node: node % 4 for node in range(1, 240)})
+        result = self.collector.collect(dpa.FrcToken.COMMAND_PING, range(1, 240))
+
+        self.assertEqual(result.rounds, 1)
+        self.assertEqual(frc.rounds, [None])
+        self.assertEqual(result.responded, 239)
+        self.assertEqual(result.as_dict(), {node: node % 4 for node in range(1, 240)})
+
+    def test_bytes_split_into_rounds(self):
+        values = {node: node for node in range(1, 201)}
+        frc = SimulatedFrc(self.coordinator, values)
+        result = self.collector.collect(dpa.FrcToken.COMMAND_TEMPERATURE, values)
+
+        self.assertEqual(result.rounds, 4)
+        self.assertEqual([len(nodes) for nodes in frc.rounds], [63, 63, 63, 11])
+        self.assertEqual(list(result.nodes), list(range(1, 201)))
+        self.assertEqual(list(result.values), list(range(1, 201)))
+
+    def test_words(self):
+        values = {node: node * 257 for node in range(20, 100, 3)}
+        SimulatedFrc(self.coordinator, values)
+        result = self.collector.collect(0xe0, values)
+
+        self.assertEqual(result.rounds, 1)
+        self.assertEqual(result.as_dict(), values)
+
+    def test_low_addresses_use_non_selective_round(self):
+        frc = SimulatedFrc(self.coordinator, {5: 0x21, 60: 0x22})
+        result = self.collector.collect(dpa.FrcToken.COMMAND_TEMPERATURE, [5, 60])
+
+        self.assertEqual(frc.rounds, [None])
+        self.assertEqual(result.as_dict(), {5: 0x21, 60: 0x22})
+
+    def test_slow_round(self):
+        coordinator = SimulatedCoordinator(LinkProfile(latency=2.2))
+        SimulatedFrc(coordinator, {1: 1, 2: 3})
+        collector = dpa.FrcCollector(dpa.DpaCorrelator(CoordinatorLink(coordinator)))
+
+        self.assertEqual(collector.collect(dpa.FrcToken.COMMAND_PING, [1, 2]).as_dict(), {1: 1, 2: 3})
+
+    def test_too_much_user_data(self):
+        SimulatedFrc(self.coordinator, {})
+
+        with self.assertRaises(dpa.FrcError):
+            self.collector.send(dpa.FrcToken.COMMAND_PING, user_data=bytes(31))
+
+        with self.assertRaises(dpa.FrcError):
+            self.collector.send(dpa.FrcToken.COMMAND_PING, [1], user_data=bytes(26))
+
+        self.assertEqual(self.coordinator.requests, [])
+
+    def test_failed_round(self):
+        self.coordinator.handlers[(dpa.DpaToken.PNUM_FRC, dpa.FrcToken.CMD_SEND)] = lambda request: b"\xfe" + bytes(55)
+
+        with self.assertRaises(dpa.FrcError):
+            self.collector.collect(dpa.FrcToken.COMMAND_PING, [1])
+
+    def test_invalid_nodes(self):
+        for nodes in ([], [0], [240]):
+            with self.assertRaises(ValueError):
+                self.collector.collect(dpa.FrcToken.COMMAND_PING, nodes)
+
+
+class FrcOverCdcTests(unittest.TestCase):
+
+    def test_collect(self):
+        coordinator = SimulatedCoordinator()
+        values = {node: node for node in range(1, 80)}
+        SimulatedFrc(coordinator, values)
+
+        device = SimulatedCdcDevice(coordinator=coordinator)
+        self.addCleanup(device.close)
+        io = cdc.open(device.port)
+        self.addCleanup(io.close)
+
+        collector = dpa.FrcCollector(dpa.DpaCorrelator(dpa.CdcDpaLink(io)))
+        result = collector.collect(dpa.FrcToken.COMMAND_TEMPERATURE, values, timeout=5)
+
+        self.assertEqual(result.rounds, 2)
+        self.assertEqual(result.as_dict(), values)
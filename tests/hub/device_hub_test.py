@@ -0,0 +1,181 @@
+import os
+import pty
+import socket
+import threading
+import time
+import tty
+import unittest
+
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.transport import cdc, device_hub, spi, udp
+from iqrf.util.io import IoError, IoTimeoutError
+from iqrf.util.metrics import TransportMetrics
+
+
+class FakeDongle:
+
+    def __init__(self):
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+    def write(self, data):
+        os.write(self.master, data)
+
+    def read(self):
+        return os.read(self.master, 1024)
+
+    def close(self):
+        os.close(self.slave)
+        os.close(self.master)
+
+
+class DeviceHubTests(unittest.TestCase):
+
+    DONGLES = 32
+
+    def setUp(self):
+        self.hub = device_hub.DeviceHub()
+        self.dongles = [FakeDongle() for _ in range(self.DONGLES)]
+
+    def tearDown(self):
+        self.hub.close()
+
+        for dongle in self.dongles:
+            dongle.close()
+
+    def test_routes_reactions_from_many_dongles(self):
+        devices = [self.hub.add_cdc(dongle.port) for dongle in self.dongles]
+
+        for round in range(4):
+            for i, dongle in enumerate(self.dongles):
+                payload = bytes([0x20 + i, 0x20 + round])
+                dongle.write(b"<DR\x02:" + payload + b"\r")
+
+        for i, device in enumerate(devices):
+            received = [device.receive(timeout=1).data for _ in range(4)]
+            self.assertEqual(received, [bytes([0x20 + i, 0x20 + round]) for round in range(4)])
+
+    def test_send_to_many_dongles(self):
+        devices = [self.hub.add_cdc(dongle.port, name=i) for i, dongle in enumerate(self.dongles)]
+
+        for i, dongle in enumerate(self.dongles):
+            dongle.write(b"<DR\x01:" + bytes([0x20 + i]) + b"\r")
+
+        for i, device in enumerate(devices):
+            threading.Timer(0.005, self.dongles[i].write, (b"<OK\r",)).start()
+
+            self.assertEqual(device.send(cdc.TestRequest(), timeout=1), cdc.TestResponse())
+            self.assertEqual(self.dongles[i].read(), b">\r")
+
+        for i in range(self.DONGLES):
+            self.assertEqual(self.hub[i].receive(timeout=0), cdc.DataReceivedReaction(bytes([0x20 + i])))
+
+    def test_run_with_handler(self):
+        self.hub.add_cdc(self.dongles[0].port, name="first")
+        self.hub.add_cdc(self.dongles[1].port, name="second")
+        received = []
+
+        def handler(device, reaction):
+            received.append((device.name, reaction.data))
+
+            if len(received) == 2:
+                self.hub.stop()
+
+        self.dongles[1].write(b"<DR\x01:b\r")
+        self.dongles[0].write(b"<DR\x01:a\r")
+
+        thread = threading.Thread(target=self.hub.run, args=(handler,))
+        thread.start()
+        thread.join(2)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(sorted(received), [("first", b"a"), ("second", b"b")])
+
+    def test_receive_timeout(self):
+        device = self.hub.add_cdc(self.dongles[0].port)
+
+        with self.assertRaises(IoTimeoutError):
+            device.receive(timeout=0.02)
+
+    def test_spi_status_interval(self):
+        self.hub.close()
+        self.hub = device_hub.DeviceHub(spi_interval=0.2)
+        tr = self.hub.add_spi(SimulatedTrModule().open())
+        tr.io.metrics = TransportMetrics("spi", "tr")
+        dongle = self.hub.add_cdc(self.dongles[0].port)
+
+        self.hub.poll(0)
+
+        # Reactions of other devices wake the poll without checking SPI.
+        for _ in range(5):
+            self.dongles[0].write(b"<DR\x01:c\r")
+            self.hub.poll(1)
+
+        self.assertEqual(len(dongle), 5)
+        self.assertEqual(tr.io.metrics.status_polls, 1)
+
+        start = time.monotonic()
+        self.hub.poll(1)
+
+        self.assertEqual(tr.io.metrics.status_polls, 2)
+        self.assertLess(time.monotonic() - start, 0.5)
+
+    def test_disconnected_dongle_is_removed(self):
+        device = self.hub.add_cdc(self.dongles[0].port)
+        self.dongles[0].close()
+        self.dongles[0] = FakeDongle()
+
+        with self.assertRaises(IoError):
+            device.receive(timeout=1)
+
+        self.assertEqual(len(self.hub), 0)
+
+    def test_removed_udp_device_is_unregistered(self):
+        gateway = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        gateway.bind(("127.0.0.1", 0))
+        self.addCleanup(gateway.close)
+
+        remote = self.hub.add_udp(*gateway.getsockname())
+        self.hub.remove(remote)
+
+        self.assertEqual(len(self.hub.udp_hub), 0)
+        self.hub.add_udp(*gateway.getsockname())
+        remote.close()
+
+    def test_duplicate_name(self):
+        self.hub.add_cdc(self.dongles[0].port, name="dongle")
+
+        with self.assertRaises(ValueError):
+            self.hub.add_cdc(self.dongles[1].port, name="dongle")
+
+    def test_mixed_transports(self):
+        module = SimulatedTrModule()
+        gateway = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        gateway.bind(("127.0.0.1", 0))
+        self.addCleanup(gateway.close)
+
+        dongle = self.hub.add_cdc(self.dongles[0].port)
+        tr = self.hub.add_spi(module.open())
+        remote = self.hub.add_udp(*gateway.getsockname())
+
+        self.dongles[0].write(b"<DR\x01:c\r")
+        module.push_reaction(b"s")
+        gateway.sendto(udp.DataReceivedReaction(b"u").encode(), ("127.0.0.1", self.hub.udp_hub.address[1]))
+
+        self.assertEqual(remote.receive(timeout=1).data, b"u")
+        self.assertEqual(tr.receive(timeout=1).data, b"s")
+        self.assertEqual(dongle.receive(timeout=1).data, b"c")
+
+        self.assertEqual(tr.send(spi.DataSendRequest(b"\x01\x02"), timeout=1), spi.DataSendResponse())
+        self.assertEqual(module.sent, [b"\x01\x02"])
+
+        def respond():
+            request, address = gateway.recvfrom(1024)
+            request = udp.decode_udp_message(request)
+            gateway.sendto(udp.DataSendResponse(udp.UdpToken.SUBCMD_OK, (request.pacid + 1) & 0xffff).encode(), address)
+            gateway.sendto(udp.DataSendResponse(udp.UdpToken.SUBCMD_OK, request.pacid).encode(), address)
+
+        threading.Thread(target=respond).start()
+
+        self.assertTrue(remote.send(udp.DataSendRequest(b"\x01"), timeout=1).ok)
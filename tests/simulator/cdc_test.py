@@ -0,0 +1,89 @@
+import unittest
+
+from iqrf import dpa
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.common import LinkProfile, SimulatedCoordinator
+from iqrf.transport import cdc
+from iqrf.util.io import IoTimeoutError
+
+
+class SimulatedCdcDeviceTests(unittest.TestCase):
+
+    def open(self, **kwargs):
+        device = SimulatedCdcDevice(**kwargs)
+        self.addCleanup(device.close)
+
+        io = cdc.open(device.port)
+        self.addCleanup(io.close)
+
+        return device, io
+
+    def test_basic_requests(self):
+        device, io = self.open(info=("GW-USB-06", "2.10", "0000000A"))
+
+        self.assertEqual(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse())
+        self.assertEqual(io.send(cdc.InfoRequest(), timeout=1), cdc.InfoResponse("GW-USB-06", "2.10", "0000000A"))
+        self.assertEqual(io.send(cdc.TrInfoRequest(), timeout=1).info, device.tr_info)
+        self.assertEqual(io.send(cdc.ResetRequest(), timeout=1), cdc.ResetResponse(cdc.CdcStatus.OK))
+
+    def test_prepared_requests(self):
+        device, io = self.open()
+        test = cdc.TestRequest().prepare()
+        template = cdc.DataSendRequest(b"\x00\x01").prepare()
+
+        for i in range(3):
+            self.assertEqual(io.send(test, timeout=1), cdc.TestResponse())
+            self.assertEqual(io.send(template.substitute(0, bytes([i])), timeout=1).status, cdc.CdcStatus.OK)
+
+        self.assertEqual(device.sent, [b"\x00\x01", b"\x01\x01", b"\x02\x01"])
+
+    def test_data_send_with_terminator(self):
+        device, io = self.open()
+
+        response = io.send(cdc.DataSendRequest(b"\x01\r\x02"), timeout=1)
+
+        self.assertEqual(response.status, cdc.CdcStatus.OK)
+        self.assertEqual(device.sent, [b"\x01\r\x02"])
+
+    def test_busy(self):
+        device, io = self.open(profile=LinkProfile(busy=1.0))
+
+        self.assertEqual(io.send(cdc.DataSendRequest(b"\x01"), timeout=1).status, cdc.CdcStatus.BUSY)
+        self.assertEqual(device.sent, [])
+
+    def test_coordinator_answers(self):
+        coordinator = SimulatedCoordinator(LinkProfile(latency=0.01))
+        coordinator.handlers[(dpa.DpaToken.PNUM_OS, 0x00)] = lambda request: b"\x11\x22\x33"
+        _, io = self.open(coordinator=coordinator)
+
+        io.send(cdc.DataSendRequest(dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_OS, 0x00).encode()), timeout=1)
+
+        confirmation = dpa.decode_dpa_message(io.receive(timeout=1).data)
+        response = dpa.decode_dpa_message(io.receive(timeout=1).data)
+
+        self.assertIsInstance(confirmation, dpa.DpaConfirmation)
+        self.assertEqual(response, dpa.DpaResponse(0x01, dpa.DpaToken.PNUM_OS, 0x80, 0x0000, pdata=b"\x11\x22\x33"))
+
+    def test_response_lengths(self):
+        coordinator = SimulatedCoordinator()
+        _, io = self.open(coordinator=coordinator)
+
+        # The DPA frames are 8 to 15 bytes long, including the CR and LF
+        # length bytes.
+        for length in range(8):
+            coordinator.handlers[(dpa.DpaToken.PNUM_OS, 0x00)] = lambda request: bytes(range(0x0a, 0x0a + length))
+            io.send(cdc.DataSendRequest(dpa.DpaRequest(0x00, dpa.DpaToken.PNUM_OS, 0x00).encode()), timeout=1)
+
+            response = dpa.decode_dpa_message(io.receive(timeout=1).data)
+            self.assertEqual(response.pdata, bytes(range(0x0a, 0x0a + length)))
+
+    def test_lost_response(self):
+        coordinator = SimulatedCoordinator(LinkProfile(loss=1.0))
+        _, io = self.open(coordinator=coordinator)
+
+        io.send(cdc.DataSendRequest(dpa.DpaRequest(0x01, dpa.DpaToken.PNUM_LEDG, 0x01).encode()), timeout=1)
+
+        self.assertIsInstance(dpa.decode_dpa_message(io.receive(timeout=1).data), dpa.DpaConfirmation)
+
+        with self.assertRaises(IoTimeoutError):
+            io.receive(timeout=0.05)
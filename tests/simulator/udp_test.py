@@ -0,0 +1,68 @@
+import socket
+import unittest
+
+from iqrf import dpa
+from iqrf.simulator.common import LinkProfile, SimulatedCoordinator
+from iqrf.simulator.udp import SimulatedUdpGateway
+from iqrf.transport import udp
+
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class SimulatedUdpGatewayTests(unittest.TestCase):
+
+    def open(self, reliable=False, **kwargs):
+        gateway = SimulatedUdpGateway(**kwargs)
+        self.addCleanup(gateway.close)
+
+        io = udp.open("127.0.0.1", free_port(), buffered=True, reliable=reliable)
+        io.remote_address = gateway.address
+        self.addCleanup(io.close)
+
+        return gateway, io
+
+    def test_identification(self):
+        _, io = self.open(identification=b"GW-ETH-02A 1.0")
+
+        response = io.send(udp.IdentificationRequest(), timeout=1)
+
+        self.assertTrue(response.ok)
+        self.assertEqual(response.data, b"GW-ETH-02A 1.0")
+
+    def test_busy(self):
+        gateway, io = self.open(profile=LinkProfile(busy=1.0))
+
+        self.assertFalse(io.send(udp.DataSendRequest(b"\x01"), timeout=1).ok)
+        self.assertEqual(gateway.sent, [])
+
+    def test_retransmits_over_lossy_link(self):
+        gateway, io = self.open(reliable=True, profile=LinkProfile(loss=0.3, seed=3))
+        io.rtt.min_rto = 0.005
+        io.rtt.rto = 0.01
+
+        for i in range(20):
+            self.assertTrue(io.send(udp.DataSendRequest(bytes([i])), timeout=2).ok)
+
+        self.assertEqual(gateway.sent, [bytes([i]) for i in range(20)])
+        self.assertGreater(io.retransmitted, 0)
+
+    def test_coordinator_answers(self):
+        gateway, io = self.open(coordinator=SimulatedCoordinator())
+        link = dpa.UdpDpaLink(io)
+
+        link.send(dpa.DpaRequest(0x00, dpa.DpaToken.PNUM_COORDINATOR, 0x01).encode(), timeout=1)
+
+        self.assertEqual(dpa.decode_dpa_message(link.receive(timeout=1)), dpa.DpaResponse(0x00, 0x00, 0x81, 0x0000))
+
+    def test_reaction_rate(self):
+        _, io = self.open(profile=LinkProfile(reaction_rate=200, seed=1))
+
+        io.send(udp.StatusRequest(), timeout=1)
+
+        for _ in range(5):
+            self.assertIsInstance(dpa.decode_dpa_message(io.receive(timeout=1).data), dpa.DpaReaction)
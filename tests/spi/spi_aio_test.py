@@ -0,0 +1,56 @@
+import asyncio
+import collections
+import unittest
+
+from iqrf.transport import spi
+from iqrf.util.io import IoTimeoutError
+
+
+class FakeSpiIo:
+
+    def __init__(self):
+        self.sent = []
+        self.reactions = collections.deque()
+        self.closed = False
+
+    def send(self, message, timeout=None):
+        self.sent.append(message)
+        return spi.DataSendResponse()
+
+    def receive(self, timeout=None):
+        if not self.reactions:
+            raise IoTimeoutError
+
+        return self.reactions.popleft()
+
+    def close(self):
+        self.closed = True
+
+
+class AsyncSpiIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.fake = FakeSpiIo()
+        self.io = spi.AsyncSpiIo(self.fake, loop=self.loop)
+
+    def tearDown(self):
+        self.loop.run_until_complete(self.io.close())
+        self.loop.close()
+
+    def test_send(self):
+        request = spi.DataSendRequest(b"\x01")
+        response = self.loop.run_until_complete(self.io.send(request, timeout=1))
+
+        self.assertEqual(response, spi.DataSendResponse())
+        self.assertEqual(self.fake.sent, [request])
+
+    def test_receive_waits_for_reaction(self):
+        self.loop.call_later(0.05, self.fake.reactions.append, spi.DataReceivedReaction(b"\x02"))
+        reaction = self.loop.run_until_complete(self.io.receive(timeout=1))
+
+        self.assertEqual(reaction, spi.DataReceivedReaction(b"\x02"))
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.loop.run_until_complete(self.io.receive(timeout=0.05))
@@ -0,0 +1,119 @@
+import unittest
+
+from iqrf.transport import spi
+from iqrf.transport.spi_codec import calculate_crc, _DataReceiveRequest, _DataReceiveResponse
+
+
+def reference_crc(data):
+    crc = 0x5f
+    for byte in data:
+        crc ^= byte
+
+    return crc
+
+
+def reference_frame(command, command_type, data):
+    frame = [command, command_type] + list(data)
+    return bytes(frame + [reference_crc(frame), 0x00])
+
+
+def response_frame(direction, data):
+    command_type = (direction << 7) | len(data)
+    return bytes([0x00, 0x00] + list(data) + [reference_crc(data) ^ command_type, 0x3f])
+
+
+class CrcTests(unittest.TestCase):
+
+    def test_matches_reference(self):
+        for length in range(0, 70):
+            data = bytes((i * 37 + length) & 0xff for i in range(length))
+            self.assertEqual(calculate_crc(data, 0, length), reference_crc(data))
+            self.assertEqual(calculate_crc(list(data), 0, length), reference_crc(data))
+            self.assertEqual(calculate_crc(memoryview(data), 0, length), reference_crc(data))
+
+    def test_long_input(self):
+        for length in (255, 256, 257, 300, 600, 4097):
+            data = bytes((i * 37 + length) & 0xff for i in range(length))
+            self.assertEqual(calculate_crc(data, 0, length), reference_crc(data))
+
+
+class EncoderTests(unittest.TestCase):
+
+    def test_tr_info_request(self):
+        self.assertEqual(spi.TrInfoRequest().encode(), reference_frame(0xf5, 0x10, bytes(16)))
+
+    def test_data_receive_requests(self):
+        for length in range(1, 65):
+            self.assertEqual(_DataReceiveRequest(length).encode(), reference_frame(0xf0, length, bytes(length)))
+
+        with self.assertRaises(spi.SpiEncodeError):
+            _DataReceiveRequest(65).encode()
+
+    def test_data_send_request(self):
+        for length in range(1, 65):
+            data = bytes(range(length))
+            self.assertEqual(spi.DataSendRequest(data).encode(), reference_frame(0xf0, 0x80 | length, data))
+
+        with self.assertRaises(spi.SpiEncodeError):
+            spi.DataSendRequest(b"").encode()
+
+
+class DecoderTests(unittest.TestCase):
+
+    def test_tr_info_response(self):
+        info = bytes(range(16))
+        self.assertEqual(spi.TrInfoResponse.decode(response_frame(0, info)), spi.TrInfoResponse(info))
+
+    def test_data_receive_response(self):
+        data = b"\x01\x00\x07\x80"
+        self.assertEqual(_DataReceiveResponse.decode(memoryview(response_frame(0, data))).data, data)
+
+    def test_data_send_response(self):
+        self.assertEqual(spi.DataSendResponse.decode(response_frame(1, b"\x01\x02")), spi.DataSendResponse())
+
+    def test_invalid_crc(self):
+        frame = bytearray(response_frame(0, b"\x01\x02"))
+        frame[-2] ^= 0xff
+
+        with self.assertRaises(spi.SpiDecodeError):
+            _DataReceiveResponse.decode(frame)
+
+    def test_invalid_status(self):
+        frame = bytearray(response_frame(1, b"\x01\x02"))
+        frame[-1] = 0x3e
+
+        with self.assertRaises(spi.SpiDecodeError):
+            spi.DataSendResponse.decode(frame)
+
+
+class ValueTests(unittest.TestCase):
+
+    def test_equal_messages_hash_equally(self):
+        messages = {spi.DataReceivedReaction(b"\x01"), spi.DataReceivedReaction([0x01]), spi.DataSendRequest(b"\x01")}
+        self.assertEqual(len(messages), 2)
+        self.assertEqual(hash(_DataReceiveRequest(2)), hash(_DataReceiveRequest(2)))
+
+    def test_messages_are_immutable(self):
+        request = spi.DataSendRequest(b"\x01")
+
+        with self.assertRaises(AttributeError):
+            request.data = b"\x02"
+
+        self.assertFalse(hasattr(request, "__dict__"))
+
+    def test_payload_less_messages_are_shared(self):
+        self.assertIs(spi.TrInfoRequest(), spi.TrInfoRequest())
+        self.assertIs(spi.DataSendResponse.decode(response_frame(1, b"\x01")), spi.DataSendResponse())
+
+
+class PreparedTests(unittest.TestCase):
+
+    def test_prepared_frames(self):
+        self.assertEqual(spi.TrInfoRequest().prepare().encode(), spi.TrInfoRequest().encode())
+        self.assertEqual(spi.DataSendRequest(b"\x01\x02").prepare().encode(), spi.DataSendRequest(b"\x01\x02").encode())
+
+    def test_substitute_updates_crc(self):
+        template = spi.DataSendRequest(b"\x00\x00\x06\x01").prepare()
+
+        self.assertIsInstance(template, spi.PreparedSpiRequest)
+        self.assertEqual(template.substitute(1, b"\x07\x08").encode(), spi.DataSendRequest(b"\x00\x07\x08\x01").encode())
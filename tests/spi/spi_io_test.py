@@ -0,0 +1,137 @@
+import ctypes
+import importlib
+import sys
+import unittest
+import unittest.mock
+
+from periphery import spi as periphery_spi
+
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.transport import spi
+from iqrf.util.io import IoTimeoutError, PollingScheduler
+
+
+class FakeSpidev:
+    """Records the transfer descriptors submitted through ioctl and answers
+    with the transmitted bytes incremented by one."""
+
+    def __init__(self):
+        self.requests = []
+        self.messages = []
+
+    def ioctl(self, fd, request, address):
+        count = ((request >> 16) & 0x3fff) // ctypes.sizeof(periphery_spi._CSpiIocTransfer)
+        transfers = (periphery_spi._CSpiIocTransfer * count).from_address(address)
+
+        self.requests.append(request)
+        self.messages.append([(t.len, t.delay_usecs, t.cs_change, t.speed_hz) for t in transfers])
+
+        for transfer in transfers:
+            if transfer.len > 0:
+                data = (ctypes.c_ubyte * transfer.len).from_address(transfer.tx_buf)
+                for i in range(transfer.len):
+                    data[i] = (data[i] + 1) & 0xff
+
+        return 0
+
+
+class SpiTransferEngineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.spidev = FakeSpidev()
+        self.engine = spi.SpiTransferEngine(3, ioctl=self.spidev.ioctl)
+
+    def test_single_ioctl_per_packet(self):
+        self.assertEqual(self.engine.transfer(b"\x00\x01\x02\xff"), b"\x01\x02\x03\x00")
+        self.assertEqual(len(self.spidev.requests), 1)
+        self.assertEqual(self.spidev.requests[0], spi.spi_ioc_message(5))
+        self.assertEqual(self.spidev.messages[0], [
+            (0, 5, 0, 250000),
+            (1, 150, 0, 250000),
+            (1, 150, 0, 250000),
+            (1, 150, 0, 250000),
+            (1, 5, 0, 250000)
+        ])
+
+    def test_single_byte(self):
+        self.assertEqual(self.engine.transfer([0x00]), b"\x01")
+        self.assertEqual(self.spidev.messages[0], [(0, 5, 0, 250000), (1, 150, 0, 250000)])
+
+    def test_descriptors_reused(self):
+        self.engine.transfer(b"\x00\x00")
+        self.engine.transfer(bytearray(b"\x05\x06"))
+
+        self.assertIs(self.engine._message(2), self.engine._message(2))
+        self.assertEqual(len(self.spidev.requests), 2)
+
+    def test_message_request_numbers(self):
+        self.assertEqual(spi.spi_ioc_message(1), periphery_spi.SPI._SPI_IOC_MESSAGE_1)
+        self.assertEqual(spi.spi_ioc_message(2), 0x40406b00)
+
+    def test_invalid_data(self):
+        with self.assertRaises(ValueError):
+            self.engine.transfer([0x100])
+
+        with self.assertRaises(ValueError):
+            self.engine.transfer(b"")
+
+
+class BufferedSpiIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.module = SimulatedTrModule()
+        self.io = self.module.open()
+
+    def tearDown(self):
+        self.io.close()
+
+    def test_tr_info(self):
+        self.assertEqual(self.io.send(spi.TrInfoRequest(), timeout=1), spi.TrInfoResponse(self.module.tr_info))
+
+    def test_send_buffers_pending_reactions(self):
+        self.module.push_reaction(b"\x01\x02\x03")
+
+        self.assertEqual(self.io.send(spi.DataSendRequest(b"\x04\x05"), timeout=1), spi.DataSendResponse())
+        self.assertEqual(self.module.sent, [b"\x04\x05"])
+        self.assertEqual(self.io.receive(timeout=0).data, b"\x01\x02\x03")
+
+    def test_receive_all_lengths(self):
+        for length in range(1, 65):
+            self.module.push_reaction(bytes(range(length)))
+            self.assertEqual(self.io.receive(timeout=1).data, bytes(range(length)))
+
+    def test_receive_with_interrupt(self):
+        io = self.module.open(interrupt=True)
+        self.module.push_reaction(b"\x01", delay=0.02)
+
+        self.assertEqual(io.receive(timeout=1).data, b"\x01")
+
+    def test_interrupt_edge_consumed(self):
+        scheduler = PollingScheduler(spin=0, initial_interval=0.02, maximum_interval=0.02)
+        io = self.module.open(scheduler=scheduler, interrupt=True)
+        self.addCleanup(io.close)
+
+        self.module.push_reaction(b"\x01")
+        io.receive(timeout=1)
+
+        with self.assertRaises(IoTimeoutError):
+            io.receive(timeout=0.1)
+
+        # A pending edge would have woken every wait immediately.
+        self.assertLess(io._scheduler.iterations, 20)
+        self.assertIsNone(scheduler.wakeup)
+        self.assertEqual(scheduler.iterations, 0)
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.io.receive(timeout=0.01)
+
+
+class PlatformTests(unittest.TestCase):
+
+    def test_import_on_other_platforms(self):
+        with unittest.mock.patch.object(sys, "platform", "darwin"):
+            importlib.reload(spi)
+
+            with self.assertRaises(NotImplementedError):
+                spi.RawSpiIo("/dev/spidev0.0")
@@ -0,0 +1,64 @@
+import os
+import socket
+import subprocess
+import sys
+import unittest
+
+import iqrf.transport
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.transport import cdc, udp
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class OpenTests(unittest.TestCase):
+
+    def test_cdc(self):
+        with SimulatedCdcDevice() as device, iqrf.transport.open("cdc://" + device.port) as io:
+            self.assertIsInstance(io, cdc.BufferedCdcIo)
+            self.assertIsInstance(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse)
+
+    def test_udp(self):
+        with iqrf.transport.open("udp://127.0.0.1:{}".format(free_port()), buffered=True) as io:
+            self.assertIsInstance(io, udp.BufferedUdpIo)
+            self.assertEqual(io.remote_address[0], "127.0.0.1")
+
+    def test_invalid_urls(self):
+        for url in ("usb:///dev/ttyACM0", "cdc://", "udp://127.0.0.1", "udp:///dev/ttyACM0"):
+            with self.assertRaises(ValueError, msg=url):
+                iqrf.transport.open(url)
+
+
+class LazyImportTests(unittest.TestCase):
+    """Tracks which modules a program using a single transport loads."""
+
+    SCRIPT = """
+import sys
+import iqrf.transport
+loaded = set(sys.modules)
+iqrf.transport.open(sys.argv[1]).close()
+print(" ".join(sorted(loaded)))
+print(" ".join(sorted(sys.modules)))
+"""
+
+    def modules(self, url):
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+        output = subprocess.check_output([sys.executable, "-c", self.SCRIPT, url], env=environment).decode()
+        package, opened = output.splitlines()
+
+        return set(package.split()), set(opened.split())
+
+    def test_udp(self):
+        package, opened = self.modules("udp://127.0.0.1:{}".format(free_port()))
+
+        for module in ("iqrf.transport.cdc_codec", "iqrf.transport.udp_io", "serial", "periphery", "asyncio", "urllib.parse"):
+            self.assertNotIn(module, package)
+
+        self.assertIn("iqrf.transport.udp_io", opened)
+
+        for module in ("iqrf.transport.cdc_codec", "iqrf.transport.spi_codec", "serial", "periphery", "asyncio"):
+            self.assertNotIn(module, opened)
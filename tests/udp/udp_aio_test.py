@@ -0,0 +1,35 @@
+import asyncio
+import socket
+import unittest
+
+from iqrf.transport import udp
+from iqrf.util.io import IoTimeoutError
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+class AsyncUdpIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        self.io = self.loop.run_until_complete(udp.open_async("127.0.0.1", free_port(), loop=self.loop))
+
+    def tearDown(self):
+        self.io.close()
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+
+    def test_send_and_receive(self):
+        async def exchange():
+            await self.io.send(b"\x01\x02")
+            return await self.io.receive(timeout=1)
+
+        self.assertEqual(self.loop.run_until_complete(exchange()), b"\x01\x02")
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.loop.run_until_complete(self.io.receive(timeout=0.05))
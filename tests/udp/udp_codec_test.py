@@ -0,0 +1,109 @@
+import unittest
+
+from iqrf.transport import udp
+
+LEDG_ON = bytes([0x22, 0x3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x6, 0x1, 0x0, 0x7, 0x1, 0xff, 0xff, 0xc2, 0xf9])
+LEDG_OFF = bytes([0x22, 0x3, 0x0, 0x0, 0x0, 0x0, 0x0, 0x0, 0x6, 0x1, 0x0, 0x7, 0x0, 0xff, 0xff, 0xf5, 0xc9])
+
+
+class UdpCodecTests(unittest.TestCase):
+
+    def test_crc16(self):
+        self.assertEqual(udp.calculate_crc16(LEDG_ON[:-2]), 0xc2f9)
+        self.assertEqual(udp.calculate_crc16(LEDG_OFF[:-2]), 0xf5c9)
+
+    def test_encode_data_send(self):
+        self.assertEqual(udp.DataSendRequest(LEDG_ON[9:15], pacid=0).encode(), LEDG_ON)
+        self.assertEqual(udp.DataSendRequest(LEDG_OFF[9:15]).encode(), LEDG_OFF)
+
+    def test_encode_pacid_big_endian(self):
+        frame = udp.StatusRequest(pacid=0x1234).encode()
+
+        self.assertEqual(frame[:9], bytes([0x22, 0x2, 0x0, 0x0, 0x0, 0x12, 0x34, 0x0, 0x0]))
+
+    def test_encode_invalid_pacid(self):
+        with self.assertRaises(udp.UdpEncodeError):
+            udp.StatusRequest(pacid=0x10000).encode()
+
+    def test_prepared_request(self):
+        prepared = udp.DataSendRequest(LEDG_OFF[9:15]).prepare()
+
+        self.assertEqual(prepared.encode(), LEDG_OFF)
+        self.assertEqual(prepared.encode(0x1234), udp.DataSendRequest(LEDG_OFF[9:15], pacid=0x1234).encode())
+        self.assertEqual(prepared.substitute(3, b"\x01").encode(), LEDG_ON)
+
+    def test_encode_request_assigns_pacids(self):
+        pacids = iter(range(1, 10))
+        prepared = udp.StatusRequest().prepare()
+
+        self.assertEqual(udp.encode_udp_request(prepared, lambda: next(pacids)), (1, udp.StatusRequest(pacid=1).encode()))
+        self.assertEqual(udp.encode_udp_request(prepared, lambda: next(pacids))[0], 2)
+        self.assertEqual(udp.encode_udp_request(udp.StatusRequest(pacid=7), lambda: next(pacids))[0], 7)
+
+        request = udp.StatusRequest()
+
+        self.assertEqual(udp.encode_udp_request(request, lambda: next(pacids)), (3, udp.StatusRequest(pacid=3).encode()))
+        self.assertEqual(udp.encode_udp_request(request, lambda: next(pacids))[0], 4)
+        self.assertIsNone(request.pacid)
+
+        with self.assertRaises(TypeError):
+            udp.encode_udp_request(udp.DataSendResponse(), lambda: next(pacids))
+
+    def test_decode_round_trip(self):
+        messages = [
+            udp.IdentificationRequest(pacid=1),
+            udp.IdentificationResponse(udp.UdpToken.SUBCMD_OK, 1, b"GW-ETH-02A"),
+            udp.StatusResponse(udp.UdpToken.SUBCMD_OK, 2, b"\x00\x01"),
+            udp.DataSendRequest(b"\x01\x00\x07\x01\xff\xff", pacid=3),
+            udp.DataSendResponse(udp.UdpToken.SUBCMD_ERROR_FULL, 3),
+            udp.DataReceivedReaction(b"\x00\x00\x06\x81", pacid=4)
+        ]
+
+        for message in messages:
+            decoded = udp.decode_udp_message(message.encode())
+
+            self.assertEqual(decoded, message)
+            self.assertEqual(decoded.pacid, message.pacid)
+
+    def test_decode_returns_view(self):
+        message = udp.decode_udp_message(LEDG_ON)
+
+        self.assertIsInstance(message, udp.DataSendRequest)
+        self.assertIsInstance(message.data, memoryview)
+        self.assertEqual(message.data, LEDG_ON[9:15])
+
+    def test_value_semantics(self):
+        message = udp.DataReceivedReaction(b"\x01", pacid=1)
+
+        self.assertEqual(message, udp.DataReceivedReaction(b"\x01", pacid=1))
+        self.assertNotEqual(message, udp.DataReceivedReaction(b"\x01", pacid=2))
+        self.assertEqual(len({message, udp.DataReceivedReaction(b"\x01", pacid=1)}), 1)
+
+        with self.assertRaises(AttributeError):
+            message.pacid = 2
+
+    def test_detach(self):
+        buffer = bytearray(LEDG_ON)
+        message = udp.decode_udp_message(buffer)
+        detached = message.detach()
+        buffer[12] = 0x00
+
+        self.assertIsInstance(detached.data, bytes)
+        self.assertEqual(detached, udp.DataSendRequest(LEDG_ON[9:15], pacid=0))
+        self.assertIs(detached.detach(), detached)
+        self.assertNotEqual(message, detached)
+
+    def test_decode_response_status(self):
+        self.assertTrue(udp.decode_udp_message(udp.DataSendResponse(udp.UdpToken.SUBCMD_OK).encode()).ok)
+        self.assertFalse(udp.decode_udp_message(udp.DataSendResponse(udp.UdpToken.SUBCMD_ERROR_CRC).encode()).ok)
+
+    def test_decode_invalid(self):
+        corrupted = bytearray(LEDG_ON)
+        corrupted[12] ^= 0x01
+        unknown = udp.DataSendRequest(b"").encode()
+        unknown = bytes([0x22, 0x7f]) + unknown[2:-2]
+        unknown += udp.calculate_crc16(unknown).to_bytes(2, "big")
+
+        for data in (LEDG_ON[:10], LEDG_ON[:-1], LEDG_ON + b"\x00", bytes(corrupted), unknown):
+            with self.assertRaises(udp.UdpDecodeError):
+                udp.decode_udp_message(data)
@@ -0,0 +1,109 @@
+import selectors
+import socket
+import time
+import unittest
+
+from iqrf.transport import udp
+from iqrf.util.io import IoTimeoutError
+
+
+class UdpHubTests(unittest.TestCase):
+
+    def setUp(self):
+        self.hub = udp.UdpHub(host="127.0.0.1")
+        self.sockets = []
+
+        for _ in range(3):
+            gateway = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+            gateway.bind(("127.0.0.1", 0))
+            gateway.settimeout(1)
+            self.sockets.append(gateway)
+
+    def tearDown(self):
+        for gateway in self.sockets:
+            gateway.close()
+
+        self.hub.close()
+
+    def register(self, **kwargs):
+        return [self.hub.register(*gateway.getsockname(), **kwargs) for gateway in self.sockets]
+
+    def test_send_tracks_pacid_per_gateway(self):
+        first, second, _ = self.register()
+
+        self.assertEqual(first.send(udp.StatusRequest()), 1)
+        self.assertEqual(first.send(udp.StatusRequest()), 2)
+        self.assertEqual(second.send(udp.StatusRequest()), 1)
+
+        frames = [self.sockets[0].recv(1024), self.sockets[0].recv(1024), self.sockets[1].recv(1024)]
+
+        self.assertEqual([udp.decode_udp_message(frame).pacid for frame in frames], [1, 2, 1])
+
+    def test_demultiplexes_by_source(self):
+        gateways = self.register()
+
+        for i, gateway in enumerate(self.sockets):
+            gateway.sendto(udp.DataReceivedReaction(bytes([i]), pacid=i).encode(), self.hub.address)
+
+        for i, gateway in reversed(list(enumerate(gateways))):
+            self.assertEqual(gateway.receive(timeout=1), udp.DataReceivedReaction(bytes([i]), pacid=i))
+
+        with self.assertRaises(IoTimeoutError):
+            gateways[0].receive(timeout=0.01)
+
+    def test_non_blocking_receive(self):
+        gateway = self.register()[0]
+
+        with self.assertRaises(IoTimeoutError):
+            gateway.receive(timeout=0)
+
+        self.sockets[0].sendto(udp.DataReceivedReaction(b"\x01", pacid=1).encode(), self.hub.address)
+        # Loopback delivery is immediate, the pause only guards against
+        # scheduling delays.
+        time.sleep(0.01)
+
+        self.assertEqual(gateway.receive(timeout=0), udp.DataReceivedReaction(b"\x01", pacid=1))
+
+    def test_callbacks(self):
+        received = []
+        gateways = self.register(callback=lambda gateway, message: received.append((gateway, bytes(message.data))))
+
+        self.sockets[1].sendto(udp.DataReceivedReaction(b"\x01").encode(), self.hub.address)
+        self.sockets[2].sendto(udp.DataReceivedReaction(b"\x02").encode(), self.hub.address)
+
+        while len(received) < 2:
+            self.hub.poll(1)
+
+        self.assertEqual(sorted(received, key=lambda item: item[1]), [(gateways[1], b"\x01"), (gateways[2], b"\x02")])
+
+    def test_drops_unknown_and_invalid(self):
+        gateway = self.register()[0]
+        self.hub.unregister(self.hub.register("127.0.0.1", 1))
+
+        unknown = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        unknown.sendto(udp.DataReceivedReaction(b"").encode(), self.hub.address)
+        unknown.close()
+        self.sockets[0].sendto(b"\x22\x04", self.hub.address)
+        self.sockets[0].sendto(udp.DataReceivedReaction(b"\x01").encode(), self.hub.address)
+
+        self.assertEqual(gateway.receive(timeout=1).data, b"\x01")
+        self.assertEqual((self.hub.unknown, self.hub.invalid), (1, 1))
+
+    def test_duplicate_registration(self):
+        self.register()
+
+        with self.assertRaises(ValueError):
+            self.hub.register(*self.sockets[0].getsockname())
+
+    def test_selector(self):
+        gateway = self.register()[2]
+
+        with selectors.DefaultSelector() as selector:
+            selector.register(self.hub, selectors.EVENT_READ)
+            self.assertEqual(selector.select(0), [])
+
+            self.sockets[2].sendto(udp.DataReceivedReaction(b"\x07").encode(), self.hub.address)
+
+            self.assertEqual(len(selector.select(1)), 1)
+            self.assertEqual(self.hub.poll(0), 1)
+            self.assertEqual(len(gateway), 1)
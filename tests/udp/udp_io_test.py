@@ -0,0 +1,147 @@
+import socket
+import threading
+import unittest
+
+from iqrf.transport import udp
+from iqrf.util.io import IoTimeoutError
+from iqrf.util.metrics import TransportMetrics
+
+from .udp_aio_test import free_port
+
+
+class RawUdpIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.port = free_port()
+        self.io = udp.open("127.0.0.1", self.port)
+        self.sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def tearDown(self):
+        self.sender.close()
+        self.io.close()
+
+    def test_receive_returns_view(self):
+        self.sender.sendto(b"\x01\x02\x03", ("127.0.0.1", self.port))
+        datagram = self.io.receive(timeout=1)
+
+        self.assertIsInstance(datagram, memoryview)
+        self.assertEqual(datagram, b"\x01\x02\x03")
+
+    def test_receive_many(self):
+        for i in range(5):
+            self.sender.sendto(bytes([i]), ("127.0.0.1", self.port))
+
+        datagrams = []
+        while len(datagrams) < 5:
+            datagrams.extend(bytes(datagram) for datagram in self.io.receive_many(timeout=1))
+
+        self.assertEqual(datagrams, [bytes([i]) for i in range(5)])
+
+    def test_receive_many_is_capped_by_pool(self):
+        for i in range(udp.RawUdpIo.POOL_SIZE + 4):
+            self.sender.sendto(bytes([i]), ("127.0.0.1", self.port))
+
+        datagrams = self.io.receive_many(timeout=1)
+
+        self.assertLessEqual(len(datagrams), udp.RawUdpIo.POOL_SIZE)
+        self.assertEqual(len(set(bytes(datagram) for datagram in datagrams)), len(datagrams))
+
+    def test_receive_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            self.io.receive(timeout=0.01)
+
+        self.sender.sendto(b"\x01", ("127.0.0.1", self.port))
+        self.assertEqual(self.io.receive(timeout=1), b"\x01")
+
+
+class BufferedUdpIoTests(unittest.TestCase):
+
+    def setUp(self):
+        self.gateway = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.gateway.bind(("127.0.0.1", 0))
+        self.gateway.settimeout(1)
+        self.io = udp.open("127.0.0.1", free_port(), buffered=True)
+        self.io.remote_address = self.gateway.getsockname()
+
+    def tearDown(self):
+        self.gateway.close()
+        self.io.close()
+
+    def reply(self, *messages):
+        request, address = self.gateway.recvfrom(1024)
+        request = udp.decode_udp_message(request)
+
+        for message in messages:
+            self.gateway.sendto(message.encode(request.pacid if message.pacid is None else None), address)
+
+        return request
+
+    def test_send_waits_for_matching_response(self):
+        stale = udp.DataSendResponse(udp.UdpToken.SUBCMD_OK, 0xffff)
+        reaction = udp.DataReceivedReaction(b"\x01\x02", pacid=0)
+        response = udp.DataSendResponse(udp.UdpToken.SUBCMD_OK)
+        thread = threading.Thread(target=self.reply, args=(stale, reaction, response))
+        thread.start()
+
+        received = self.io.send(udp.DataSendRequest(b"\x01\x00\x07\x01\xff\xff"), timeout=1)
+        thread.join()
+
+        self.assertIsInstance(received, udp.DataSendResponse)
+        self.assertTrue(received.ok)
+        self.assertEqual(self.io.receive(timeout=1), reaction)
+
+    def test_undecodable_datagrams_are_dropped(self):
+        self.io.metrics = TransportMetrics("udp", "gateway")
+        corrupt = bytearray(udp.DataReceivedReaction(b"\x01").encode())
+        corrupt[-1] ^= 0xff
+
+        def reply():
+            address = self.gateway.recvfrom(1024)[1]
+            self.gateway.sendto(bytes(corrupt), address)
+            self.gateway.sendto(b"\x00", address)
+            self.gateway.sendto(udp.StatusResponse(udp.UdpToken.SUBCMD_OK, 1, b"\x00").encode(), address)
+            self.gateway.sendto(bytes(corrupt), address)
+            self.gateway.sendto(udp.DataReceivedReaction(b"\x02", pacid=2).encode(), address)
+
+        thread = threading.Thread(target=reply)
+        thread.start()
+
+        self.assertTrue(self.io.send(udp.StatusRequest(), timeout=1).ok)
+        self.assertEqual(self.io.receive(timeout=1), udp.DataReceivedReaction(b"\x02", pacid=2))
+        thread.join()
+
+        self.assertEqual(self.io.metrics.decode_errors, 3)
+
+    def test_send_prepared_request(self):
+        response = udp.DataSendResponse(udp.UdpToken.SUBCMD_OK)
+        thread = threading.Thread(target=self.reply, args=(response,))
+        thread.start()
+
+        received = self.io.send(udp.DataSendRequest(b"\x01\x00\x07\x01\xff\xff").prepare(), timeout=1)
+        thread.join()
+
+        self.assertTrue(received.ok)
+
+    def test_pacid_increments(self):
+        request = udp.StatusRequest()
+
+        for _ in range(2):
+            with self.assertRaises(IoTimeoutError):
+                self.io.send(request, timeout=0.01)
+
+        first, second = (udp.decode_udp_message(self.gateway.recv(1024)).pacid for _ in range(2))
+
+        self.assertEqual(second, (first + 1) & 0xffff)
+        self.assertIsNone(request.pacid)
+
+    def test_receive_many(self):
+        address = self.io.socket.getsockname()
+
+        for i in range(3):
+            self.gateway.sendto(udp.DataReceivedReaction(bytes([i]), pacid=i).encode(), ("127.0.0.1", address[1]))
+
+        reactions = []
+        while len(reactions) < 3:
+            reactions.extend(self.io.receive_many(timeout=1))
+
+        self.assertEqual([bytes(reaction.data) for reaction in reactions], [b"\x00", b"\x01", b"\x02"])
@@ -0,0 +1,124 @@
+import socket
+import threading
+import unittest
+
+from iqrf.transport import udp
+from iqrf.util.io import IoTimeoutError
+
+from .udp_aio_test import free_port
+
+
+class LossyGateway(threading.Thread):
+    """Answers data send requests, ignoring the first ``drop`` datagrams and
+    answering every request ``copies`` times."""
+
+    def __init__(self, drop=0, copies=1):
+        super().__init__(daemon=True)
+
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(("127.0.0.1", 0))
+        self.socket.settimeout(0.05)
+        self.drop = drop
+        self.copies = copies
+        self.received = []
+        self.running = True
+
+    def run(self):
+        while self.running:
+            try:
+                frame, address = self.socket.recvfrom(1024)
+            except socket.timeout:
+                continue
+
+            request = udp.decode_udp_message(frame)
+            self.received.append(request.pacid)
+
+            if len(self.received) <= self.drop:
+                continue
+
+            for _ in range(self.copies):
+                self.socket.sendto(udp.DataSendResponse(udp.UdpToken.SUBCMD_OK, request.pacid).encode(), address)
+
+    def stop(self):
+        self.running = False
+        self.join()
+        self.socket.close()
+
+
+class RttEstimatorTests(unittest.TestCase):
+
+    def test_rfc6298(self):
+        rtt = udp.RttEstimator(initial_rto=1.0, min_rto=0.0, max_rto=60.0)
+        self.assertEqual(rtt.rto, 1.0)
+
+        rtt.update(0.1)
+        self.assertAlmostEqual(rtt.srtt, 0.1)
+        self.assertAlmostEqual(rtt.rttvar, 0.05)
+        self.assertAlmostEqual(rtt.rto, 0.3)
+
+        rtt.update(0.2)
+        self.assertAlmostEqual(rtt.rttvar, 0.75 * 0.05 + 0.25 * 0.1)
+        self.assertAlmostEqual(rtt.srtt, 0.875 * 0.1 + 0.125 * 0.2)
+        self.assertAlmostEqual(rtt.rto, rtt.srtt + 4 * rtt.rttvar)
+
+    def test_bounds_and_backoff(self):
+        rtt = udp.RttEstimator(min_rto=0.02, max_rto=0.1)
+
+        rtt.update(0.0001)
+        self.assertEqual(rtt.rto, 0.02)
+
+        for _ in range(5):
+            rtt.backoff()
+
+        self.assertEqual(rtt.rto, 0.1)
+
+
+class ReliableUdpIoTests(unittest.TestCase):
+
+    def open(self, gateway, **kwargs):
+        io = udp.open("127.0.0.1", free_port(), reliable=True, **kwargs)
+        io.remote_address = gateway.socket.getsockname()
+        self.addCleanup(io.close)
+
+        return io
+
+    def start(self, **kwargs):
+        gateway = LossyGateway(**kwargs)
+        gateway.start()
+        self.addCleanup(gateway.stop)
+
+        return gateway
+
+    def test_retransmits_lost_requests(self):
+        gateway = self.start(drop=2)
+        io = self.open(gateway, rtt=udp.RttEstimator(initial_rto=0.02))
+
+        response = io.send(udp.DataSendRequest(b"\x01"), timeout=2)
+
+        self.assertTrue(response.ok)
+        self.assertEqual(gateway.received, [response.pacid] * 3)
+        self.assertEqual((io.sent, io.retransmitted, io.lost), (3, 2, 0))
+        self.assertEqual(io.rtt.samples, 0)
+
+        io.send(udp.DataSendRequest(b"\x01"), timeout=2)
+        self.assertEqual(io.rtt.samples, 1)
+
+    def test_gives_up(self):
+        gateway = self.start(drop=100)
+        io = self.open(gateway, max_retransmissions=2, rtt=udp.RttEstimator(initial_rto=0.01))
+
+        with self.assertRaises(IoTimeoutError):
+            io.send(udp.DataSendRequest(b"\x01"), timeout=2)
+
+        self.assertEqual((io.sent, io.retransmitted, io.lost), (3, 2, 1))
+
+    def test_drops_duplicates(self):
+        gateway = self.start(copies=2)
+        io = self.open(gateway)
+
+        first = io.send(udp.DataSendRequest(b"\x01"), timeout=2)
+        second = io.send(udp.DataSendRequest(b"\x02"), timeout=2)
+
+        self.assertEqual(second.pacid, first.pacid + 1)
+        self.assertEqual(io.duplicates, 1)
+        self.assertAlmostEqual(io.loss_ratio, 0.0)
@@ -0,0 +1,170 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.transport import cdc, spi
+from iqrf.util.capture import (
+    CaptureEndError, CaptureError, CaptureReader, CaptureRecord, CaptureReplay, CaptureToken, CaptureWriter,
+    capture_files, read_capture
+)
+from iqrf.util.io import IoTimeoutError
+
+IN = CaptureToken.DIRECTION_IN
+OUT = CaptureToken.DIRECTION_OUT
+
+
+class CaptureTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "trace.cap")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+
+class CaptureFileTests(CaptureTestCase):
+
+    def roundtrip(self, compress):
+        with CaptureWriter(self.path, compress=compress) as writer:
+            writer.outgoing(b">DS\x01:\x0d\r")
+            writer.incoming(bytearray(b"<DS:OK\r"))
+            writer.exchange(b"\x00", b"\x80")
+
+        with CaptureReader(self.path) as reader:
+            self.assertEqual(reader.compressed, compress)
+            records = [(direction, bytes(data)) for _, direction, data in reader]
+            timestamps = [record.timestamp for record in reader]
+
+        self.assertEqual(records, [(OUT, b">DS\x01:\x0d\r"), (IN, b"<DS:OK\r"), (OUT, b"\x00"), (IN, b"\x80")])
+        self.assertEqual(timestamps, sorted(timestamps))
+        self.assertAlmostEqual(timestamps[0], time.time(), delta=5)
+
+    def test_roundtrip(self):
+        self.roundtrip(False)
+
+    def test_compressed_roundtrip(self):
+        self.roundtrip(True)
+
+    def test_long_chunk_is_split(self):
+        data = bytes(range(256)) * 300
+
+        with CaptureWriter(self.path, compress=True) as writer:
+            writer.incoming(data)
+
+        self.assertEqual(b"".join(record.data for record in read_capture(self.path)), data)
+
+    def test_truncated_record_is_ignored(self):
+        with CaptureWriter(self.path) as writer:
+            writer.incoming(b"first")
+            writer.incoming(b"second")
+
+        with open(self.path, "r+b") as file:
+            file.truncate(os.path.getsize(self.path) - 1)
+
+        self.assertEqual([record.data for record in read_capture(self.path)], [b"first"])
+
+    def test_invalid_file(self):
+        with open(self.path, "wb") as file:
+            file.write(b"\x00" * 64)
+
+        with self.assertRaises(CaptureError):
+            CaptureReader(self.path)
+
+    def test_rotation(self):
+        with CaptureWriter(self.path, max_size=100, backup_count=2) as writer:
+            for i in range(10):
+                writer.incoming(bytes([i]) * 40)
+
+        files = capture_files(self.path)
+        self.assertEqual(files, [self.path + ".2", self.path + ".1", self.path])
+        self.assertFalse(os.path.exists(self.path + ".3"))
+
+        data = [record.data[0] for record in read_capture(self.path)]
+        self.assertEqual(data, sorted(data))
+        self.assertEqual(data[-1], 9)
+
+
+class CaptureReplayTests(unittest.TestCase):
+
+    def test_speed(self):
+        replay = CaptureReplay([CaptureRecord(100.0, IN, b"a"), CaptureRecord(100.2, IN, b"b")], speed=2.0)
+        start = time.monotonic()
+
+        self.assertEqual(replay.read(timeout=1).data, b"a")
+        self.assertEqual(replay.read(timeout=1).data, b"b")
+        self.assertAlmostEqual(time.monotonic() - start, 0.1, delta=0.05)
+
+        with self.assertRaises(CaptureEndError):
+            replay.read(timeout=1)
+
+    def test_read_timeout(self):
+        replay = CaptureReplay([CaptureRecord(0.0, IN, b"a"), CaptureRecord(10.0, IN, b"b")])
+        replay.read()
+
+        with self.assertRaises(IoTimeoutError):
+            replay.read(timeout=0.05)
+
+    def test_incoming_waits_for_write(self):
+        replay = CaptureReplay([CaptureRecord(0.0, OUT, b"q"), CaptureRecord(5.0, IN, b"r")], speed=None)
+
+        with self.assertRaises(IoTimeoutError):
+            replay.read(timeout=0)
+
+        replay.written()
+        self.assertEqual(replay.read(timeout=0).data, b"r")
+
+    def test_blocking_read_waits_for_write(self):
+        replay = CaptureReplay([CaptureRecord(0.0, OUT, b"q"), CaptureRecord(5.0, IN, b"r")], speed=None)
+        timer = threading.Timer(0.05, replay.written)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertEqual(replay.read().data, b"r")
+
+    def test_write_keeps_preceding_incoming(self):
+        replay = CaptureReplay([CaptureRecord(0.0, IN, b"a"), CaptureRecord(0.0, OUT, b"q"), CaptureRecord(5.0, IN, b"r")], speed=None)
+
+        self.assertEqual(replay.written().data, b"q")
+        self.assertEqual(replay.read(timeout=0).data, b"a")
+        self.assertEqual(replay.read(timeout=0).data, b"r")
+
+
+class ReplayIoTests(CaptureTestCase):
+
+    def test_cdc(self):
+        with SimulatedCdcDevice() as device, cdc.open(device.port) as io:
+            with CaptureWriter(self.path).attach(io):
+                self.assertIsInstance(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse)
+                device.push_reaction(b"\x01\x02")
+                self.assertEqual(io.receive(timeout=1).data, b"\x01\x02")
+                self.assertEqual(io.send(cdc.DataSendRequest(b"\x03"), timeout=1).status, cdc.CdcStatus.OK)
+
+        with cdc.ReplayCdcIo(self.path, speed=None) as io:
+            self.assertIsInstance(io.send(cdc.TestRequest(), timeout=1), cdc.TestResponse)
+            self.assertEqual(io.receive(timeout=1).data, b"\x01\x02")
+            self.assertEqual(io.send(cdc.DataSendRequest(b"\x03"), timeout=1).status, cdc.CdcStatus.OK)
+
+            with self.assertRaises(CaptureEndError):
+                io.receive(timeout=1)
+
+    def test_spi(self):
+        module = SimulatedTrModule()
+
+        with module.open() as io:
+            with CaptureWriter(self.path, compress=True).attach(io):
+                self.assertIsInstance(io.send(spi.DataSendRequest(b"\x03"), timeout=1), spi.DataSendResponse)
+                module.push_reaction(b"\x01\x02", delay=0.02)
+                self.assertEqual(io.receive(timeout=1).data, b"\x01\x02")
+
+        with spi.ReplaySpiIo(self.path) as io:
+            self.assertIsInstance(io.send(spi.DataSendRequest(b"\x03"), timeout=1), spi.DataSendResponse)
+
+            start = time.monotonic()
+            self.assertEqual(io.receive(timeout=1).data, b"\x01\x02")
+            self.assertGreater(time.monotonic() - start, 0.01)
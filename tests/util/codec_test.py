@@ -67,3 +67,58 @@ class ReactionTests(unittest.TestCase):
 
         with self.assertRaises(NotImplementedError):
             reaction.encode()
+
+
+class MessageRegistryTests(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = codec.MessageRegistry(codec.Request, "request")
+
+    def test_lookup(self):
+        self.registry.register(codec.Request, b"A")
+
+        self.assertEqual(self.registry.get_type(b"A"), codec.Request)
+        self.assertEqual(self.registry.get_id(codec.Request), b"A")
+        self.assertIsNone(self.registry.get_type(b"B"))
+        self.assertIsNone(self.registry.get_id(codec.Response))
+        self.assertIn(codec.Request, self.registry)
+
+    def test_invalid_type(self):
+        with self.assertRaises(ValueError):
+            self.registry.register(codec.Response, b"A")
+
+    def test_duplicate_type(self):
+        self.registry.register(codec.Request, b"A")
+
+        with self.assertRaises(ValueError):
+            self.registry.register(codec.Request, b"B")
+
+    def test_duplicate_id(self):
+        class OtherRequest(codec.Request):
+            pass
+
+        self.registry.register(codec.Request, b"A")
+
+        with self.assertRaises(ValueError):
+            self.registry.register(OtherRequest, b"A")
+
+    def test_deferred_defaults(self):
+        calls = []
+
+        def defaults():
+            calls.append(None)
+            return [(codec.Request, b"A")]
+
+        registry = codec.MessageRegistry(codec.Request, "request", defaults)
+        self.assertEqual(calls, [])
+
+        self.assertEqual(registry.get_type(b"A"), codec.Request)
+        self.assertEqual(registry.get_id(codec.Request), b"A")
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(len(calls), 1)
+
+    def test_deferred_defaults_before_register(self):
+        registry = codec.MessageRegistry(codec.Request, "request", lambda: [(codec.Request, b"A")])
+
+        with self.assertRaises(ValueError):
+            registry.register(codec.Request, b"B")
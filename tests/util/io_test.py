@@ -10,3 +10,79 @@ class IoTests(unittest.TestCase):
         time = 2**16
         self.assertEqual(time, io.to_iotime(time))
         self.assertEqual(sys.maxsize, io.to_iotime(None))
+
+
+def feed(data):
+    def readinto(buffer):
+        count = min(len(buffer), len(data))
+        buffer[:count] = data[:count]
+        del data[:count]
+        return count
+
+    data = bytearray(data)
+    return readinto
+
+
+class FrameBufferTests(unittest.TestCase):
+
+    def test_split_frames(self):
+        frames = io.FrameBuffer(b"\r")
+        frames.fill(feed(b"<OK\r<DR\x01:a\r<DS"))
+
+        self.assertEqual(bytes(frames.next_frame()), b"<OK\r")
+        self.assertEqual(bytes(frames.next_frame()), b"<DR\x01:a\r")
+        self.assertIsNone(frames.next_frame())
+        self.assertEqual(len(frames), 3)
+
+        frames.extend(b":OK\r")
+
+        self.assertEqual(bytes(frames.next_frame()), b"<DS:OK\r")
+        self.assertEqual(len(frames), 0)
+
+    def test_compaction(self):
+        frames = io.FrameBuffer(b"\r", capacity=512)
+        stream = b"".join(b"<DR\x05:" + bytes([i % 10 + 0x30]) * 5 + b"\r" for i in range(1000))
+        source = feed(stream)
+        decoded = []
+
+        while frames.fill(source) > 0:
+            frame = frames.next_frame()
+            while frame is not None:
+                decoded.append(bytes(frame))
+                frame = frames.next_frame()
+
+        self.assertEqual(b"".join(decoded), stream)
+
+    def test_growth(self):
+        frames = io.FrameBuffer(b"\r", capacity=256)
+        frame = b"x" * 1000 + b"\r"
+        frames.extend(frame)
+
+        self.assertEqual(bytes(frames.next_frame()), frame)
+
+
+class PollingSchedulerTests(unittest.TestCase):
+
+    def test_returns_accepted_result(self):
+        results = iter(range(100))
+        scheduler = io.PollingScheduler(spin=0, initial_interval=0.0001)
+
+        delta, result = scheduler.wait(lambda: next(results), lambda x: x == 5, timeout=1)
+
+        self.assertEqual(result, 5)
+        self.assertEqual(scheduler.iterations, 6)
+
+    def test_backoff(self):
+        pauses = []
+        scheduler = io.PollingScheduler(spin=0, initial_interval=0.001, maximum_interval=0.004, wakeup=pauses.append)
+        results = iter(range(100))
+
+        scheduler.wait(lambda: next(results), lambda x: x == 5)
+
+        self.assertEqual(pauses, [0.001, 0.002, 0.004, 0.004, 0.004])
+
+    def test_timeout(self):
+        scheduler = io.PollingScheduler()
+
+        with self.assertRaises(io.IoTimeoutError):
+            scheduler.wait(lambda: None, lambda x: False, timeout=0.01)
@@ -0,0 +1,98 @@
+import random
+import unittest
+import urllib.error
+import urllib.request
+
+from iqrf.simulator.cdc import SimulatedCdcDevice
+from iqrf.simulator.spi import SimulatedTrModule
+from iqrf.transport import cdc, spi
+from iqrf.util.metrics import Histogram, MetricsRegistry, MetricsServer
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertIsNone(Histogram().percentile(0.5))
+
+    def test_exact_small_values(self):
+        histogram = Histogram(unit=1)
+
+        for value in range(1, 11):
+            histogram.record(value)
+
+        self.assertEqual(histogram.percentile(0.5), 6)
+        self.assertEqual(histogram.percentile(1.0), 10)
+        self.assertEqual((histogram.count, histogram.sum, histogram.min, histogram.max), (10, 55, 1, 10))
+
+    def test_relative_error(self):
+        generator = random.Random(0)
+        values = sorted(generator.lognormvariate(-7, 1.5) for _ in range(10000))
+        histogram = Histogram(precision=5)
+
+        for value in values:
+            histogram.record(value)
+
+        for fraction in (0.5, 0.9, 0.99):
+            expected = values[int(round(fraction * len(values))) - 1]
+            self.assertAlmostEqual(histogram.percentile(fraction) / expected, 1, delta=2 ** -5 + 1e-6 / expected)
+
+
+class MetricsRegistryTests(unittest.TestCase):
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        metrics = registry.transport("cdc", "/dev/tty\"ACM0\"")
+        metrics.frames_in = 3
+        metrics.send_latency.record(0.002)
+
+        text = registry.render()
+
+        self.assertIn("# TYPE iqrf_transport_frames_in_total counter\n", text)
+        self.assertIn("iqrf_transport_frames_in_total{transport=\"cdc\",device=\"/dev/tty\\\"ACM0\\\"\"} 3\n", text)
+        self.assertIn("iqrf_transport_send_latency_seconds_count{transport=\"cdc\",device=\"/dev/tty\\\"ACM0\\\"\"} 1\n", text)
+        self.assertIn("quantile=\"0.5\"} 0.002", text)
+
+    def test_cdc_channel(self):
+        registry = MetricsRegistry()
+
+        with SimulatedCdcDevice() as device, cdc.open(device.port) as io:
+            metrics = registry.attach(io, device.port)
+            self.assertEqual(metrics.transport, "cdc")
+
+            device.push_reaction(b"\x01\x02")
+            io.receive(timeout=1)
+            io.send(cdc.TestRequest(), timeout=1)
+
+        self.assertEqual((metrics.frames_in, metrics.frames_out), (2, 1))
+        self.assertEqual((metrics.bytes_in, metrics.bytes_out), (len(b"<DR\x02:\x01\x02\r<OK\r"), 2))
+        self.assertEqual(metrics.send_latency.count, 1)
+
+    def test_spi_channel(self):
+        registry = MetricsRegistry()
+        module = SimulatedTrModule()
+
+        with module.open() as io:
+            metrics = registry.attach(io, "spidev0.0")
+            module.push_reaction(b"\x01\x02")
+            io.send(spi.DataSendRequest(b"\x03"), timeout=1)
+
+        self.assertEqual(metrics.transport, "spi")
+        self.assertEqual((metrics.frames_in, metrics.frames_out, metrics.reactions_queued), (2, 1, 1))
+        self.assertGreaterEqual(metrics.status_polls, 2)
+        self.assertEqual(metrics.send_latency.count, 1)
+
+
+class MetricsServerTests(unittest.TestCase):
+
+    def test_serves_metrics(self):
+        registry = MetricsRegistry()
+        registry.transport("udp", "gateway").frames_out = 7
+
+        with MetricsServer(registry, port=0) as server:
+            url = "http://{}:{}".format(*server.address)
+
+            with urllib.request.urlopen(url + "/metrics", timeout=5) as response:
+                self.assertIn(b"iqrf_transport_frames_out_total{transport=\"udp\",device=\"gateway\"} 7", response.read())
+
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(url + "/other", timeout=5)
@@ -0,0 +1,74 @@
+import threading
+import unittest
+
+from iqrf.util.io import IoTimeoutError
+from iqrf.util.queue import OverflowPolicy, QueueClosedError, QueueOverflowError, ReactionQueue
+
+
+class ReactionQueueTests(unittest.TestCase):
+
+    def test_fifo(self):
+        queue = ReactionQueue()
+        queue.put(1)
+        queue.put(2)
+
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.get(), 1)
+        self.assertEqual(queue.get(), 2)
+
+    def test_get_timeout(self):
+        with self.assertRaises(IoTimeoutError):
+            ReactionQueue().get(timeout=0.01)
+
+    def test_drop_oldest(self):
+        queue = ReactionQueue(2, OverflowPolicy.DROP_OLDEST)
+        for item in range(3):
+            queue.put(item)
+
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual([queue.get(), queue.get()], [1, 2])
+
+    def test_raise(self):
+        queue = ReactionQueue(1, OverflowPolicy.RAISE)
+        queue.put(0)
+
+        with self.assertRaises(QueueOverflowError):
+            queue.put(1)
+
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get(), 0)
+
+    def test_block(self):
+        queue = ReactionQueue(1, OverflowPolicy.BLOCK)
+        queue.put(0)
+
+        with self.assertRaises(QueueOverflowError):
+            queue.put(1, timeout=0.01)
+
+        threading.Timer(0.02, queue.get).start()
+        queue.put(2, timeout=1)
+
+        self.assertEqual(queue.get(), 2)
+
+    def test_close(self):
+        queue = ReactionQueue()
+        queue.put(0)
+        queue.close()
+
+        self.assertEqual(queue.get(), 0)
+
+        with self.assertRaises(QueueClosedError):
+            queue.get()
+
+    def test_close_wakes_blocked_put(self):
+        queue = ReactionQueue(1, OverflowPolicy.BLOCK)
+        queue.put(0)
+        threading.Timer(0.02, queue.close).start()
+
+        with self.assertRaises(QueueClosedError):
+            queue.put(1, timeout=1)
+
+        self.assertEqual(queue.get(), 0)
+
+        with self.assertRaises(QueueClosedError):
+            queue.get()